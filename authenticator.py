@@ -1,71 +1,159 @@
-import base64
-import struct
-import hmac
-import hashlib
-import time
-import json
-from dataclasses import dataclass
-from typing import Union, Literal
-import errors
-from models import request
-
-@dataclass
-class ChallangeData:
-    rblx_challange_id: str
-    rblx_challange_metadata: str
-    rblx_challange_type: Union[Literal["twostepverification"], str]
-
-class AutoPass:
-    def __init__(self, secret: str):
-        self.secret = secret.strip().replace(" ", "")
-
-    @staticmethod
-    def _base32_decode(s: str) -> bytes:
-        s2 = s.upper()
-        # pad
-        missing = len(s2) % 8
-        if missing:
-            s2 += "=" * (8 - missing)
-        return base64.b32decode(s2)
-
-    @staticmethod
-    def totp(secret: str) -> Union[str, errors.InvalidOtp]:
-        if not secret:
-            raise errors.InvalidOtp("Empty secret")
-        try:
-            key = AutoPass._base32_decode(secret)
-            timestep = int(time.time()) // 30
-            msg = struct.pack(">Q", timestep)
-            h = hmac.new(key, msg, hashlib.sha1).digest()
-            o = h[19] & 15
-            code = (struct.unpack(">I", h[o:o+4])[0] & 0x7fffffff) % 1000000
-            return f"{code:06d}"
-        except Exception:
-            raise errors.InvalidOtp("Failed to generate TOTP")
-
-    async def __call__(self, previous_request: "request.Request", challenge_data: ChallangeData) -> Union["request.Request", errors.InvalidOtp]:
-        if challenge_data.rblx_challange_type != "twostepverification":
-            raise errors.InvalidChallangeType("Not an authenticator challenge")
-        try:
-            meta = json.loads(base64.b64decode(challenge_data.rblx_challange_metadata).decode("utf-8"))
-        except Exception as e:
-            raise errors.InvalidOtp("Invalid challenge metadata")
-
-        code = self.totp(self.secret)
-        if not code:
-            raise errors.InvalidOtp("Cannot generate otp")
-        # Build verification request
-        new_req = request.Request(
-            url = f"https://twostepverification.roblox.com/v1/users/{previous_request.user_id}/challenges/authenticator/verify",
-            method = "post",
-            headers = previous_request.headers,
-            proxy = previous_request.proxy,
-            session = previous_request.session,
-            close_session = previous_request.close_session,
-            json_data = {
-                "challengeId": meta.get("challengeId"),
-                "actionType": meta.get("actionType"),
-                "code": code
-            }
-        )
-        return new_req
\ No newline at end of file
+import base64
+import struct
+import hmac
+import hashlib
+import time
+import json
+import functools
+from dataclasses import dataclass
+from typing import Union, Literal, Dict, Optional
+import errors
+import metrics
+from models import request
+
+@dataclass
+class ChallangeData:
+    rblx_challange_id: str
+    rblx_challange_metadata: str
+    rblx_challange_type: Union[Literal["twostepverification"], str]
+
+class AutoPass:
+    def __init__(self, secret: str):
+        self.secret = secret.strip().replace(" ", "")
+        # decode once, the key never changes
+        try:
+            self.key: Optional[bytes] = self._base32_decode(self.secret) if self.secret else None
+        except Exception:
+            self.key = None
+        # timestep -> code, holds the current and the next window
+        self._codes: Dict[int, str] = {}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _base32_decode(s: str) -> bytes:
+        s2 = s.upper()
+        # pad
+        missing = len(s2) % 8
+        if missing:
+            s2 += "=" * (8 - missing)
+        return base64.b32decode(s2)
+
+    @staticmethod
+    def _hotp(key: bytes, timestep: int) -> str:
+        msg = struct.pack(">Q", timestep)
+        h = hmac.new(key, msg, hashlib.sha1).digest()
+        o = h[19] & 15
+        code = (struct.unpack(">I", h[o:o+4])[0] & 0x7fffffff) % 1000000
+        return f"{code:06d}"
+
+    @staticmethod
+    def totp(secret: str) -> Union[str, errors.InvalidOtp]:
+        if not secret:
+            raise errors.InvalidOtp("Empty secret")
+        try:
+            key = AutoPass._base32_decode(secret)
+            return AutoPass._hotp(key, int(time.time()) // 30)
+        except Exception:
+            raise errors.InvalidOtp("Failed to generate TOTP")
+
+    def prime(self, now: Optional[float] = None) -> None:
+        """Precompute the codes for the current and the next 30s window"""
+        if self.key is None:
+            raise errors.InvalidOtp("No valid otp secret")
+        step = int(now if now is not None else time.time()) // 30
+        self._codes = {s: self._codes.get(s) or self._hotp(self.key, s) for s in (step, step + 1)}
+
+    def code(self, now: Optional[float] = None) -> str:
+        step = int(now if now is not None else time.time()) // 30
+        code = self._codes.get(step)
+        if code is None or step + 1 not in self._codes:
+            self.prime(now)
+            code = self._codes[step]
+        return code
+
+    async def __call__(self, previous_request: "request.Request", challenge_data: ChallangeData,
+                       deadline: Optional["request.Deadline"] = None) -> Union["request.Request", errors.InvalidOtp]:
+        if challenge_data.rblx_challange_type != "twostepverification":
+            raise errors.InvalidChallangeType("Not an authenticator challenge")
+        try:
+            meta = json.loads(base64.b64decode(challenge_data.rblx_challange_metadata).decode("utf-8"))
+        except Exception as e:
+            raise errors.InvalidOtp("Invalid challenge metadata")
+
+        code = self.code()
+        if not code:
+            raise errors.InvalidOtp("Cannot generate otp")
+        # Build verification request
+        new_req = request.Request(
+            url = f"https://twostepverification.roblox.com/v1/users/{previous_request.user_id}/challenges/authenticator/verify",
+            method = "post",
+            headers = previous_request.headers,
+            proxy = previous_request.proxy,
+            session = previous_request.session,
+            close_session = previous_request.close_session,
+            deadline = deadline or previous_request.deadline,
+            json_data = {
+                "challengeId": meta.get("challengeId"),
+                "actionType": meta.get("actionType"),
+                "code": code
+            }
+        )
+        return new_req
+
+    async def solve(self, previous_request: "request.Request", challenge_id: str, challenge_type: str, challenge_metadata: str,
+                    remaining: Optional[float] = None) -> Dict[str, str]:
+        """
+        Answer a rblx-challenge on previous_request: verify the authenticator code, continue the
+        challenge and return the headers the original request must be replayed with.
+        Both calls fit in the `remaining` seconds of the original send, so a slow solve times out
+        instead of leaving nothing for the replay.
+        """
+        challenge_data = ChallangeData(
+            rblx_challange_id=challenge_id,
+            rblx_challange_metadata=challenge_metadata,
+            rblx_challange_type=challenge_type
+        )
+        meta = json.loads(base64.b64decode(challenge_metadata).decode("utf-8"))
+
+        base = previous_request.deadline or request.POLL_DEADLINE
+        expires_at = time.monotonic() + remaining if remaining is not None else None
+
+        def deadline() -> "request.Deadline":
+            return base if expires_at is None else base.capped(expires_at - time.monotonic())
+
+        t0 = time.perf_counter()
+        verify_req = await self(previous_request, challenge_data, deadline())
+        verified = await verify_req.send()
+        token = getattr(verified.response_json, "verificationToken", None)
+        if not token:
+            raise errors.InvalidOtp(f"Verification rejected (status {verified.status_code})")
+        t1 = time.perf_counter()
+        metrics.registry.observe("challenge", "verify", t1 - t0)
+
+        replay_meta = json.dumps({
+            "verificationToken": token,
+            "rememberDevice": False,
+            "challengeId": meta.get("challengeId"),
+            "actionType": meta.get("actionType")
+        })
+        await request.Request(
+            url = "https://apis.roblox.com/challenge/v1/continue",
+            method = "post",
+            headers = previous_request.headers,
+            proxy = previous_request.proxy,
+            session = previous_request.session,
+            close_session = previous_request.close_session,
+            deadline = deadline(),
+            json_data = {
+                "challengeId": challenge_id,
+                "challengeType": challenge_type,
+                "challengeMetadata": replay_meta
+            }
+        ).send()
+        metrics.registry.observe("challenge", "continue", time.perf_counter() - t1)
+
+        return {
+            "rblx-challenge-id": challenge_id,
+            "rblx-challenge-type": challenge_type,
+            "rblx-challenge-metadata": base64.b64encode(replay_meta.encode("utf-8")).decode("ascii")
+        }
\ No newline at end of file
@@ -0,0 +1,298 @@
+# backtest.py
+"""
+Offline backtester for the buy_settings thresholds.
+
+Replays the ProxyThread.ineligible_reason rules (price_measurer, min_percentage_off, min_robux_off,
+max_robux_cost, deal filter, per-item custom_settings) over recorded price observations and
+Rolimons snapshots, for every combination in a parameter grid, with NumPy and a process pool.
+
+    python backtest.py --observations journal.jsonl --rolimons snapshots/*.json \\
+        --grid min_percentage_off=20,30,40 --grid min_robux_off=0,250,500 \\
+        --grid price_measurer=value_rap,rap --grid deal_filter_min_percentage=10
+
+observations: JSON lines with at least item_id and price (ts optional). The sniper journal's
+    "decision" records work as is; other kinds are skipped.
+rolimons: one or more itemdetails payloads. A file may carry its own "ts" key, otherwise its
+    mtime is used; each observation is valued with the latest snapshot at or before it.
+Settings not in the grid come from config.json's buy_settings. The balance ledger is not
+simulated: every eligible observation counts as a buy at the observed price.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CONFIG_PATH = Path(__file__).parent / "config.json"
+MEASURERS = ("value", "rap", "value_rap")
+GRID_KEYS = ("min_percentage_off", "min_robux_off", "max_robux_cost", "price_measurer", "deal_filter_min_percentage")
+
+
+# ---------------------------------------------------------
+# LOADING
+# ---------------------------------------------------------
+def load_observations(path: Path) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    ids, prices, stamps = [], [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("kind", "decision") != "decision":
+                continue
+            try:
+                ids.append(int(entry["item_id"]))
+                prices.append(int(entry["price"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            stamps.append(float(entry.get("ts", 0)))
+    return np.asarray(ids, dtype=np.int64), np.asarray(prices, dtype=np.int64), np.asarray(stamps, dtype=np.float64)
+
+
+def load_snapshot(path: Path) -> Tuple[float, "np.ndarray", "np.ndarray"]:
+    """-> (ts, sorted item ids, rows of (rap, value, projected))"""
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    ts = float(payload.get("ts") or os.path.getmtime(path))
+    ids, rows = [], []
+    for item_id, arr in payload.get("items", {}).items():
+        if not isinstance(arr, list) or len(arr) < 10:
+            continue
+        ids.append(int(item_id))
+        rows.append((arr[2] if arr[2] != -1 else 0, arr[4] if arr[4] != -1 else 0, arr[7]))
+    ids_arr = np.asarray(ids, dtype=np.int64)
+    rows_arr = np.asarray(rows, dtype=np.int64).reshape(-1, 3)
+    order = np.argsort(ids_arr)
+    return ts, ids_arr[order], rows_arr[order]
+
+
+def join(obs_ids: "np.ndarray", obs_ts: "np.ndarray", snapshots: List[Tuple[float, "np.ndarray", "np.ndarray"]]) -> "np.ndarray":
+    """(rap, value, projected) per observation from the latest snapshot at or before it; projected=-2 if unknown"""
+    snapshots = sorted(snapshots, key=lambda s: s[0])
+    snap_ts = np.asarray([s[0] for s in snapshots])
+    # observations older than every snapshot use the first one
+    which = np.clip(np.searchsorted(snap_ts, obs_ts, side="right") - 1, 0, len(snapshots) - 1)
+
+    out = np.zeros((len(obs_ids), 3), dtype=np.int64)
+    out[:, 2] = -2
+    for s, (_, ids, rows) in enumerate(snapshots):
+        mask = which == s
+        if not mask.any() or not len(ids):
+            continue
+        wanted = obs_ids[mask]
+        pos = np.clip(np.searchsorted(ids, wanted), 0, len(ids) - 1)
+        found = ids[pos] == wanted
+        block = np.zeros((len(wanted), 3), dtype=np.int64)
+        block[:, 2] = -2
+        block[found] = rows[pos[found]]
+        out[mask] = block
+    return out
+
+
+# ---------------------------------------------------------
+# EVALUATION
+# ---------------------------------------------------------
+_DATA: Dict[str, Any] = {}
+
+
+def _init_worker(data: Dict[str, Any]):
+    _DATA.update(data)
+
+
+def _base(measurer: str, rap: "np.ndarray", value: "np.ndarray") -> "np.ndarray":
+    if measurer == "value":
+        return value
+    if measurer == "rap":
+        return rap
+    return np.where(value != 0, value, rap)
+
+
+def _pct_off(price: "np.ndarray", base: "np.ndarray") -> "np.ndarray":
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base > 0, (base - price) / np.where(base > 0, base, 1) * 100.0, 0.0)
+
+
+def _passes(price, base, pct, min_pct, min_robux, max_cost, deal_filter) -> "np.ndarray":
+    """Same rule order and truthiness as ProxyThread.ineligible_reason"""
+    ok = base > 0
+    if min_pct:
+        ok &= pct >= min_pct
+    if min_robux:
+        ok &= (base - price) >= min_robux
+    if max_cost:
+        ok &= price <= max_cost
+    if deal_filter is not None:
+        ok &= pct >= float(deal_filter)
+    return ok
+
+
+def measurer(pm: Any) -> str:
+    """Unknown measurers count as value_rap, like ineligible_reason does"""
+    return pm if pm in MEASURERS else "value_rap"
+
+
+def evaluate(params: Dict[str, Any]) -> Dict[str, Any]:
+    d = _DATA
+    price = d["price"]
+    pm = measurer(params.get("price_measurer"))
+    base, pct = d["base"][pm], d["pct"][pm]
+    deal_filter = params.get("deal_filter_min_percentage")
+
+    ok = d["generic_rows"] & _passes(price, base, pct, params.get("min_percentage_off"), params.get("min_robux_off"),
+                                     params.get("max_robux_cost"), deal_filter)
+    # custom_settings replace the generic settings for their item, the grid doesn't touch them
+    # (except the global deal filter)
+    if d["has_custom"]:
+        custom_ok = d["custom_ok"]
+        if deal_filter is not None:
+            custom_ok = custom_ok & (d["custom_pct"] >= float(deal_filter))
+        ok |= custom_ok
+        base = np.where(d["generic_rows"], base, d["custom_base"])
+
+    hits = int(np.count_nonzero(ok))
+    spend = int(price[ok].sum())
+    profit = int((base[ok] - price[ok]).sum())
+    return {
+        **params,
+        "hits": hits,
+        "items": int(np.count_nonzero(np.bincount(d["item_idx"][ok], minlength=d["item_count"]))) if hits else 0,
+        "spend": spend,
+        "profit": profit,
+        "roi_pct": round(profit / spend * 100, 2) if spend else 0.0,
+    }
+
+
+def prepare(ids, prices, joined, custom_settings: Dict[str, dict]) -> Dict[str, Any]:
+    """Everything that doesn't depend on the grid: bases and pct off per measurer, custom item rules"""
+    rap, value, projected = joined[:, 0], joined[:, 1], joined[:, 2]
+    known = projected == -1
+
+    base = {pm: _base(pm, rap, value) for pm in MEASURERS}
+    pct = {pm: _pct_off(prices, b) for pm, b in base.items()}
+
+    custom_rows = np.zeros(len(ids), dtype=bool)
+    custom_base = np.zeros(len(ids), dtype=np.int64)
+    custom_pct = np.zeros(len(ids), dtype=np.float64)
+    custom_ok = np.zeros(len(ids), dtype=bool)
+    for key, rules in custom_settings.items():
+        try:
+            mask = ids == int(key)
+        except ValueError:
+            continue
+        if not mask.any() or not isinstance(rules, dict):
+            continue
+        pm = measurer(rules.get("price_measurer"))
+        custom_rows |= mask
+        custom_base[mask] = base[pm][mask]
+        custom_pct[mask] = pct[pm][mask]
+        # deal filter is global and may be part of the grid, it is applied in evaluate()
+        custom_ok[mask] = known[mask] & _passes(prices[mask], base[pm][mask], pct[pm][mask], rules.get("min_percentage_off"),
+                                                rules.get("min_robux_off"), rules.get("max_robux_cost"), None)
+
+    unique_ids, item_idx = np.unique(ids, return_inverse=True)
+    return {
+        "price": prices,
+        "base": base,
+        "pct": pct,
+        "item_idx": item_idx,
+        "item_count": len(unique_ids),
+        "generic_rows": known & ~custom_rows,
+        "has_custom": bool(custom_rows.any()),
+        "custom_base": custom_base,
+        "custom_pct": custom_pct,
+        "custom_ok": custom_ok,
+    }
+
+
+def parse_grid(specs: List[str], generic: Dict[str, Any]) -> List[Dict[str, Any]]:
+    axes: Dict[str, List[Any]] = {k: [generic.get(k)] for k in GRID_KEYS}
+    for spec in specs:
+        key, _, raw = spec.partition("=")
+        if key not in GRID_KEYS:
+            raise SystemExit(f"Unknown grid key {key!r}, expected one of {', '.join(GRID_KEYS)}")
+        values: List[Any] = []
+        for v in raw.split(","):
+            v = v.strip()
+            if key == "price_measurer":
+                if v not in MEASURERS:
+                    raise SystemExit(f"price_measurer must be one of {', '.join(MEASURERS)}")
+                values.append(v)
+            elif v.lower() in ("", "none", "off"):
+                values.append(None)
+            else:
+                values.append(float(v))
+        axes[key] = values
+    keys = list(axes)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(axes[k] for k in keys))]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest buy_settings thresholds")
+    parser.add_argument("--observations", type=Path, required=True)
+    parser.add_argument("--rolimons", type=Path, nargs="+", required=True)
+    parser.add_argument("--config", type=Path, default=CONFIG_PATH)
+    parser.add_argument("--grid", action="append", default=[], help="key=v1,v2,... (repeatable)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", default="profit", choices=["profit", "hits", "spend", "roi_pct"])
+    parser.add_argument("--json", action="store_true", help="print all results as json")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        raise SystemExit("backtest.py needs numpy: pip install numpy")
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    buy_settings = config.get("buy_settings", {})
+    generic = dict(buy_settings.get("generic_settings", {}))
+    # same precedence as WatchLimiteds: top-level deal filter wins over the generic one
+    if config.get("deal_filter_min_percentage"):
+        generic["deal_filter_min_percentage"] = config["deal_filter_min_percentage"]
+
+    t0 = time.perf_counter()
+    ids, prices, stamps = load_observations(args.observations)
+    joined = join(ids, stamps, [load_snapshot(p) for p in args.rolimons])
+    data = prepare(ids, prices, joined, buy_settings.get("custom_settings", {}))
+    grid = parse_grid(args.grid, generic)
+    t1 = time.perf_counter()
+
+    if args.workers > 1 and len(grid) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(data,)) as pool:
+            results = list(pool.map(evaluate, grid, chunksize=max(1, len(grid) // (args.workers * 4))))
+    else:
+        _init_worker(data)
+        results = [evaluate(params) for params in grid]
+    t2 = time.perf_counter()
+
+    results.sort(key=lambda r: r[args.sort], reverse=True)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{len(ids)} observations, {len(args.rolimons)} snapshot(s), {len(grid)} configs; load {t1 - t0:.2f}s, evaluate {t2 - t1:.2f}s")
+    header = ["pm", "min%", "minR$", "maxR$", "filter%", "hits", "items", "spend", "profit", "roi%"]
+    rows = [[
+        "-" if v is None else str(v) for v in (
+            r["price_measurer"], r["min_percentage_off"], r["min_robux_off"], r["max_robux_cost"], r["deal_filter_min_percentage"],
+            r["hits"], r["items"], r["spend"], r["profit"], r["roi_pct"]
+        )
+    ] for r in results[:args.top]]
+    # columns as wide as their widest cell, so large spend / profit sums don't run together
+    widths = [max(len(cell) for cell in column) for column in zip(header, *rows)]
+    for row in [header] + rows:
+        print("  ".join(f"{cell:>{w}}" for cell, w in zip(row, widths)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
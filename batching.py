@@ -0,0 +1,108 @@
+# batching.py
+from typing import List, Optional
+
+import metrics
+
+# statuses that mean "the batch itself was refused" rather than a transient failure
+REJECT_STATUSES = (400, 413, 414)
+# rate limited: says nothing about the size, Request.send already waited out Retry-After
+RATE_LIMIT_STATUSES = (429,)
+
+
+class BatchSizer:
+    """
+    Adaptive batch size for one details endpoint.
+
+    Every `window` batches the sizer compares the items/second it got at the current size with the
+    previous window and keeps stepping in whichever direction improved throughput, as long as the
+    average latency stays under latency_target. A rejected batch (400/413/414) halves the size
+    (or steps back once if it was a probe one step past a size that worked) and caps it just
+    below the rejected size; the cap is relaxed one step after every `relax_after`
+    clean windows. A rate limited batch (429) leaves size and window alone: its latency is mostly
+    the Retry-After wait. The current size is exported as the batch_size gauge.
+    """
+
+    def __init__(self, name: str, initial: int, minimum: int = 10, maximum: int = 120, step: int = 10,
+                 latency_target: float = 1.5, window: int = 5, relax_after: int = 12):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.latency_target = latency_target
+        self.window = window
+        self.relax_after = relax_after
+
+        self.current = max(minimum, min(maximum, initial))
+        self.ceiling = maximum
+        self.direction = 1
+        self.last_throughput: Optional[float] = None
+        self.clean_windows = 0
+        self.last_ok = 0
+
+        self._latencies: List[float] = []
+        self._throughputs: List[float] = []
+        self._errors = 0
+        self._publish()
+
+    def size(self) -> int:
+        return self.current
+
+    def record(self, size: int, latency: float, ok: bool = True, status: Optional[int] = None) -> None:
+        if status in RATE_LIMIT_STATUSES:
+            metrics.registry.inc("batch_rate_limited", self.name)
+            return
+        if status in REJECT_STATUSES:
+            metrics.registry.inc("batch_rejected", self.name)
+            self.ceiling = max(self.minimum, size - self.step)
+            # one step past a size that just worked: step back, otherwise back off hard
+            fallback = size - self.step if self.last_ok and size <= self.last_ok + self.step else size // 2
+            self.current = max(self.minimum, min(self.ceiling, fallback))
+            self.direction = 1
+            self.last_throughput = None
+            self.clean_windows = 0
+            self._reset_window()
+            self._publish()
+            return
+
+        if ok and latency > 0:
+            self.last_ok = size
+            self._latencies.append(latency)
+            self._throughputs.append(size / latency)
+        else:
+            self._errors += 1
+            self._latencies.append(latency)
+
+        if len(self._latencies) >= self.window:
+            self._adjust()
+
+    def _adjust(self) -> None:
+        avg_latency = sum(self._latencies) / len(self._latencies)
+        throughput = sum(self._throughputs) / len(self._throughputs) if self._throughputs else 0.0
+        error_rate = self._errors / len(self._latencies)
+        self._reset_window()
+
+        if avg_latency > self.latency_target or error_rate > 0.2:
+            self.direction = -1
+            self.clean_windows = 0
+        else:
+            if self.last_throughput is not None and throughput < self.last_throughput * 0.98:
+                self.direction = -self.direction
+            self.clean_windows += 1
+            if self.ceiling < self.maximum and self.clean_windows >= self.relax_after:
+                self.ceiling = min(self.maximum, self.ceiling + self.step)
+                self.clean_windows = 0
+
+        self.last_throughput = throughput
+        self.current = max(self.minimum, min(self.ceiling, self.current + self.direction * self.step))
+        metrics.registry.set("batch_throughput", self.name, round(throughput, 1))
+        metrics.registry.set("batch_latency_ms", self.name, round(avg_latency * 1000, 1))
+        self._publish()
+
+    def _reset_window(self) -> None:
+        self._latencies = []
+        self._throughputs = []
+        self._errors = 0
+
+    def _publish(self) -> None:
+        metrics.registry.set("batch_size", self.name, self.current)
+        metrics.registry.set("batch_ceiling", self.name, self.ceiling)
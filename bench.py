@@ -0,0 +1,241 @@
+# bench.py
+"""
+Micro-benchmarks for the pure (non-network) hot path.
+
+    python bench.py                    # run, compare against bench_baseline.json
+    python bench.py --update           # run and store the results as the new baseline
+    python bench.py --threshold 0.15   # fail when a bench is >15% slower than its baseline
+    python bench.py -k validate        # only benches whose name contains "validate"
+    python bench.py --require-baseline # also fail when a bench has no baseline (e.g. in CI)
+
+Fixtures are synthetic and seeded, so runs are comparable on the same machine.
+Baselines are machine specific: regenerate them with --update on the box that runs the check.
+No baseline is committed for that reason; without one every bench prints "-" and passes, unless
+--require-baseline is given. Exit status is 1 when any bench regressed past the threshold.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from models import items, request, config
+import eventlog
+import helpers
+import ledger
+import metrics
+import sniper
+import authenticator
+
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+SEED = 1234
+
+
+# ---------------------------------------------------------
+# FIXTURES
+# ---------------------------------------------------------
+def rolimons_payload(rng: random.Random, count: int = 20000) -> dict:
+    payload = {"success": True, "item_count": count, "items": {}}
+    for i in range(count):
+        rap = rng.randint(50, 200000)
+        value = rng.choice([-1, -1, rap + rng.randint(-500, 5000)])
+        projected = rng.choice([-1] * 19 + [1])
+        payload["items"][str(1000000 + i)] = [f"Item {i}", "", rap, -1, value, -1, projected, projected, -1, -1]
+    return payload
+
+
+def catalog_payload(rng: random.Random, count: int = 120) -> dict:
+    return {"data": [{
+        "id": 1000000 + i,
+        "itemType": "Asset",
+        "name": f"Item {i}",
+        "productId": rng.randint(1, 10 ** 9),
+        "collectibleItemId": f"{rng.getrandbits(128):032x}",
+        "lowestResalePrice": rng.randint(50, 200000),
+    } for i in range(count)]}
+
+
+def resellers_payload(rng: random.Random) -> dict:
+    return {"data": [{
+        "collectibleItemInstanceId": f"{rng.getrandbits(128):032x}",
+        "collectibleProductId": f"{rng.getrandbits(128):032x}",
+        "sellerId": rng.randint(1, 10 ** 9),
+        "price": rng.randint(50, 200000),
+    }]}
+
+
+def build_benches() -> Dict[str, Callable[[], object]]:
+    rng = random.Random(SEED)
+
+    catalog_url = "https://catalog.roblox.com/v1/catalog/items/details"
+    catalog = catalog_payload(rng)
+    resellers_url = "https://apis.roblox.com/marketplace-sales/v1/item/abc/resellers?limit=1"
+    # validate_json takes the first entry of a list response
+    resellers = resellers_payload(rng)["data"]
+    purchase_url = "https://apis.roblox.com/marketplace-sales/v1/item/abc/purchase-resale"
+    purchase = {"purchasedResult": "Purchase transaction success.", "purchased": True, "pending": False, "errorMessage": None}
+
+    generic = [items.Generic(item_id=1000000 + i, collectible_item_id="") for i in range(120)]
+    buy_data = items.BuyData(
+        collectible_item_id=f"{rng.getrandbits(128):032x}",
+        collectible_item_instance_id=f"{rng.getrandbits(128):032x}",
+        collectible_product_id=f"{rng.getrandbits(128):032x}",
+        expected_price=1234,
+        expected_purchaser_id="1"
+    )
+
+    purchase_template = request.PurchaseTemplate("bench-cookie", 1)
+    purchase_headers = request.Headers(x_csrf_token="bench-token", cookies={".ROBLOSECURITY": "bench-cookie"})
+    plain_purchase = request.Request(url=purchase_url, method="post", headers=purchase_headers)
+    prepared_purchase = purchase_template.request(buy_data, "bench-token")
+
+    roli_payload = rolimons_payload(rng)
+    roli_bytes = json.dumps(roli_payload).encode()
+    index = helpers.RolimonsDataScraper.parse_item_data(roli_payload)
+    details = request.ResponseJsons.validate_json(catalog_url, catalog).items
+    pairs = [(d, index.get(d.item_id) or items.RolimonsData(rap=d.lowest_resale_price * 2)) for d in details]
+    iterator = config.Iterator([items.Generic(item_id=i, collectible_item_id="") for i in range(5000)])
+
+    ui = helpers.UIManager(total_proxies=8, username="bench", robux="1000")
+    for i in range(ui.max_logs):
+        ui.logs.append(f"[00:00:00] [INFO] Item {i} ineligible: base=1000, price=900, pct_off=10.0%")
+    for i in range(200):
+        ui.activity.append({"ts": "00:00:00", "item_id": i, "price": 900, "base_value": 1000, "pct_off": 10.0, "proxy": "local", "note": "checked Rolimons & price"})
+    for i in range(8):
+        ui.proxy_health[f"http://10.0.0.{i}:8080"] = {"ok": True, "latency_ms": 120, "last_error": None, "ts": "00:00:00"}
+
+    worker = sniper.ProxyThread(sniper.SniperContext(
+        webhook=None,
+        account=None,
+        generic_settings={"min_percentage_off": 30, "min_robux_off": 500, "max_robux_cost": 100000, "price_measurer": "value_rap"},
+        custom_settings={str(details[0].item_id): {"min_percentage_off": 10, "price_measurer": "rap"}},
+        deal_filter_min_percentage=10,
+        limiteds=iterator,
+        rolimon_limiteds=None,
+        ui_manager=ui,
+        ledger=ledger.BalanceLedger(),
+        metrics=metrics.Metrics(),
+        buy_lane=None,
+        journal=None
+    ), None)
+
+    def parse_streaming():
+        parser = helpers.RolimonsItemStream()
+        for i in range(0, len(roli_bytes), 64 * 1024):
+            parser.feed(roli_bytes[i:i + 64 * 1024])
+        return parser.close()
+
+    def eligibility():
+        check = worker.check_if_item_elligable
+        for d, r in pairs:
+            check(d, r)
+
+    # unstarted log: records are filtered / queued but never drained, like the loop sees it
+    quiet = eventlog.EventLog(level=eventlog.INFO, max_queue=1024)
+
+    def log_lines():
+        for i in range(120):
+            quiet.debug("Item {item_id} ineligible ({reason})", item_id=i, reason="min_percentage_off")
+            quiet.info("Potential deal: Item {item_id} price={price}", item_id=i, price=900)
+
+    secret = "JBSWY3DPEHPK3PXP"
+
+    return {
+        "validate_json.catalog_120": lambda: request.ResponseJsons.validate_json(catalog_url, catalog),
+        "validate_json.resellers": lambda: request.ResponseJsons.validate_json(resellers_url, resellers),
+        "validate_json.purchase": lambda: request.ResponseJsons.validate_json(purchase_url, purchase),
+        "jsonify_api_broad.details_120": lambda: request.RequestJsons.jsonify_api_broad(catalog_url, generic),
+        "jsonify_api_broad.purchase": lambda: request.RequestJsons.jsonify_api_broad(purchase_url, buy_data),
+        "purchase.body_jsonify_dumps": lambda: json.dumps(request.RequestJsons.jsonify_api_broad(purchase_url, buy_data)).encode(),
+        "purchase.body_prepared": lambda: purchase_template.body(buy_data),
+        "purchase.build_headers": plain_purchase.build_headers,
+        "purchase.build_headers_prepared": prepared_purchase.build_headers,
+        "check_if_item_elligable.x120": eligibility,
+        "iterator.batch_120_of_5000": lambda: iterator(120),
+        "rolimons.parse_dict_20k": lambda: helpers.RolimonsDataScraper.parse_item_data(json.loads(roli_bytes)),
+        "rolimons.parse_stream_20k": parse_streaming,
+        "ui.render": ui.render,
+        "eventlog.debug_off_info_on.x120": log_lines,
+        "autopass.totp": lambda: authenticator.AutoPass.totp(secret),
+    }
+
+
+# ---------------------------------------------------------
+# RUNNER
+# ---------------------------------------------------------
+def measure(fn: Callable[[], object], repeat: int = 7, min_time: float = 0.1) -> float:
+    """Best-of-`repeat` seconds per call, with the loop count calibrated so one repeat takes >= min_time"""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def run(selected: List[str], benches: Dict[str, Callable], baseline: Dict[str, float], threshold: float) -> Tuple[Dict[str, float], List[str]]:
+    results: Dict[str, float] = {}
+    regressions: List[str] = []
+    print(f"{'bench':<34}{'us/call':>12}{'baseline':>12}{'delta':>9}")
+    for name in selected:
+        us = measure(benches[name]) * 1e6
+        results[name] = round(us, 3)
+        base = baseline.get(name)
+        if base:
+            delta = (us - base) / base
+            flag = "  REGRESSED" if delta > threshold else ""
+            print(f"{name:<34}{us:>12.2f}{base:>12.2f}{delta:>+9.1%}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:<34}{us:>12.2f}{'-':>12}{'':>9}")
+    return results, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hot path micro-benchmarks")
+    parser.add_argument("-k", dest="filter", default="", help="only run benches containing this substring")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--require-baseline", action="store_true", help="fail when a selected bench has no baseline")
+    args = parser.parse_args(argv)
+
+    benches = build_benches()
+    selected = [n for n in benches if args.filter in n]
+    baseline = json.load(open(args.baseline)) if args.baseline.exists() else {}
+
+    results, regressions = run(selected, benches, baseline, args.threshold)
+
+    if args.update:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    missing = [n for n in selected if not baseline.get(n)]
+    if args.require_baseline and missing:
+        print(f"No baseline for {len(missing)} bench(es) in {args.baseline}: {', '.join(missing)} (run with --update first)")
+        return 1
+    if regressions:
+        print(f"{len(regressions)} bench(es) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
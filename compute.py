@@ -0,0 +1,61 @@
+# compute.py
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import metrics
+
+
+class Executor:
+    """
+    Runs CPU-heavy jobs off the event loop.
+
+    run_thread(): a small thread pool, for work that releases the GIL (file io, zlib, hashing) or comes
+    in slices short enough that handing them over beats blocking the loop (building the Rich layout,
+    one chunk of the rolimons parse). Pure-Python work still holds the GIL while it runs, so a slice
+    delays the loop by about its own run time; the point is that the loop gets a turn between slices.
+
+    At most `max_pending` jobs are taken at a time; further submitters wait (backpressure instead
+    of an unbounded queue). Every job records its queue wait and run time under its name.
+    """
+
+    def __init__(self, threads: int = 2, max_pending: int = 32):
+        self.threads = threads
+        self.max_pending = max_pending
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._thread_slots: Optional[asyncio.Semaphore] = None
+
+    def _threads(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="compute")
+            self._thread_slots = asyncio.Semaphore(self.max_pending)
+        return self._thread_pool
+
+    async def _run(self, pool, slots: asyncio.Semaphore, name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        async with slots:
+            t1 = time.perf_counter()
+            try:
+                return await loop.run_in_executor(pool, fn, *args)
+            finally:
+                # recorded back on the loop (metrics are loop-only); includes the hand over, which is the cost the loop sees
+                metrics.registry.observe("compute_wait", name, t1 - t0)
+                metrics.registry.observe("compute_run", name, time.perf_counter() - t1)
+
+    async def run_thread(self, name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        pool = self._threads()
+        return await self._run(pool, self._thread_slots, name, fn, *args)
+
+    def warm(self) -> None:
+        """Start the thread pool now instead of on the first job"""
+        self._threads()
+
+    def close(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+
+
+pool = Executor()
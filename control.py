@@ -0,0 +1,290 @@
+# control.py
+import time
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from aiohttp import web
+
+import compute
+import memory
+import metrics
+import profiler
+from eventlog import log
+from models import items
+
+# rule key -> validator; the same keys generic_settings / custom_settings use in config.json
+PRICE_MEASURERS = ("value", "rap", "value_rap")
+RULES = {
+    "min_percentage_off": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) and 0 <= v <= 100,
+    "min_robux_off": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0,
+    "max_robux_cost": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0,
+    "price_measurer": lambda v: v in PRICE_MEASURERS,
+}
+
+if TYPE_CHECKING:
+    from sniper import WatchLimiteds
+
+
+class Invalid(ValueError):
+    pass
+
+
+def _rules(raw: Any, where: str, partial: bool) -> Dict[str, Any]:
+    """Validated copy of a rules dict; with partial=True a None value means 'remove this key'"""
+    if not isinstance(raw, dict):
+        raise Invalid(f"{where} must be an object")
+    out = {}
+    for key, value in raw.items():
+        if key not in RULES:
+            raise Invalid(f"{where}.{key} is not a known rule ({', '.join(RULES)})")
+        if value is None and partial:
+            out[key] = None
+            continue
+        if not RULES[key](value):
+            raise Invalid(f"{where}.{key} has an invalid value: {value!r}")
+        out[key] = value
+    return out
+
+
+def _ids(raw: Any, where: str) -> List[int]:
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        raise Invalid(f"{where} must be a list of item ids")
+    try:
+        return [int(i) for i in raw]
+    except (TypeError, ValueError):
+        raise Invalid(f"{where} must be a list of item ids")
+
+
+class ControlServer:
+    """
+    Local-only HTTP control endpoint.
+
+    GET  /metrics             -> metrics.registry snapshot
+    GET  /hotpath             -> always-on hot path timers
+    GET  /workers             -> supervised loops: running, restarts, uptime, items/s, capacity
+    GET  /pipeline            -> per worker and stage: queued, busy, utilization (listed mode)
+    POST /profile?seconds=10  -> capture a cProfile + sampled profile, returns the written files
+    GET  /memory              -> budget, rss and the estimated size of every tracked cache
+    POST /memory/snapshot     -> tracemalloc diff since the previous call, per module and function (?top=20)
+    DELETE /memory/snapshot   -> stop tracing
+
+    GET  /status              -> mode, buying paused, watchlist sizes, balance, rolimons age, capacity
+    GET  /watch               -> watched and hot item ids
+    POST /watch               -> {"add": [ids], "remove": [ids], "hot_add": [ids], "hot_remove": [ids]}
+    GET  /settings            -> generic / custom rules and the deal filter
+    PATCH /settings           -> {"generic": {rule: value|null}, "custom": {"<id>": {rules}|null},
+                                  "deal_filter_min_percentage": value|null}
+    POST /buying/pause, POST /buying/resume
+
+    Changes are validated as a whole first and then swapped in as new objects (copy-on-write) with
+    no await in between, so a worker sees either the old or the new state, never a mix.
+    """
+
+    def __init__(self, watch_limiteds: "WatchLimiteds", host: str = "127.0.0.1", port: int = 8765):
+        self.watch_limiteds = watch_limiteds
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/metrics", self.get_metrics),
+            web.get("/hotpath", self.get_hotpath),
+            web.get("/workers", self.get_workers),
+            web.get("/pipeline", self.get_pipeline),
+            web.post("/profile", self.post_profile),
+            web.get("/memory", self.get_memory),
+            web.post("/memory/snapshot", self.post_snapshot),
+            web.delete("/memory/snapshot", self.delete_snapshot),
+            web.get("/status", self.get_status),
+            web.get("/watch", self.get_watch),
+            web.post("/watch", self.post_watch),
+            web.get("/settings", self.get_settings),
+            web.patch("/settings", self.patch_settings),
+            web.post("/buying/pause", self.post_pause),
+            web.post("/buying/resume", self.post_resume),
+        ])
+
+    @property
+    def context(self):
+        return self.watch_limiteds.context
+
+    @staticmethod
+    async def _body(req: web.Request) -> Dict[str, Any]:
+        try:
+            body = await req.json()
+        except ValueError:
+            raise Invalid("body must be json")
+        if not isinstance(body, dict):
+            raise Invalid("body must be a json object")
+        return body
+
+    async def get_metrics(self, req: web.Request) -> web.Response:
+        return web.json_response(metrics.registry.snapshot())
+
+    async def get_hotpath(self, req: web.Request) -> web.Response:
+        return web.json_response(profiler.hot_path_report())
+
+    async def get_workers(self, req: web.Request) -> web.Response:
+        sup = self.watch_limiteds.supervisor
+        if sup is None:
+            return web.json_response({"error": "not running"}, status=503)
+        return web.json_response(sup.status())
+
+    async def get_pipeline(self, req: web.Request) -> web.Response:
+        return web.json_response({
+            thread.name: thread.pipeline.last for thread in self.watch_limiteds.threads if thread.pipeline is not None
+        })
+
+    async def post_profile(self, req: web.Request) -> web.Response:
+        try:
+            seconds = min(max(float(req.query.get("seconds", 10)), 0.5), 120.0)
+        except ValueError:
+            return web.json_response({"error": "seconds must be a number"}, status=400)
+        written = await profiler.capture(seconds)
+        if written is None:
+            return web.json_response({"error": "capture already running"}, status=409)
+        return web.json_response(written)
+
+    async def get_memory(self, req: web.Request) -> web.Response:
+        memory.accountant.measure()
+        return web.json_response(memory.accountant.status())
+
+    async def post_snapshot(self, req: web.Request) -> web.Response:
+        try:
+            top = min(max(int(req.query.get("top", 20)), 1), 200)
+        except ValueError:
+            return web.json_response({"error": "top must be a number"}, status=400)
+        # snapshot + diff take a while on a big heap, keep them off the loop
+        return web.json_response(await compute.pool.run_thread("memory.snapshot", memory.snapshots.take, top))
+
+    async def delete_snapshot(self, req: web.Request) -> web.Response:
+        memory.snapshots.stop()
+        return web.json_response({"tracing": False})
+
+    # ---------------------------------------------------------
+    # live control
+    # ---------------------------------------------------------
+    async def get_status(self, req: web.Request) -> web.Response:
+        ctx = self.context
+        balance = ctx.ledger
+        index = getattr(ctx.rolimon_limiteds, "item_data", None)
+        refreshed = getattr(ctx.rolimon_limiteds, "last_call_time", None)
+        sup = self.watch_limiteds.supervisor
+        return web.json_response({
+            "mode": "deals" if ctx.deal_mode else "listed",
+            "buying_paused": ctx.buying_paused,
+            "watched": len(ctx.limiteds),
+            "hot": len(ctx.hot_limiteds),
+            "balance": {"confirmed": balance.confirmed, "reserved": balance.reserved, "available": balance.available},
+            "rolimons": {"items": len(index) if index else 0, "age_s": round(time.time() - refreshed, 1) if index and refreshed else None},
+            "capacity": sup.capacity if sup else None,
+            "expected_workers": sup.expected_workers if sup else None,
+            "uptime_s": round(time.time() - metrics.registry.started, 1),
+        })
+
+    async def get_watch(self, req: web.Request) -> web.Response:
+        return web.json_response({"limiteds": self.context.limiteds.ids(), "hot": self.context.hot_limiteds.ids()})
+
+    async def post_watch(self, req: web.Request) -> web.Response:
+        ctx = self.context
+        try:
+            body = await self._body(req)
+            add, remove = _ids(body.get("add"), "add"), _ids(body.get("remove"), "remove")
+            hot_add, hot_remove = _ids(body.get("hot_add"), "hot_add"), _ids(body.get("hot_remove"), "hot_remove")
+        except Invalid as e:
+            return web.json_response({"error": str(e)}, status=400)
+        if ctx.deal_mode and (add or hot_add):
+            # the workers picked deal mode at start, a watchlist would never be polled
+            return web.json_response({"error": "running in deal mode (started without limiteds)"}, status=409)
+
+        def generic(item_id: int) -> items.Generic:
+            return items.Generic(item_id=item_id, collectible_item_id=ctx.identities.collectible_item_id(item_id))
+
+        result = {
+            "added": ctx.limiteds.add([generic(i) for i in add]),
+            "removed": ctx.limiteds.remove(remove),
+            "hot_added": ctx.hot_limiteds.add([generic(i) for i in hot_add]),
+            "hot_removed": ctx.hot_limiteds.remove(hot_remove),
+        }
+        if (add or hot_add) and getattr(ctx.rolimon_limiteds, "keep", None):
+            # the index was cut down to the old watchlist under the memory budget
+            ctx.rolimon_limiteds.invalidate()
+        result["watched"] = len(ctx.limiteds)
+        result["hot"] = len(ctx.hot_limiteds)
+        log.info("Watchlist aangepast via control: {result}", result=result)
+        return web.json_response(result)
+
+    async def get_settings(self, req: web.Request) -> web.Response:
+        ctx = self.context
+        return web.json_response({
+            "generic": ctx.generic_settings,
+            "custom": ctx.custom_settings,
+            "deal_filter_min_percentage": ctx.deal_filter_min_percentage,
+        })
+
+    async def patch_settings(self, req: web.Request) -> web.Response:
+        ctx = self.context
+        try:
+            body = await self._body(req)
+            unknown = set(body) - {"generic", "custom", "deal_filter_min_percentage"}
+            if unknown:
+                raise Invalid(f"unknown fields: {', '.join(sorted(unknown))}")
+
+            generic = dict(ctx.generic_settings)
+            if "generic" in body:
+                for key, value in _rules(body["generic"], "generic", partial=True).items():
+                    if value is None:
+                        generic.pop(key, None)
+                    else:
+                        generic[key] = value
+
+            custom = dict(ctx.custom_settings)
+            if "custom" in body:
+                if not isinstance(body["custom"], dict):
+                    raise Invalid("custom must be an object of item id -> rules")
+                for item_id, rules in body["custom"].items():
+                    try:
+                        key = str(int(item_id))
+                    except ValueError:
+                        raise Invalid(f"custom key {item_id!r} is not an item id")
+                    if rules is None:
+                        custom.pop(key, None)
+                    else:
+                        custom[key] = _rules(rules, f"custom.{key}", partial=False)
+
+            deal_filter = ctx.deal_filter_min_percentage
+            if "deal_filter_min_percentage" in body:
+                deal_filter = body["deal_filter_min_percentage"]
+                if deal_filter is not None and not RULES["min_percentage_off"](deal_filter):
+                    raise Invalid(f"deal_filter_min_percentage has an invalid value: {deal_filter!r}")
+        except Invalid as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+        # all valid: swap in one go
+        ctx.generic_settings = generic
+        ctx.custom_settings = custom
+        ctx.deal_filter_min_percentage = deal_filter
+        log.info("Instellingen aangepast via control: {body}", body=body)
+        return await self.get_settings(req)
+
+    async def post_pause(self, req: web.Request) -> web.Response:
+        self.context.buying_paused = True
+        log.warn("Kopen gepauzeerd via control")
+        return web.json_response({"buying_paused": True})
+
+    async def post_resume(self, req: web.Request) -> web.Response:
+        self.context.buying_paused = False
+        log.info("Kopen hervat via control")
+        return web.json_response({"buying_paused": False})
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
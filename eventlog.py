@@ -0,0 +1,200 @@
+# eventlog.py
+import os
+import json
+import time
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+LOG_DIR = Path(__file__).parent / "logs"
+
+DEBUG = 10
+INFO = 20
+WARN = 30
+ERROR = 40
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARN": WARN, "WARNING": WARN, "ERROR": ERROR}
+NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN", ERROR: "ERROR"}
+
+
+def level_of(name: Any, default: int = INFO) -> int:
+    if isinstance(name, int):
+        return name
+    return LEVELS.get(str(name).upper(), default) if name else default
+
+
+class Record:
+    """
+    One log call. `msg` is a str.format template and `fields` its arguments; the text is only
+    built by a subscriber, on the sink thread, and only if a subscriber wants the record.
+    """
+    __slots__ = ("ts", "level", "msg", "fields")
+
+    def __init__(self, ts: float, level: int, msg: str, fields: Dict[str, Any]):
+        self.ts = ts
+        self.level = level
+        self.msg = msg
+        self.fields = fields
+
+    def text(self) -> str:
+        if not self.fields:
+            return self.msg
+        try:
+            return self.msg.format(**self.fields)
+        except (KeyError, IndexError, ValueError):
+            return f"{self.msg} {self.fields}"
+
+    def to_json(self) -> str:
+        return json.dumps({"ts": round(self.ts, 3), "level": NAMES.get(self.level, self.level), "msg": self.text(), **self.fields}, default=str)
+
+
+class JsonlSink:
+    """Appends records as JSON lines, rotating to <name>.1 ... <name>.<backups> past max_bytes"""
+
+    def __init__(self, path: Path = LOG_DIR / "sniper.jsonl", max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._fh = None
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._fh.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._open()
+
+    def __call__(self, record: Record) -> None:
+        if self._fh is None:
+            self._open()
+        self._fh.write(record.to_json())
+        self._fh.write("\n")
+
+    def flush(self) -> None:
+        if self._fh is None:
+            return
+        self._fh.flush()
+        if self.max_bytes and self._fh.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class EventLog:
+    """
+    Level-filtered structured log.
+
+    emit() compares the level first and returns before touching the message when nobody listens at
+    that level; otherwise it appends a Record to a bounded deque (an atomic append, no lock, no await).
+    A daemon thread drains the deque every `flush_interval` and fans records out to the subscribers
+    (the JSONL file sink, the Rich dashboard, ...), each with its own minimum level.
+    """
+
+    def __init__(self, level: int = INFO, max_queue: int = 50000, flush_interval: float = 0.1):
+        self.level = level
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: Deque[Record] = deque(maxlen=max_queue)
+        # (callback, min level), replaced as a whole so the sink thread can iterate without a lock
+        self._subscribers: Tuple[Tuple[Callable[[Record], None], int], ...] = ()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_level(self, level: Any) -> None:
+        self.level = level_of(level)
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def subscribe(self, callback: Callable[[Record], None], level: Any = None) -> None:
+        self._subscribers = self._subscribers + ((callback, level_of(level, self.level)),)
+
+    def unsubscribe(self, callback: Callable[[Record], None]) -> None:
+        self._subscribers = tuple(s for s in self._subscribers if s[0] != callback)
+
+    def emit(self, level: int, msg: str, fields: Dict[str, Any]) -> None:
+        if level < self.level:
+            return
+        queue = self._queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append(Record(time.time(), level, msg, fields))
+
+    def debug(self, msg: str, **fields: Any) -> None:
+        if DEBUG >= self.level:
+            self.emit(DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields: Any) -> None:
+        if INFO >= self.level:
+            self.emit(INFO, msg, fields)
+
+    def warn(self, msg: str, **fields: Any) -> None:
+        if WARN >= self.level:
+            self.emit(WARN, msg, fields)
+
+    def error(self, msg: str, **fields: Any) -> None:
+        if ERROR >= self.level:
+            self.emit(ERROR, msg, fields)
+
+    # sink thread
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="eventlog", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.drain()
+        for callback, _ in self._subscribers:
+            close = getattr(callback, "close", None)
+            if close:
+                close()
+
+    def drain(self) -> int:
+        queue = self._queue
+        subscribers = self._subscribers
+        n = 0
+        while True:
+            try:
+                record = queue.popleft()
+            except IndexError:
+                break
+            n += 1
+            for callback, level in subscribers:
+                if record.level >= level:
+                    try:
+                        callback(record)
+                    except Exception:
+                        pass
+        if n:
+            for callback, _ in subscribers:
+                flush = getattr(callback, "flush", None)
+                if flush:
+                    try:
+                        flush()
+                    except Exception:
+                        pass
+        return n
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.drain()
+
+
+log = EventLog()
@@ -0,0 +1,202 @@
+# faults.py
+"""
+Fault injection for Request.send against the local MockServer.
+
+    python faults.py                 # run every scenario
+    python faults.py -k csrf         # only scenarios whose name contains "csrf"
+    python faults.py -t http2        # over another transport backend
+
+Each scenario scripts faults on one endpoint, sends one real Request (or, for the recovery
+scenarios, keeps polling once per --poll seconds until a poll succeeds) and checks two things:
+the outcome (ok / empty json / failed / timeout) and the wall time against its budget. The
+recovery scenarios also report how many polls were lost while upstream misbehaved.
+Exit status is 1 when any scenario misses its outcome or budget.
+"""
+import sys
+import logging
+import time
+import asyncio
+import argparse
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import errors
+import authenticator
+import transport
+import mockserver as mock
+from mockserver import MockServer
+from models import items, request
+
+CATALOG_URL = "https://catalog.roblox.com/v1/catalog/items/details"
+LOGOUT_URL = "https://auth.roblox.com/v2/logout"
+
+
+@dataclass
+class Scenario:
+    name: str
+    kind: str
+    faults: List[mock.Fault]
+    # ok | empty (success status, no usable json) | failed | timeout
+    expect: str
+    # seconds the send (or the recovery) may take
+    budget: float
+    build: Callable[[MockServer], request.Request] = None
+    # poll until a send succeeds instead of sending once
+    recovery: bool = False
+
+
+def details_request(server: MockServer, deadline: request.Deadline = request.POLL_DEADLINE) -> request.Request:
+    return request.Request(
+        url=CATALOG_URL,
+        method="post",
+        headers=request.Headers(cookies={".ROBLOSECURITY": "faults"}, x_csrf_token=server.csrf_token),
+        json_data=request.RequestJsons.jsonify_api_broad(CATALOG_URL, [items.Generic(item_id=i, collectible_item_id="") for i in server.item_ids[:30]]),
+        retries=3,
+        deadline=deadline,
+    )
+
+
+def resale_request(server: MockServer) -> request.Request:
+    cid = server.items[server.item_ids[0]][0]
+    return request.Request(url=f"https://apis.roblox.com/marketplace-sales/v1/item/{cid}/resellers?limit=1", retries=4, deadline=request.BUY_DEADLINE)
+
+
+def purchase_request(server: MockServer, token: Optional[str] = None, solver=None) -> request.Request:
+    item_id = server.item_ids[0]
+    url = f"https://apis.roblox.com/marketplace-sales/v1/item/{server.items[item_id][0]}/purchase-resale"
+    buy = items.BuyData(collectible_item_id=server.items[item_id][0], collectible_item_instance_id="i", collectible_product_id="p",
+                        expected_price=server.items[item_id][3], expected_purchaser_id="1")
+    return request.Request(
+        url=url,
+        method="post",
+        headers=request.Headers(cookies={".ROBLOSECURITY": "faults"}, x_csrf_token=token),
+        json_data=request.RequestJsons.jsonify_api_broad(url, buy),
+        user_id="1",
+        deadline=request.BUY_DEADLINE,
+        challenge_solver=solver,
+    )
+
+
+def prepared_purchase_request(server: MockServer, token: Optional[str] = None, solver=None) -> request.Request:
+    """The BuyLimited path: headers and body from a PurchaseTemplate"""
+    item_id = server.item_ids[0]
+    buy = items.BuyData(collectible_item_id=server.items[item_id][0], collectible_item_instance_id="i", collectible_product_id="p",
+                        expected_price=server.items[item_id][3], expected_purchaser_id="1")
+    return request.PurchaseTemplate("faults", 1).request(buy, token, challenge_solver=solver)
+
+
+def scenarios() -> List[Scenario]:
+    autopass = authenticator.AutoPass("JBSWY3DPEHPK3PXP")
+    return [
+        Scenario("details.clean", "catalog_details", [], "ok", 0.2, details_request),
+        Scenario("details.delay_1s", "catalog_details", [mock.delay(1.0)], "ok", 1.3, details_request),
+        Scenario("details.delay_past_deadline", "catalog_details", [mock.delay(10)] * 4, "timeout", request.POLL_DEADLINE.total + 0.5, details_request),
+        Scenario("details.read_timeout_then_ok", "catalog_details", [mock.delay(request.POLL_DEADLINE.read + 0.5)], "ok", request.POLL_DEADLINE.read + 1.0, details_request),
+        Scenario("details.reset_x2", "catalog_details", [mock.reset(), mock.reset()], "ok", 0.2 + 0.3 + 0.3, details_request),
+        Scenario("details.truncated_body", "catalog_details", [mock.truncated()], "ok", 0.5, details_request),
+        Scenario("details.malformed_json", "catalog_details", [mock.malformed()], "empty", 0.2, details_request),
+        Scenario("details.503_x2", "catalog_details", [mock.status(503)] * 2, "ok", 0.2 + 0.3 + 0.3, details_request),
+        Scenario("details.500_x4", "catalog_details", [mock.status(500)] * 4, "failed", 0.2 + 0.3 + 0.4 + 0.5 + 0.3, details_request),
+        Scenario("details.429", "catalog_details", [mock.rate_limited()], "ok", 0.5, details_request),
+        Scenario("details.429_retry_after_1s", "catalog_details", [mock.rate_limited(1.0)], "ok", 1.3, details_request),
+        Scenario("details.400_fails_fast", "catalog_details", [mock.status(400)], "failed", 0.2, details_request),
+        Scenario("details.csrf", "catalog_details", [mock.csrf()], "ok", 0.2, details_request),
+        Scenario("resellers.502_then_ok", "resellers", [mock.status(502)], "ok", 0.5, resale_request),
+        Scenario("resellers.404_fails_fast", "resellers", [mock.status(404)] * 5, "failed", 0.2, resale_request),
+        Scenario("logout.mints_csrf", "logout", [], "ok", 0.2, lambda s: request.Request(url=LOGOUT_URL, method="post", success_status_codes=[403])),
+        Scenario("purchase.csrf_refresh", "purchase", [], "ok", 0.3, lambda s: purchase_request(s, token=None)),
+        Scenario("purchase.challenge", "purchase", [mock.challenge()], "ok", 0.5, lambda s: purchase_request(s, token=s.csrf_token, solver=autopass)),
+        Scenario("purchase.prepared_csrf_refresh", "purchase", [], "ok", 0.3, lambda s: prepared_purchase_request(s, token=None)),
+        Scenario("purchase.prepared_challenge", "purchase", [mock.challenge()], "ok", 0.5, lambda s: prepared_purchase_request(s, token=s.csrf_token, solver=autopass)),
+        # the challenge on the last of the 3 attempts: the solved replay is a pass of its own
+        Scenario("purchase.challenge_last_attempt", "purchase", [mock.status(503), mock.status(503), mock.challenge()], "ok", 0.9,
+                 lambda s: purchase_request(s, token=s.csrf_token, solver=autopass)),
+        Scenario("purchase.challenge_unsolved", "purchase", [mock.challenge()] * 4, "failed", 0.2, lambda s: purchase_request(s, token=s.csrf_token)),
+        # a bad stretch upstream, polled like _watch_listed does: each lost poll costs its 4 attempts,
+        # 0.2 + 0.3 + 0.4 s of backoff and the poll interval
+        Scenario("recovery.503_burst_x20", "catalog_details", [mock.status(503)] * 20, "ok", 5 * (0.9 + 1.0) + 3.0, details_request, recovery=True),
+        Scenario("recovery.reset_burst_x12", "catalog_details", [mock.reset()] * 12, "ok", 3 * (0.9 + 1.0) + 2.5, details_request, recovery=True),
+        # a stalled connection costs a read timeout per attempt, capped by the poll deadline
+        Scenario("recovery.stall_x3", "catalog_details", [mock.delay(30)] * 3, "ok",
+                 request.POLL_DEADLINE.total + 1.0 + request.POLL_DEADLINE.read + 1.0, details_request, recovery=True),
+    ]
+
+
+def outcome(resp: Optional[request.Response], exc: Optional[BaseException]) -> str:
+    if isinstance(exc, errors.Request.Timeout):
+        return "timeout"
+    if exc is not None:
+        return "failed"
+    if isinstance(resp.response_json, (request.ResponseJsons.ItemDetails, request.ResponseJsons.ResaleResponse)):
+        return "ok"
+    if getattr(resp.response_json, "purchased", False):
+        return "ok"
+    if resp.status_code == 403 and resp.response_headers.x_csrf_token:
+        return "ok"
+    return "empty"
+
+
+async def send(req: request.Request) -> Tuple[Optional[request.Response], Optional[BaseException]]:
+    try:
+        return await req.send(), None
+    except Exception as e:
+        return None, e
+
+
+async def run_scenario(server: MockServer, sc: Scenario, poll: float) -> Tuple[str, float, int, int, str]:
+    """(outcome, seconds, upstream requests, lost polls, detail)"""
+    server.clear()
+    server.script(sc.kind, sc.faults)
+    t0 = time.perf_counter()
+    lost = 0
+    while True:
+        resp, exc = await send(sc.build(server))
+        result = outcome(resp, exc)
+        if not sc.recovery or result == "ok" or time.perf_counter() - t0 > sc.budget * 2:
+            break
+        lost += 1
+        await asyncio.sleep(poll)
+    elapsed = time.perf_counter() - t0
+    return result, elapsed, server.hits.get(sc.kind, 0), lost, repr(exc)[:80] if exc else ""
+
+
+async def run(args) -> int:
+    # resets and truncated bodies make the server side log the dropped connections
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+    missing = transport.available(args.t)
+    if missing:
+        print(f"transport {args.t}: {missing}")
+        return 1
+    server = MockServer(item_count=50)
+    await server.start()
+    server.install_routes()
+    await transport.use(args.t)
+    failures = 0
+    try:
+        print(f"{'scenario':<34} {'expect':>8} {'got':>8} {'ms':>7} {'budget':>7} {'hits':>5} {'lost':>5}")
+        for sc in scenarios():
+            if args.k and args.k not in sc.name:
+                continue
+            result, elapsed, hits, lost, detail = await run_scenario(server, sc, args.poll)
+            ok = result == sc.expect and elapsed <= sc.budget
+            failures += not ok
+            print(f"{sc.name:<34} {sc.expect:>8} {result:>8} {int(elapsed * 1000):>7} {int(sc.budget * 1000):>7} {hits:>5} {lost if sc.recovery else '':>5}"
+                  f"  {'ok' if ok else 'FAIL'} {detail if not ok else ''}")
+    finally:
+        server.remove_routes()
+        await transport.active.close()
+        await server.stop()
+    print(f"{failures} scenario(s) failed" if failures else "all scenarios passed")
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", default="", help="only scenarios whose name contains this")
+    parser.add_argument("-t", default="aiohttp", help="transport backend: aiohttp, httpx or http2")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between polls in recovery scenarios")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# fetcher.py
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+import memory
+import metrics
+import batching
+from models import items, request
+
+
+class PriceEntry:
+    __slots__ = ("price", "observed_at", "source", "evaluated_at", "evaluated_price")
+
+    def __init__(self, price: int, observed_at: float, source: str):
+        self.price = price
+        self.observed_at = observed_at
+        self.source = source
+        self.evaluated_at = 0.0
+        self.evaluated_price = 0
+
+
+class PriceBook:
+    """
+    Latest price + observed-at per item, merged over every details source.
+
+    claim() decides whether an observation gets evaluated: at most once per item per `window`
+    seconds, unless the new price is lower than the one evaluated last (a new cheaper listing).
+    """
+
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.entries: Dict[int, PriceEntry] = {}
+
+    def observe(self, item_id: int, price: int, observed_at: float, source: str) -> bool:
+        """Record an observation, False if we already hold a newer one"""
+        entry = self.entries.get(item_id)
+        if entry is None:
+            self.entries[item_id] = PriceEntry(price, observed_at, source)
+            return True
+        if observed_at < entry.observed_at:
+            return False
+        entry.price = price
+        entry.observed_at = observed_at
+        entry.source = source
+        return True
+
+    def claim(self, item_id: int, price: int, now: float) -> bool:
+        entry = self.entries.get(item_id)
+        if entry is None:
+            return False
+        if now - entry.evaluated_at < self.window and not (0 < price < entry.evaluated_price):
+            return False
+        entry.evaluated_at = now
+        entry.evaluated_price = price
+        return True
+
+    def age(self, item_id: int, now: float) -> Optional[float]:
+        entry = self.entries.get(item_id)
+        return None if entry is None else now - entry.observed_at
+
+    def footprint(self) -> int:
+        return memory.estimate(self.entries)
+
+    def shrink(self, target: int) -> None:
+        """Forget the least recently observed items; they start over as new on their next observation"""
+        keep = memory.fit(len(self.entries), self.footprint(), target)
+        if keep < len(self.entries):
+            newest = sorted(self.entries.items(), key=lambda kv: kv[1].observed_at)[len(self.entries) - keep:]
+            self.entries = dict(newest)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class ResaleVerdicts:
+    """
+    Negative cache for /resellers checks that didn't end in a buy.
+
+    Keyed by collectible_item_id with the catalog price that made the item look eligible: while the
+    catalog keeps showing that same (stale) price the lookup is skipped for `ttl` seconds. Any other
+    price is a new listing and misses. A lookup that failed outright is only remembered for
+    `failure_ttl`, so a flaky proxy doesn't hide a real deal for long.
+    One entry per item, so the size is bounded by the watched items.
+    """
+
+    def __init__(self, ttl: float = 30.0, failure_ttl: float = 5.0):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        # collectible_item_id -> (catalog price, expires at)
+        self.entries: Dict[str, Tuple[int, float]] = {}
+
+    def rejected(self, collectible_item_id: str, price: int, now: float) -> bool:
+        entry = self.entries.get(collectible_item_id)
+        if entry is not None and entry[0] == price and now < entry[1]:
+            metrics.registry.inc("resale_negative_hit")
+            return True
+        metrics.registry.inc("resale_negative_miss")
+        return False
+
+    def reject(self, collectible_item_id: str, price: int, now: float, failed: bool = False) -> None:
+        if collectible_item_id:
+            self.entries[collectible_item_id] = (price, now + (self.failure_ttl if failed else self.ttl))
+
+    def prune(self, now: float) -> None:
+        self.entries = {k: v for k, v in self.entries.items() if v[1] > now}
+
+    def footprint(self) -> int:
+        return memory.estimate(self.entries)
+
+    def shrink(self, target: int) -> None:
+        """Drop expired verdicts, then the ones closest to expiring"""
+        self.prune(time.monotonic())
+        keep = memory.fit(len(self.entries), self.footprint(), target)
+        if keep < len(self.entries):
+            self.entries = dict(sorted(self.entries.items(), key=lambda kv: kv[1][1])[len(self.entries) - keep:])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DetailsSource:
+    """One item details endpoint: where it lives, how its json reads, how big and how fast its batches are"""
+
+    def __init__(self, name: str, url: str, parse: Callable[[Any], Optional[request.ResponseJsons.ItemDetails]],
+                 sizer: batching.BatchSizer, cost: float = 1.0):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.sizer = sizer
+        # relative request cost (rate limit weight), higher = use less
+        self.cost = cost
+        # ewma round trip in seconds, None until the first response
+        self.latency: Optional[float] = None
+
+    def record_latency(self, seconds: float) -> None:
+        self.latency = seconds if self.latency is None else self.latency * 0.8 + seconds * 0.2
+        metrics.registry.set("source_latency_ms", self.name, round(self.latency * 1000, 1))
+
+    def score(self) -> float:
+        """Expected seconds until a fresh price, weighted by cost. Unknown sources go first so they get measured"""
+        if self.latency is None:
+            return 0.0
+        return self.latency * self.cost
+
+
+class ItemDetailsFetcher:
+    """
+    Routes watched items over the details sources and merges their answers into one PriceBook.
+
+    Each round every item goes to exactly one source: the fastest (lowest score) source is filled
+    up to its current batch size first, then the next. Items another worker refreshed less than
+    `min_age` seconds ago are skipped for this round.
+    """
+
+    def __init__(self, sources: List[DetailsSource], price_book: Optional[PriceBook] = None, min_age: float = 0.5):
+        self.sources = sources
+        self.by_url = {s.url: s for s in sources}
+        self.price_book = price_book or PriceBook()
+        self.min_age = min_age
+
+    def plan(self, draw: Callable[[int], List[items.Generic]]) -> Dict[DetailsSource, List[items.Generic]]:
+        now = time.time()
+        ordered = sorted(self.sources, key=lambda s: s.score())
+        wanted = sum(s.sizer.size() for s in ordered)
+
+        seen = set()
+        pool: List[items.Generic] = []
+        for item in draw(wanted):
+            if item.item_id in seen:
+                continue
+            seen.add(item.item_id)
+            age = self.price_book.age(item.item_id, now)
+            if age is not None and age < self.min_age:
+                metrics.registry.inc("details_skipped_fresh")
+                continue
+            pool.append(item)
+
+        plan: Dict[DetailsSource, List[items.Generic]] = {}
+        start = 0
+        for source in ordered:
+            if start >= len(pool):
+                break
+            batch = pool[start:start + source.sizer.size()]
+            start += len(batch)
+            plan[source] = batch
+        return plan
+
+    def merge(self, source: DetailsSource, details: Optional[request.ResponseJsons.ItemDetails], observed_at: float) -> request.ResponseJsons.ItemDetails:
+        """Put a response in the PriceBook and return only the items that should be evaluated now"""
+        fresh: List[items.Data] = []
+        if details:
+            now = time.time()
+            for item in details.items:
+                if not self.price_book.observe(item.item_id, item.lowest_resale_price, observed_at, source.name):
+                    continue
+                if self.price_book.claim(item.item_id, item.lowest_resale_price, now):
+                    fresh.append(item)
+                else:
+                    metrics.registry.inc("details_deduplicated", source.name)
+        return request.ResponseJsons.ItemDetails(items=fresh)
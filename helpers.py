@@ -1,252 +1,459 @@
-# helpers.py (MEGA UI upgrade)
-import re
-import time
-import json
-import random
-import asyncio
-import aiohttp
-
-from models import request, items
-from typing import Optional, Union, List, Dict, TYPE_CHECKING
-
-from rich.console import Console
-from rich.live import Live
-from rich.table import Table
-from rich.panel import Panel
-from rich.layout import Layout
-from rich.align import Align
-from rich.text import Text
-
-if TYPE_CHECKING:
-    from sniper import WatchLimiteds
-
-# -------------------------------------------------------------------
-# CombinedAttribute - forwards attributes from ProxyThread to WatchLimiteds
-# -------------------------------------------------------------------
-class CombinedAttribute:
-    def __init__(self, watch_limiteds):
-        super().__setattr__("watch_limiteds", watch_limiteds)
-
-    def __getattr__(self, name):
-        return getattr(self.watch_limiteds, name)
-
-    def __setattr__(self, name, value):
-        if name == "watch_limiteds":
-            return super().__setattr__(name, value)
-        setattr(self.watch_limiteds, name, value)
-
-    def __delattr__(self, name):
-        if name == "watch_limiteds":
-            return super().__delattr__(name)
-        delattr(self.watch_limiteds, name)
-
-# -------------------------------------------------------------------
-# UIManager - upgraded UI for Pro Sniper 2.0
-# -------------------------------------------------------------------
-class UIManager:
-    def __init__(self, total_proxies: int, username: str, robux: str):
-        self.start_time = time.time()
-        self.total_proxies = total_proxies
-        self.total_requests = 0
-        self.total_items_checked = 0
-        self.total_items_bought = 0
-        self.total_failed_buys = 0
-        self.username = username or ""
-        self.robux = robux or "Onbekend"
-        self.lock = asyncio.Lock()
-
-        # logs buffer (recent events)
-        self.logs: List[str] = []
-        self.max_logs = 2000  # keep a lot
-
-        # activity buffer - what items were last checked / examined
-        # each entry: dict {timestamp, item_id, price, base_value, pct_off, proxy, reason}
-        self.activity: List[Dict] = []
-        self.max_activity = 200
-
-        # proxy health: map proxy -> dict(status, last_latency_ms, last_error)
-        self.proxy_health: Dict[str, Dict] = {}
-
-    # LOGGING
-    async def log_event(self, message: str, level: str = "INFO"):
-        async with self.lock:
-            timestamp = time.strftime("%H:%M:%S")
-            entry = f"[{timestamp}] [{level}] {message}"
-            self.logs.append(entry)
-            if len(self.logs) > self.max_logs:
-                # rotate
-                self.logs = self.logs[-self.max_logs:]
-
-    async def add_activity(self, item_id: int, price: int, base_value: int, pct_off: float, proxy: Optional[str], note: str):
-        async with self.lock:
-            now = time.strftime("%H:%M:%S")
-            self.activity.append({
-                "ts": now,
-                "item_id": item_id,
-                "price": price,
-                "base_value": base_value,
-                "pct_off": round(pct_off, 2),
-                "proxy": proxy or "local",
-                "note": note
-            })
-            if len(self.activity) > self.max_activity:
-                self.activity = self.activity[-self.max_activity:]
-
-    # METRICS
-    async def add_requests(self, count: int = 1):
-        async with self.lock:
-            self.total_requests += count
-
-    async def add_items(self, count: int = 1):
-        async with self.lock:
-            self.total_items_checked += count
-
-    async def add_items_bought(self, count: int = 1):
-        async with self.lock:
-            self.total_items_bought += count
-
-    async def add_failed_buy(self, count: int = 1):
-        async with self.lock:
-            self.total_failed_buys += count
-
-    async def update_proxy_health(self, proxy: Optional[str], latency_ms: Optional[int], ok: bool, last_error: Optional[str] = None):
-        async with self.lock:
-            key = proxy or "local"
-            self.proxy_health[key] = {
-                "ok": ok,
-                "latency_ms": latency_ms,
-                "last_error": last_error,
-                "ts": time.strftime("%H:%M:%S")
-            }
-
-    # RENDER
-    def render(self):
-        elapsed = int(time.time() - self.start_time)
-        mins, secs = divmod(elapsed, 60)
-        uptime = f"{mins}m {secs}s"
-
-        # top-left: stats
-        stats = Table.grid(padding=(0,0))
-        stats.add_column(justify="right", style="cyan", ratio=1)
-        stats.add_column(justify="left", style="white", ratio=2)
-        stats.add_row("Proxies", str(self.total_proxies))
-        stats.add_row("Requests", str(self.total_requests))
-        stats.add_row("Items Checked", str(self.total_items_checked))
-        stats.add_row("Items Bought", str(self.total_items_bought))
-        stats.add_row("Failed Buys", str(self.total_failed_buys))
-        stats.add_row("Uptime", uptime)
-
-        # top-right: account
-        acct = Table.grid(padding=(0,0))
-        acct.add_column(justify="right", style="magenta")
-        acct.add_column(justify="left", style="white")
-        acct.add_row("Username", self.username)
-        acct.add_row("Robux", str(self.robux))
-
-        # proxy health table
-        proxy_table = Table(show_header=True, header_style="bold blue")
-        proxy_table.add_column("Proxy", overflow="fold")
-        proxy_table.add_column("OK", justify="center")
-        proxy_table.add_column("Latency ms", justify="right")
-        proxy_table.add_column("Last Error", overflow="fold")
-        proxy_table.add_column("TS", justify="center")
-
-        # show all proxies, sorted
-        for p, info in sorted(self.proxy_health.items()):
-            proxy_table.add_row(p, "✓" if info.get("ok") else "✗", str(info.get("latency_ms") or "-"), str(info.get("last_error") or "-"), info.get("ts"))
-
-        # recent activity table (last 8 rows)
-        act_table = Table(show_header=True, header_style="bold green")
-        act_table.add_column("TS", width=7)
-        act_table.add_column("ItemID", justify="right")
-        act_table.add_column("Base", justify="right")
-        act_table.add_column("Price", justify="right")
-        act_table.add_column("%Off", justify="right")
-        act_table.add_column("Proxy", overflow="fold")
-        act_table.add_column("Note", overflow="fold")
-
-        # slice and show last 8 activities
-        act_slice = self.activity[-8:]
-        for a in reversed(act_slice):
-            act_table.add_row(a["ts"], str(a["item_id"]), str(a["base_value"]), str(a["price"]), f"{a['pct_off']}%", a["proxy"], a["note"])
-
-        # recent events panel - show last 14 lines to avoid overflow but internal buffer is huge
-        recent_lines = self.logs[-14:]
-        recent_text = "\n".join(recent_lines) if recent_lines else "[grey]No events yet..."
-
-        # Layout
-        layout = Layout()
-        layout.split_row(
-            Layout(name="left"),
-            Layout(name="right", size=40)
-        )
-
-        # left column: stats up top, act table middle, recent events bottom
-        left = Layout()
-        left.split_column(
-            Layout(Panel(stats, title="Stats", border_style="green"), size=9),
-            Layout(Panel(act_table, title="Activity (recent checks)", border_style="blue"), size=12),
-            Layout(Panel(recent_text, title=f"Recent Events (last {len(recent_lines)})", border_style="yellow"), ratio=1)
-        )
-
-        # right column: account + proxy health
-        right = Layout()
-        right.split_column(
-            Layout(Panel(acct, title="Account Info", border_style="magenta"), size=6),
-            Layout(Panel(proxy_table, title="Proxy Health", border_style="red"), ratio=1)
-        )
-
-        layout["left"].update(left)
-        layout["right"].update(right)
-
-        return layout
-
-
-# UI runner
-async def run_ui(ui_manager: UIManager):
-    console = Console()
-    # higher refresh for responsive UI
-    with Live(ui_manager.render(), refresh_per_second=4, console=console) as live:
-        while True:
-            await asyncio.sleep(0.25)
-            live.update(ui_manager.render())
-
-class RolimonsDataScraper:
-    def __init__(self):
-        self.last_call_time = time.time()
-        self.item_data: Dict[str, items.RolimonsData] = None
-        
-    async def __call__(self) -> Union[None, Dict[str, items.RolimonsData]]:
-        now = time.time()
-        elapsed = now - self.last_call_time
-        
-        # elke 10 minuten opnieuw ophalen
-        if elapsed > 600 or not self.item_data:
-            self.item_data = await self.retrieve_item_data()
-            if self.item_data:
-                self.last_call_time = now
-                
-        return self.item_data
-    
-    @staticmethod
-    async def retrieve_item_data() -> Dict[str, items.RolimonsData]:
-        response = await request.Request(
-            url = "https://www.rolimons.com/itemapi/itemdetails",
-            method = "get"
-        ).send()
-        
-        data = response.response_json
-        items_dataclass = {}
-        items_dict = data.get("items", {})
-        for item_id_str, arr in items_dict.items():
-            if not isinstance(arr, list) or len(arr) < 10:
-                continue
-            rap = arr[2] if arr[2] != -1 else 0
-            value = arr[4] if arr[4] != -1 else 0
-            projected = arr[7]
-            items_dataclass[item_id_str] = items.RolimonsData(
-                rap=rap,
-                value=value,
-                projected=projected
-            )
-        return items_dataclass
\ No newline at end of file
+# helpers.py (MEGA UI upgrade)
+import re
+import time
+import json
+import codecs
+import random
+import asyncio
+import aiohttp
+from collections import deque
+
+import compute
+import memory
+import eventlog
+import profiler
+from models import request, items
+from typing import Callable, Iterable, Optional, Union, List, Dict, TYPE_CHECKING
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+from rich.panel import Panel
+from rich.layout import Layout
+from rich.align import Align
+from rich.text import Text
+
+if TYPE_CHECKING:
+    from sniper import WatchLimiteds
+
+# -------------------------------------------------------------------
+# UIManager - upgraded UI for Pro Sniper 2.0
+# -------------------------------------------------------------------
+class UIManager:
+    def __init__(self, total_proxies: int, username: str, robux: str):
+        self.start_time = time.time()
+        self.total_proxies = total_proxies
+        self.total_requests = 0
+        self.total_items_checked = 0
+        self.total_items_bought = 0
+        self.total_failed_buys = 0
+        self.username = username or ""
+        self.robux = robux or "Onbekend"
+        self.lock = asyncio.Lock()
+
+        # logs buffer (recent events), filled by the eventlog sink thread; the full log is on disk
+        # max_logs / max_activity drop below the configured sizes under memory pressure (shrink / restore)
+        self.log_capacity = 200
+        self.max_logs = self.log_capacity
+        self.logs: deque = deque(maxlen=self.log_capacity)
+
+        # activity buffer - what items were last checked / examined
+        # each entry: dict {timestamp, item_id, price, base_value, pct_off, proxy, reason}
+        self.activity_capacity = 200
+        self.max_activity = self.activity_capacity
+        self.activity: deque = deque(maxlen=self.activity_capacity)
+
+        # proxy health: map proxy -> dict(status, last_latency_ms, last_error)
+        # bounded too: rotating proxy lists would otherwise add a row per proxy ever seen
+        self.proxy_health: Dict[str, Dict] = {}
+        self.max_proxy_health = max(64, total_proxies)
+
+    # LOGGING
+    def on_log(self, record: eventlog.Record):
+        """eventlog subscriber, runs on the sink thread"""
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.ts))
+        self.logs.append(f"[{timestamp}] [{eventlog.NAMES.get(record.level, record.level)}] {record.text()}")
+        _trim(self.logs, self.max_logs)
+
+    async def log_event(self, message: str, level: str = "INFO"):
+        # kept for callers outside the sniper loop; goes through the eventlog like everything else
+        eventlog.log.emit(eventlog.level_of(level), message, {})
+
+    async def add_activity(self, item_id: int, price: int, base_value: int, pct_off: float, proxy: Optional[str], note: str):
+        async with self.lock:
+            now = time.strftime("%H:%M:%S")
+            self.activity.append({
+                "ts": now,
+                "item_id": item_id,
+                "price": price,
+                "base_value": base_value,
+                "pct_off": round(pct_off, 2),
+                "proxy": proxy or "local",
+                "note": note
+            })
+            _trim(self.activity, self.max_activity)
+
+    # METRICS
+    async def add_requests(self, count: int = 1):
+        async with self.lock:
+            self.total_requests += count
+
+    async def add_items(self, count: int = 1):
+        async with self.lock:
+            self.total_items_checked += count
+
+    async def add_items_bought(self, count: int = 1):
+        async with self.lock:
+            self.total_items_bought += count
+
+    async def add_failed_buy(self, count: int = 1):
+        async with self.lock:
+            self.total_failed_buys += count
+
+    async def update_proxy_health(self, proxy: Optional[str], latency_ms: Optional[int], ok: bool, last_error: Optional[str] = None):
+        async with self.lock:
+            key = proxy or "local"
+            # re-insert so the dict stays ordered by last update, then drop the stalest
+            self.proxy_health.pop(key, None)
+            while len(self.proxy_health) >= self.max_proxy_health:
+                del self.proxy_health[next(iter(self.proxy_health))]
+            self.proxy_health[key] = {
+                "ok": ok,
+                "latency_ms": latency_ms,
+                "last_error": last_error[:200] if last_error else last_error,
+                "ts": time.strftime("%H:%M:%S")
+            }
+
+    # MEMORY (registered with memory.accountant)
+    def footprint(self) -> int:
+        return memory.estimate(self.logs) + memory.estimate(self.activity) + memory.estimate(self.proxy_health)
+
+    def shrink(self, target: int) -> None:
+        """Shorter log / activity buffers, never below the rows the dashboard shows"""
+        footprint = self.footprint()
+        self.max_logs = memory.fit(self.max_logs, footprint, target, floor=14)
+        self.max_activity = memory.fit(self.max_activity, footprint, target, floor=8)
+        # trimmed in place: the sink thread keeps appending to the same deque
+        _trim(self.logs, self.max_logs)
+        _trim(self.activity, self.max_activity)
+
+    def restore(self) -> None:
+        """Back under budget: the buffers may grow to their configured sizes again"""
+        self.max_logs = self.log_capacity
+        self.max_activity = self.activity_capacity
+
+    # RENDER
+    # not profiler.timed: it runs on a compute thread and metrics are loop-only; compute_run/ui.render times it
+    def render(self):
+        elapsed = int(time.time() - self.start_time)
+        mins, secs = divmod(elapsed, 60)
+        uptime = f"{mins}m {secs}s"
+
+        # top-left: stats
+        stats = Table.grid(padding=(0,0))
+        stats.add_column(justify="right", style="cyan", ratio=1)
+        stats.add_column(justify="left", style="white", ratio=2)
+        stats.add_row("Proxies", str(self.total_proxies))
+        stats.add_row("Requests", str(self.total_requests))
+        stats.add_row("Items Checked", str(self.total_items_checked))
+        stats.add_row("Items Bought", str(self.total_items_bought))
+        stats.add_row("Failed Buys", str(self.total_failed_buys))
+        stats.add_row("Uptime", uptime)
+
+        # top-right: account
+        acct = Table.grid(padding=(0,0))
+        acct.add_column(justify="right", style="magenta")
+        acct.add_column(justify="left", style="white")
+        acct.add_row("Username", self.username)
+        acct.add_row("Robux", str(self.robux))
+
+        # proxy health table
+        proxy_table = Table(show_header=True, header_style="bold blue")
+        proxy_table.add_column("Proxy", overflow="fold")
+        proxy_table.add_column("OK", justify="center")
+        proxy_table.add_column("Latency ms", justify="right")
+        proxy_table.add_column("Last Error", overflow="fold")
+        proxy_table.add_column("TS", justify="center")
+
+        # show all proxies, sorted
+        for p, info in sorted(self.proxy_health.items()):
+            proxy_table.add_row(p, "✓" if info.get("ok") else "✗", str(info.get("latency_ms") or "-"), str(info.get("last_error") or "-"), info.get("ts"))
+
+        # recent activity table (last 8 rows)
+        act_table = Table(show_header=True, header_style="bold green")
+        act_table.add_column("TS", width=7)
+        act_table.add_column("ItemID", justify="right")
+        act_table.add_column("Base", justify="right")
+        act_table.add_column("Price", justify="right")
+        act_table.add_column("%Off", justify="right")
+        act_table.add_column("Proxy", overflow="fold")
+        act_table.add_column("Note", overflow="fold")
+
+        # slice and show last 8 activities
+        act_slice = list(self.activity)[-8:]
+        for a in reversed(act_slice):
+            act_table.add_row(a["ts"], str(a["item_id"]), str(a["base_value"]), str(a["price"]), f"{a['pct_off']}%", a["proxy"], a["note"])
+
+        # recent events panel - show last 14 lines to avoid overflow but internal buffer is huge
+        recent_lines = list(self.logs)[-14:]
+        recent_text = "\n".join(recent_lines) if recent_lines else "[grey]No events yet..."
+
+        # Layout
+        layout = Layout()
+        layout.split_row(
+            Layout(name="left"),
+            Layout(name="right", size=40)
+        )
+
+        # left column: stats up top, act table middle, recent events bottom
+        left = Layout()
+        left.split_column(
+            Layout(Panel(stats, title="Stats", border_style="green"), size=9),
+            Layout(Panel(act_table, title="Activity (recent checks)", border_style="blue"), size=12),
+            Layout(Panel(recent_text, title=f"Recent Events (last {len(recent_lines)})", border_style="yellow"), ratio=1)
+        )
+
+        # right column: account + proxy health
+        right = Layout()
+        right.split_column(
+            Layout(Panel(acct, title="Account Info", border_style="magenta"), size=6),
+            Layout(Panel(proxy_table, title="Proxy Health", border_style="red"), ratio=1)
+        )
+
+        layout["left"].update(left)
+        layout["right"].update(right)
+
+        return layout
+
+
+def _trim(buffer: deque, size: int) -> None:
+    """Drop the oldest entries down to `size` (append and popleft are atomic, so safe next to the sink thread)"""
+    try:
+        while len(buffer) > size:
+            buffer.popleft()
+    except IndexError:
+        # emptied by the other thread meanwhile
+        pass
+
+
+# UI runner
+async def run_ui(ui_manager: UIManager):
+    console = Console()
+    # higher refresh for responsive UI; the layout is built on the compute thread pool, not the loop
+    with Live(ui_manager.render(), refresh_per_second=4, console=console) as live:
+        while True:
+            await asyncio.sleep(0.25)
+            live.update(await compute.pool.run_thread("ui.render", ui_manager.render))
+
+class RolimonsItemStream:
+    """
+    Incremental parser for the rolimons itemdetails payload:
+    {"success":true,"item_count":N,"items":{"<id>":[name,acronym,rap,?,value,...,projected,...],...}}
+
+    Chunks are fed as they arrive; each complete "<id>":[...] pair is decoded on its own and only
+    (item_id, rap, value, projected) is written into the ValueIndex, so the full body and the nested
+    dict of lists never exist at the same time.
+    """
+    ITEMS_START = re.compile(r'"items"\s*:\s*\{')
+
+    def __init__(self, index: Optional[items.ValueIndex] = None):
+        self.index = index if index is not None else items.ValueIndex()
+        self.done = False
+        self._buf = ""
+        self._in_items = False
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done:
+            return
+        self._buf += self._utf8.decode(chunk)
+
+        if not self._in_items:
+            m = self.ITEMS_START.search(self._buf)
+            if not m:
+                # keep a tail in case the marker is split across chunks
+                self._buf = self._buf[-32:]
+                return
+            self._in_items = True
+            self._buf = self._buf[m.end():]
+
+        buf = self._buf
+        pos = 0
+        size = len(buf)
+        raw_decode = self._decoder.raw_decode
+        while True:
+            while pos < size and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= size:
+                break
+            if buf[pos] == "}":
+                self.done = True
+                pos += 1
+                break
+            try:
+                key, end = raw_decode(buf, pos)
+                while end < size and buf[end] in " \t\r\n":
+                    end += 1
+                if end >= size:
+                    break
+                if buf[end] != ":":
+                    raise ValueError(f"Malformed itemdetails payload near offset {end}")
+                end += 1
+                while end < size and buf[end] in " \t\r\n":
+                    end += 1
+                arr, end = raw_decode(buf, end)
+            except json.JSONDecodeError:
+                # pair is split across chunks, wait for more data
+                break
+            pos = end
+            self._emit(key, arr)
+
+        self._buf = buf[pos:]
+
+    def _emit(self, key: str, arr) -> None:
+        if not isinstance(arr, list) or len(arr) < 10:
+            return
+        try:
+            item_id = int(key)
+        except ValueError:
+            return
+        rap = arr[2] if arr[2] != -1 else 0
+        value = arr[4] if arr[4] != -1 else 0
+        self.index.add(item_id, rap, value, arr[7])
+
+    def close(self) -> items.ValueIndex:
+        if not self.done:
+            raise ValueError("Truncated itemdetails payload")
+        return self.index
+
+
+class RolimonsDataScraper:
+    def __init__(self, streaming: bool = True, offload: bool = True):
+        self.last_call_time = time.time()
+        self.streaming = streaming
+        # feed the streamed chunks to the parser on the compute thread pool instead of on the loop
+        self.offload = offload
+        self.item_data: items.ValueIndex = None
+        self._refresh: Optional[asyncio.Task] = None
+        # set under memory pressure: only the item ids this returns are kept in the index, now and after every refresh
+        self.keep: Optional[Callable[[], Iterable[int]]] = None
+
+    async def __call__(self) -> Union[None, items.ValueIndex]:
+        # elke 10 minuten opnieuw ophalen; one fetch at a time, and the old index keeps serving meanwhile
+        if self._refresh is None and (not self.item_data or time.time() - self.last_call_time > 600):
+            self._refresh = asyncio.create_task(self._reload())
+        if not self.item_data and self._refresh is not None:
+            await asyncio.shield(self._refresh)
+        return self.item_data
+
+    async def _reload(self):
+        try:
+            data = await self.retrieve_item_data(self.streaming, self.offload)
+            if data:
+                self.item_data = data.retained(set(self.keep())) if self.keep else data
+                self.last_call_time = time.time()
+        except Exception as e:
+            eventlog.log.error("Rolimons refresh failed: {error}", error=str(e))
+        finally:
+            self._refresh = None
+
+    def invalidate(self) -> None:
+        """Refresh on the next call (a restricted index misses items added to the watchlist since)"""
+        self.last_call_time = 0
+
+    def footprint(self) -> int:
+        return self.item_data.nbytes() if self.item_data else 0
+
+    def restrict(self, keep: Callable[[], Iterable[int]]) -> None:
+        self.keep = keep
+        if self.item_data:
+            self.item_data = self.item_data.retained(set(keep()))
+
+    @staticmethod
+    @profiler.timed("retrieve_item_data")
+    async def retrieve_item_data(streaming: bool = True, offload: bool = True) -> items.ValueIndex:
+        if streaming:
+            # still one chunk in memory at a time; offloaded, each chunk is parsed on a compute thread so
+            # the loop only waits for the hand over (the parse holds the GIL, but between chunks the loop runs)
+            parser = RolimonsItemStream()
+            async for chunk in request.Request(
+                url = "https://www.rolimons.com/itemapi/itemdetails",
+                method = "get",
+                deadline = request.BACKGROUND_DEADLINE
+            ).stream():
+                if offload:
+                    await compute.pool.run_thread("rolimons.parse", parser.feed, chunk)
+                else:
+                    parser.feed(chunk)
+            return parser.close()
+
+        response = await request.Request(
+            url = "https://www.rolimons.com/itemapi/itemdetails",
+            method = "get",
+            deadline = request.BACKGROUND_DEADLINE
+        ).send()
+        return RolimonsDataScraper.parse_item_data(response.response_json)
+
+    @staticmethod
+    def parse_item_data(data: dict) -> items.ValueIndex:
+        index = items.ValueIndex()
+        items_dict = data.get("items", {})
+        for item_id_str, arr in items_dict.items():
+            if not isinstance(arr, list) or len(arr) < 10:
+                continue
+            rap = arr[2] if arr[2] != -1 else 0
+            value = arr[4] if arr[4] != -1 else 0
+            projected = arr[7]
+            index.add(int(item_id_str), rap, value, projected)
+        return index
+
+
+class DealActivityScraper:
+    """
+    Polls the Rolimons deal activity feed and returns the entries it hasn't returned before.
+    An entry is [timestamp, type, item_id, price, ...]; the feed is newest first and overlaps
+    between polls, so entries at or before the newest timestamp already seen are dropped.
+    The first response only sets that mark: what was already in the feed at startup is stale.
+    One scraper is shared by all deal workers (each polls through its own proxy), so every
+    entry is handed to exactly one of them.
+    """
+    URL = "https://api.rolimons.com/market/v1/dealactivity"
+
+    def __init__(self, proxy: Optional[str] = None):
+        self.proxy = proxy
+        # None until the first response
+        self.last_ts: Optional[int] = None
+        # entries seen at exactly last_ts (several deals can share one second)
+        self._at_last_ts: set = set()
+
+    async def __call__(self, proxy: Optional[str] = None) -> List[list]:
+        resp = await request.Request(url=self.URL, method="get", proxy=proxy or self.proxy, retries=1).send()
+        activities = resp.response_json.get("activities") if isinstance(resp.response_json, dict) else None
+        if not activities:
+            return []
+
+        if self.last_ts is None:
+            self.last_ts = 0
+            self._mark(activities)
+            eventlog.log.info("Deal activity: {count} bestaande entries overgeslagen", count=len(activities))
+            return []
+
+        new = []
+        for act in activities:
+            try:
+                ts = int(act[0])
+                key = (act[2], act[3])
+            except (TypeError, ValueError, IndexError):
+                continue
+            if ts < self.last_ts or (ts == self.last_ts and key in self._at_last_ts):
+                continue
+            new.append(act)
+
+        self._mark(new)
+        return new
+
+    def _mark(self, activities: List[list]) -> None:
+        stamped = []
+        for act in activities:
+            try:
+                stamped.append((int(act[0]), (act[2], act[3])))
+            except (TypeError, ValueError, IndexError):
+                continue
+        if not stamped:
+            return
+        newest = max(ts for ts, _ in stamped)
+        if newest > self.last_ts:
+            self.last_ts = newest
+            self._at_last_ts = set()
+        self._at_last_ts.update(key for ts, key in stamped if ts == newest)
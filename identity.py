@@ -0,0 +1,81 @@
+# identity.py
+import os
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+
+import memory
+import metrics
+
+IDENTITY_PATH = Path(__file__).parent / "identities.json"
+
+
+class IdentityCache:
+    """
+    Persistent item_id -> (collectible_item_id, product_id) map.
+
+    These ids never change for an item, so they are learned from every details response and kept on
+    disk; with them a hot item can go straight to /resellers and a buy can be built without a lookup.
+    """
+
+    def __init__(self, path: Path = IDENTITY_PATH):
+        self.path = Path(path)
+        self.ids: Dict[int, Tuple[str, int]] = {}
+        self.dirty = False
+
+    def load(self) -> "IdentityCache":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.ids = {int(k): (str(v[0]), int(v[1])) for k, v in raw.items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, IndexError, KeyError):
+            # corrupt file: start over, it refills from the next details responses
+            self.ids = {}
+        return self
+
+    def collectible_item_id(self, item_id: int) -> str:
+        entry = self.ids.get(item_id)
+        if entry is None:
+            metrics.registry.inc("identity_miss")
+            return ""
+        metrics.registry.inc("identity_hit")
+        return entry[0]
+
+    def product_id(self, item_id: int) -> int:
+        entry = self.ids.get(item_id)
+        return entry[1] if entry else 0
+
+    def learn(self, item_id: int, collectible_item_id: str, product_id: int = 0) -> None:
+        if not collectible_item_id:
+            return
+        entry = self.ids.get(item_id)
+        if entry is not None and entry[0] == collectible_item_id and (entry[1] == product_id or not product_id):
+            return
+        self.ids[item_id] = (collectible_item_id, product_id or (entry[1] if entry else 0))
+        self.dirty = True
+
+    def save(self) -> bool:
+        if not self.dirty:
+            return False
+        self.dirty = False
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({str(k): list(v) for k, v in self.ids.items()}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        return True
+
+    def snapshot(self) -> "IdentityCache":
+        """Copy to save from another thread while the loop keeps learning; marks this one clean"""
+        copy = IdentityCache(self.path)
+        copy.ids = dict(self.ids)
+        copy.dirty = self.dirty
+        self.dirty = False
+        return copy
+
+    def footprint(self) -> int:
+        return memory.estimate(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -0,0 +1,176 @@
+# journal.py
+"""
+Append-only journal of every eligibility decision, resale verification and buy attempt.
+
+The event loop only puts a dict on a queue; a background thread serializes and appends the
+records as JSON lines in batches. Query it for post-mortems:
+
+    python journal.py --item 123456                      # everything about one item
+    python journal.py --item 123456 --at 14:03           # ... within 60s of 14:03 today
+    python journal.py --at "2026-10-19 14:03" --window 300 --kind buy
+"""
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterator, List
+
+from eventlog import log
+
+JOURNAL_PATH = Path(__file__).parent / "journal.jsonl"
+
+_STOP = object()
+
+
+class Journal:
+    def __init__(self, path: Path = JOURNAL_PATH, batch_size: int = 512, flush_interval: float = 0.5, max_queue: int = 100_000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Journal":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def record(self, kind: str, **fields: Any) -> None:
+        """Never blocks: if the writer can't keep up the record is dropped and counted"""
+        fields["ts"] = time.time()
+        fields["kind"] = kind
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Ask the writer to flush and stop; never blocks the caller longer than `timeout`"""
+        thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            log.warn("Journal queue vol bij afsluiten, {pending} records niet geschreven", pending=self.queue.qsize())
+            return
+        thread.join(timeout)
+
+    def _write(self, f, batch: List[Dict[str, Any]]):
+        """Append a batch, (re)opening the file when needed; returns the open file or None when it failed"""
+        try:
+            if f is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                f = open(self.path, "a", encoding="utf-8")
+            f.write("".join(json.dumps(e, default=str, separators=(",", ":")) + "\n" for e in batch))
+            f.flush()
+            self.written += len(batch)
+            return f
+        except (OSError, ValueError) as e:
+            # disk full, file rotated away, ...: drop this batch, reopen on the next one
+            self.dropped += len(batch)
+            log.error("Journal schrijven faalde, {count} records weg: {error}", count=len(batch), error=str(e))
+            if f is not None:
+                try:
+                    f.close()
+                except (OSError, ValueError):
+                    pass
+            return None
+
+    def _run(self):
+        f = None
+        stopping = False
+        try:
+            while not stopping:
+                batch: List[Dict[str, Any]] = []
+                try:
+                    entry = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                while True:
+                    if entry is _STOP:
+                        stopping = True
+                        break
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        entry = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    f = self._write(f, batch)
+        finally:
+            if f is not None:
+                try:
+                    f.close()
+                except (OSError, ValueError):
+                    pass
+
+
+# ---------------------------------------------------------
+# QUERY TOOL
+# ---------------------------------------------------------
+def read(path: Path = JOURNAL_PATH) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # last line may be half written
+                continue
+
+
+def parse_at(value: str) -> float:
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%H:%M:%S", "%H:%M"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt.startswith("%H"):
+            today = datetime.now()
+            parsed = parsed.replace(year=today.year, month=today.month, day=today.day)
+        return parsed.timestamp()
+    raise ValueError(f"Can't parse time {value!r}")
+
+
+def query(path: Path, item_id: Optional[int] = None, at: Optional[float] = None, window: float = 60.0, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    for entry in read(path):
+        if item_id is not None and entry.get("item_id") != item_id:
+            continue
+        if kind and entry.get("kind") != kind:
+            continue
+        if at is not None and abs(entry.get("ts", 0) - at) > window:
+            continue
+        yield entry
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Query the sniper decision journal")
+    parser.add_argument("--path", type=Path, default=JOURNAL_PATH)
+    parser.add_argument("--item", type=int, help="item id")
+    parser.add_argument("--at", help="time, e.g. 14:03 or '2026-10-19 14:03:20'")
+    parser.add_argument("--window", type=float, default=60.0, help="seconds around --at")
+    parser.add_argument("--kind", choices=["decision", "resale", "buy"])
+    args = parser.parse_args(argv)
+
+    at = parse_at(args.at) if args.at else None
+    count = 0
+    for entry in query(args.path, args.item, at, args.window, args.kind):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.pop("ts", 0)))
+        kind = entry.pop("kind", "?")
+        print(f"{stamp} {kind:<8} " + " ".join(f"{k}={v}" for k, v in entry.items()))
+        count += 1
+    print(f"{count} record(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
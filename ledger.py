@@ -0,0 +1,73 @@
+# ledger.py
+import time
+from typing import List, Optional, Tuple
+
+
+class Reservation:
+    __slots__ = ("amount", "open")
+
+    def __init__(self, amount: int):
+        self.amount = amount
+        self.open = True
+
+
+class BalanceLedger:
+    """
+    In-memory robux balance.
+
+    The confirmed balance comes from the currency endpoint (sync). Successful buys are debited
+    optimistically until a poll that started after the buy confirms them, and in-flight buys hold
+    a reservation so concurrent buys can't spend the same robux twice. All methods are called from
+    the event loop without awaiting in between, so no locking is needed.
+    """
+
+    def __init__(self):
+        self.confirmed: Optional[int] = None
+        self.synced_at: float = 0.0
+        self.reserved: int = 0
+        # (monotonic time of the debit, amount)
+        self._debits: List[Tuple[float, int]] = []
+
+    @property
+    def known(self) -> bool:
+        return self.confirmed is not None
+
+    @property
+    def available(self) -> Optional[int]:
+        if self.confirmed is None:
+            return None
+        return self.confirmed - sum(amount for _, amount in self._debits) - self.reserved
+
+    def can_afford(self, price: int) -> bool:
+        # before the first sync we don't know, so don't block anything
+        available = self.available
+        return available is None or price <= available
+
+    def sync(self, balance: int, observed_at: float) -> None:
+        """observed_at is the time.monotonic() at which the currency request was sent"""
+        if observed_at < self.synced_at:
+            # an older poll finished after a newer one
+            return
+        self.confirmed = int(balance)
+        self.synced_at = observed_at
+        # debits from before the poll started are included in the new balance
+        self._debits = [(ts, amount) for ts, amount in self._debits if ts > observed_at]
+
+    def reserve(self, amount: int) -> Optional[Reservation]:
+        if not self.can_afford(amount):
+            return None
+        self.reserved += amount
+        return Reservation(amount)
+
+    def commit(self, reservation: Reservation) -> None:
+        if not reservation.open:
+            return
+        reservation.open = False
+        self.reserved -= reservation.amount
+        self._debits.append((time.monotonic(), reservation.amount))
+
+    def release(self, reservation: Reservation) -> None:
+        if not reservation.open:
+            return
+        reservation.open = False
+        self.reserved -= reservation.amount
@@ -1,103 +1,149 @@
-# main.py
-import json
-import asyncio
-from pathlib import Path
-
-from models import config as cfg
-import helpers
-import sniper
-from models import items, request
-
-CONFIG_PATH = Path(__file__).parent / "config.json"
-
-
-class Account:
-    def __init__(self, data: dict):
-        self.cookie = data.get("cookie", "")
-        self.otp_token = data.get("otp_token", "")
-        self.user_id = None
-        self.user_name = None
-        self._xcsrfer = cfg.XCsrfTokenWaiter(cookie=self.cookie)
-
-    async def x_csrf_token(self):
-        return await self._xcsrfer()
-
-    async def populate_from_api(self):
-        try:
-            resp = await request.Request(
-                url="https://users.roblox.com/v1/users/authenticated",
-                method="get",
-                headers=request.Headers(cookies={".ROBLOSECURITY": self.cookie}),
-            ).send()
-
-            if resp.response_json:
-                self.user_id = resp.response_json.user_id
-                self.user_name = resp.response_json.user_name
-
-        except:
-            pass
-
-
-class Settings:
-    def __init__(self, path: Path):
-        data = json.load(open(path, "r"))
-
-        self.webhook = data.get("webhook")
-        self.account = Account(data["account"])
-
-        # buy_settings
-        raw = data.get("buy_settings", {})
-        self.buy_settings = type("x", (), {})()
-        self.buy_settings.generic_settings = raw.get("generic_settings", {})
-        self.buy_settings.custom_settings = raw.get("custom_settings", {})
-
-        # limiteds into items.Generic()
-        lim_raw = data.get("limiteds", [])
-        lim_items = []
-        for it in lim_raw:
-            try:
-                lim_items.append(items.Generic(item_id=int(it), collectible_item_id=""))
-            except:
-                pass
-
-        self.limiteds = cfg.Iterator(lim_items)
-        self.proxies = data.get("proxies", [])
-
-    async def load(self):
-        await self.account.populate_from_api()
-
-
-async def get_robux(account: Account):
-    try:
-        if not account.user_id:
-            await account.populate_from_api()
-
-        resp = await request.Request(
-            url=f"https://economy.roblox.com/v1/users/{account.user_id}/currency",
-            method="get",
-            headers=request.Headers(cookies={".ROBLOSECURITY": account.cookie})
-        ).send()
-
-        return resp.response_json.get("robux", "Onbekend") if resp.response_json else "Onbekend"
-
-    except:
-        return "Onbekend"
-
-
-async def main():
-    settings = Settings(CONFIG_PATH)
-    await settings.load()
-
-    rolis = helpers.RolimonsDataScraper()
-    robux = await get_robux(settings.account)
-
-    if len(settings.limiteds) == 0:
-        print("Deal Sniper Mode: 24/7 monitoring Rolimons deal activity for automatic good deals!")
-    else:
-        print(f"Monitoring {len(settings.limiteds)} specific limiteds.")
-
-    await sniper.WatchLimiteds(settings, rolis, robux)()
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
+# main.py
+import json
+import asyncio
+from pathlib import Path
+from typing import Optional
+
+from models import config as cfg
+import helpers
+import authenticator
+import identity
+import sniper
+import transport
+from models import items, request
+
+CONFIG_PATH = Path(__file__).parent / "config.json"
+
+
+class Account:
+    def __init__(self, data: dict):
+        self.cookie = data.get("cookie", "")
+        self.otp_token = data.get("otp_token", "")
+        self.user_id = None
+        self.user_name = None
+        self._xcsrfer = cfg.XCsrfTokenWaiter(cookie=self.cookie)
+        # answers two step verification challenges on our own requests
+        self.autopass = authenticator.AutoPass(self.otp_token) if self.otp_token else None
+        # prepared headers for the batch polls, and the purchase template once the user id is known
+        self.poll_headers = request.HeaderTemplate({".ROBLOSECURITY": self.cookie})
+        self._purchase: Optional[request.PurchaseTemplate] = None
+
+    async def x_csrf_token(self):
+        return await self._xcsrfer()
+
+    def purchase_template(self) -> request.PurchaseTemplate:
+        if self._purchase is None or self._purchase.purchaser_id != str(self.user_id):
+            self._purchase = request.PurchaseTemplate(self.cookie, self.user_id)
+        return self._purchase
+
+    async def populate_from_api(self):
+        try:
+            resp = await request.Request(
+                url="https://users.roblox.com/v1/users/authenticated",
+                method="get",
+                headers=request.Headers(cookies={".ROBLOSECURITY": self.cookie}),
+                deadline=request.BACKGROUND_DEADLINE,
+            ).send()
+
+            if resp.response_json:
+                self.user_id = resp.response_json.user_id
+                self.user_name = resp.response_json.user_name
+
+        except:
+            pass
+
+
+class Settings:
+    def __init__(self, path: Path):
+        data = json.load(open(path, "r"))
+
+        self.webhook = data.get("webhook")
+        self.account = Account(data["account"])
+
+        # buy_settings
+        raw = data.get("buy_settings", {})
+        self.buy_settings = type("x", (), {})()
+        self.buy_settings.generic_settings = raw.get("generic_settings", {})
+        self.buy_settings.custom_settings = raw.get("custom_settings", {})
+
+        # item_id -> collectible_item_id / product_id, learned from earlier runs
+        self.identities = identity.IdentityCache(
+            Path(data["identity_path"]) if data.get("identity_path") else identity.IDENTITY_PATH
+        ).load()
+
+        # limiteds into items.Generic()
+        lim_raw = data.get("limiteds", [])
+        lim_items = []
+        for it in lim_raw:
+            try:
+                item_id = int(it)
+                lim_items.append(items.Generic(item_id=item_id, collectible_item_id=self.identities.collectible_item_id(item_id)))
+            except (TypeError, ValueError):
+                print(f"limiteds: {it!r} is geen item id, overgeslagen")
+
+        self.limiteds = cfg.Iterator(lim_items)
+        # items polled straight on /resellers once their identity is known (opt-in, none by default)
+        self.hot_limiteds = []
+        for it in raw.get("hot_limiteds", []):
+            try:
+                self.hot_limiteds.append(int(it))
+            except (TypeError, ValueError):
+                print(f"hot_limiteds: {it!r} is geen item id, overgeslagen")
+        # seconds a /resellers check that wasn't a deal is not repeated for the same catalog price
+        self.resale_negative_ttl = float(raw.get("resale_negative_ttl", 30))
+        self.proxies = data.get("proxies", [])
+        # optional localhost control endpoint (metrics / profiling / live watchlist and settings)
+        self.control_port = data.get("control_port")
+        # append-only decision journal (defaults to journal.jsonl next to this file)
+        self.journal_path = data.get("journal_path")
+        # eventlog: minimum level (DEBUG/INFO/WARN/ERROR) and rotated jsonl file (defaults to logs/sniper.jsonl)
+        self.log_level = data.get("log_level", "INFO")
+        self.log_path = data.get("log_path")
+        # cap for the tracked caches (rolimons index, price book, ui buffers, ...), None = only report
+        self.memory_budget_mb = data.get("memory_budget_mb")
+        # http backend: aiohttp (default), httpx or http2 (both need httpx installed, http2 also h2)
+        self.transport = data.get("transport", "aiohttp")
+
+    async def load(self):
+        await self.account.populate_from_api()
+
+
+async def get_robux(account: Account):
+    try:
+        if not account.user_id:
+            await account.populate_from_api()
+
+        resp = await request.Request(
+            url=f"https://economy.roblox.com/v1/users/{account.user_id}/currency",
+            method="get",
+            headers=request.Headers(cookies={".ROBLOSECURITY": account.cookie}),
+            deadline=request.BACKGROUND_DEADLINE
+        ).send()
+
+        return resp.response_json.get("robux", "Onbekend") if resp.response_json else "Onbekend"
+
+    except:
+        return "Onbekend"
+
+
+async def main():
+    settings = Settings(CONFIG_PATH)
+    await transport.use(settings.transport, settings.proxies)
+    await settings.load()
+
+    rolis = helpers.RolimonsDataScraper()
+    robux = await get_robux(settings.account)
+
+    if len(settings.limiteds) == 0:
+        print("Deal Sniper Mode: 24/7 monitoring Rolimons deal activity for automatic good deals!")
+    else:
+        print(f"Monitoring {len(settings.limiteds)} specific limiteds.")
+
+    try:
+        await sniper.WatchLimiteds(settings, rolis, robux)()
+    finally:
+        await transport.active.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,298 @@
+# memory.py
+import os
+import ast
+import sys
+import time
+import asyncio
+import tracemalloc
+import functools
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import metrics
+from eventlog import log
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---------------------------------------------------------
+# SIZE ESTIMATES
+# ---------------------------------------------------------
+def sizeof(obj: Any, depth: int = 3) -> int:
+    """
+    getsizeof plus what the object holds, `depth` levels down. Shared objects (small ints,
+    interned strings) are counted every time, so this overestimates; good enough for a budget.
+    """
+    size = sys.getsizeof(obj)
+    if depth <= 0 or isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    depth -= 1
+    if isinstance(obj, dict):
+        size += sum(sizeof(k, depth) + sizeof(v, depth) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(sizeof(v, depth) for v in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(sizeof(getattr(obj, s, None), depth) for s in obj.__slots__ if s != "__weakref__")
+    elif hasattr(obj, "__dict__"):
+        size += sizeof(obj.__dict__, depth)
+    return size
+
+
+def fit(count: int, footprint: int, target: int, floor: int = 0) -> int:
+    """How many of `count` entries fit in `target` bytes when all of them take `footprint` now"""
+    if count == 0 or footprint <= target:
+        return count
+    return max(floor, int(count * target / footprint))
+
+
+def estimate(container: Any, sample: int = 16) -> int:
+    """Container size plus the average entry of the first `sample` entries times the length"""
+    n = len(container)
+    size = sys.getsizeof(container)
+    if not n:
+        return size
+    if isinstance(container, dict):
+        entries = [sizeof(k, 2) + sizeof(v, 2) for k, v in islice(container.items(), sample)]
+    else:
+        entries = [sizeof(v, 2) for v in islice(container, sample)]
+    return size + sum(entries) * n // len(entries)
+
+
+# ---------------------------------------------------------
+# ACCOUNTANT
+# ---------------------------------------------------------
+class Tracked:
+    __slots__ = ("name", "footprint", "shrink", "restore", "order", "last")
+
+    def __init__(self, name: str, footprint: Callable[[], int], shrink: Optional[Callable[[int], None]], order: int,
+                 restore: Optional[Callable[[], None]] = None):
+        self.name = name
+        # estimated bytes held right now
+        self.footprint = footprint
+        # evict until the footprint is at most the given bytes (or as far as the cache allows), None = not evictable
+        self.shrink = shrink
+        # undo the limits shrink set once the total is back under budget, None = nothing to undo
+        self.restore = restore
+        # lower shrinks first
+        self.order = order
+        self.last = 0
+
+
+class Accountant:
+    """
+    Central bookkeeping for the caches and buffers that grow with traffic or item count.
+
+    Every cache registers a footprint estimate and, when it can drop entries, a shrink callback.
+    enforce() sums the footprints and, when they exceed `budget` bytes, shrinks caches in `order`
+    (cheapest to rebuild first) until the total fits. Caches that lowered a limit to shrink get it
+    back through their restore callback once the total is well under budget again (RESTORE_BELOW),
+    so they don't flap around the limit. Without a budget it only reports.
+    """
+
+    RESTORE_BELOW = 0.8
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self.tracked: Dict[str, Tracked] = {}
+        self._over = False
+        # a shrink lowered limits that restore callbacks have not lifted yet
+        self._shrunk = False
+
+    def register(self, name: str, footprint: Callable[[], int], shrink: Optional[Callable[[int], None]] = None, order: int = 100,
+                 restore: Optional[Callable[[], None]] = None) -> None:
+        self.tracked[name] = Tracked(name, footprint, shrink, order, restore)
+
+    def unregister(self, name: str) -> None:
+        self.tracked.pop(name, None)
+
+    def clear(self) -> None:
+        self.tracked.clear()
+
+    def measure(self) -> int:
+        total = 0
+        for t in self.tracked.values():
+            try:
+                t.last = int(t.footprint())
+            except Exception as e:
+                log.error("Memory footprint of {name} failed: {error}", name=t.name, error=str(e))
+                t.last = 0
+            metrics.registry.set("memory_bytes", t.name, t.last)
+            total += t.last
+        metrics.registry.set("memory_bytes", "total", total)
+        return total
+
+    def enforce(self) -> int:
+        """Measure, shrink while over budget; returns the tracked total afterwards"""
+        total = self.measure()
+        if self.budget is None or total <= self.budget:
+            if self._over:
+                log.info("Geheugen weer binnen budget: {total_mb} MB / {budget_mb} MB", total_mb=mb(total), budget_mb=mb(self.budget))
+                self._over = False
+            if self._shrunk and (self.budget is None or total <= self.budget * self.RESTORE_BELOW):
+                self._shrunk = False
+                for t in self.tracked.values():
+                    if t.restore is not None:
+                        try:
+                            t.restore()
+                        except Exception as e:
+                            log.error("Memory restore of {name} failed: {error}", name=t.name, error=str(e))
+            return total
+
+        for t in sorted(self.tracked.values(), key=lambda t: t.order):
+            if total <= self.budget:
+                break
+            if t.shrink is None or t.last <= 0:
+                continue
+            before = t.last
+            try:
+                t.shrink(max(0, before - (total - self.budget)))
+                t.last = int(t.footprint())
+            except Exception as e:
+                log.error("Memory shrink of {name} failed: {error}", name=t.name, error=str(e))
+                continue
+            metrics.registry.set("memory_bytes", t.name, t.last)
+            self._shrunk = True
+            if t.last < before:
+                metrics.registry.inc("memory_evictions", t.name)
+                total -= before - t.last
+
+        metrics.registry.set("memory_bytes", "total", total)
+        if total > self.budget and not self._over:
+            log.warn("Geheugen boven budget na opruimen: {total_mb} MB / {budget_mb} MB", total_mb=mb(total), budget_mb=mb(self.budget))
+        self._over = total > self.budget
+        return total
+
+    async def run(self, interval: float = 10.0) -> None:
+        while True:
+            self.enforce()
+            await asyncio.sleep(interval)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "budget_mb": mb(self.budget),
+            "tracked_mb": mb(sum(t.last for t in self.tracked.values())),
+            "rss_mb": mb(rss()),
+            "caches": {t.name: {"mb": mb(t.last), "evictable": t.shrink is not None} for t in sorted(self.tracked.values(), key=lambda t: -t.last)},
+        }
+
+
+def mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / 1024 / 1024, 2)
+
+
+def rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+accountant = Accountant()
+
+
+# ---------------------------------------------------------
+# TRACEMALLOC REPORT
+# ---------------------------------------------------------
+def _module(filename: str) -> str:
+    if filename.startswith(ROOT + os.sep):
+        return os.path.relpath(filename, ROOT)
+    for marker in ("site-packages" + os.sep, f"python{sys.version_info[0]}.{sys.version_info[1]}" + os.sep):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    return filename
+
+
+@functools.lru_cache(maxsize=256)
+def _functions(filename: str) -> Tuple[Tuple[int, int, str], ...]:
+    """(first line, last line, qualified name) of every function in a source file"""
+    try:
+        with open(filename, "rb") as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError, ValueError):
+        return ()
+    found: List[Tuple[int, int, str]] = []
+
+    def walk(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = prefix + child.name
+                found.append((child.lineno, child.end_lineno or child.lineno, name))
+                walk(child, name + ".")
+            elif isinstance(child, ast.ClassDef):
+                walk(child, prefix + child.name + ".")
+            else:
+                walk(child, prefix)
+
+    walk(tree, "")
+    return tuple(found)
+
+
+def _function(filename: str, lineno: int) -> str:
+    """Innermost function around a line, '<module>' for top level code"""
+    best = None
+    for first, last, name in _functions(filename):
+        if first <= lineno <= last and (best is None or first >= best[0]):
+            best = (first, name)
+    return best[1] if best else "<module>"
+
+
+class Snapshots:
+    """
+    On demand tracemalloc diffs. The first take() starts tracing and records a baseline; every
+    later take() reports what grew since the previous one, summed per module and per function.
+    Tracing costs CPU and memory while on, so stop() it once the leak is found.
+    """
+
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.previous: Optional[tracemalloc.Snapshot] = None
+        self.taken_at = 0.0
+
+    def take(self, top: int = 20) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.previous = None
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+        now = time.time()
+        current, peak = tracemalloc.get_traced_memory()
+        report: Dict[str, Any] = {"traced_mb": mb(current), "peak_mb": mb(peak), "rss_mb": mb(rss())}
+        if self.previous is None:
+            report["baseline"] = True
+        else:
+            report["since_s"] = round(now - self.taken_at, 1)
+            by_module: Dict[str, List[int]] = {}
+            by_function: Dict[str, List[int]] = {}
+            for stat in snapshot.compare_to(self.previous, "lineno"):
+                frame = stat.traceback[0]
+                module = _module(frame.filename)
+                for key, bucket in ((module, by_module), (f"{module}:{_function(frame.filename, frame.lineno)}", by_function)):
+                    entry = bucket.setdefault(key, [0, 0])
+                    entry[0] += stat.size_diff
+                    entry[1] += stat.count_diff
+            report["by_module"] = _top(by_module, top)
+            report["by_function"] = _top(by_function, top)
+        self.previous = snapshot
+        self.taken_at = now
+        return report
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.previous = None
+
+
+def _top(bucket: Dict[str, List[int]], top: int) -> List[Dict[str, Any]]:
+    rows = sorted(bucket.items(), key=lambda kv: -abs(kv[1][0]))[:top]
+    return [{"where": where, "kb": round(size / 1024, 1), "blocks": count} for where, (size, count) in rows]
+
+
+snapshots = Snapshots()
@@ -0,0 +1,60 @@
+# metrics.py
+import re
+import time
+from typing import Dict, Tuple, List, Any
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint(url: str) -> str:
+    """Metric label for an url: host + path, numeric path segments collapsed and query dropped"""
+    path = url.split("://", 1)[-1].split("?", 1)[0]
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+class Metrics:
+    """
+    Process wide counters, gauges and timings, keyed by (name, label).
+    Everything is updated from the event loop, so there is no locking.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.gauges: Dict[Tuple[str, str], float] = {}
+        # (name, label) -> [count, total_seconds, max_seconds]
+        self.timings: Dict[Tuple[str, str], List[float]] = {}
+
+    def inc(self, name: str, label: str = "", count: int = 1):
+        key = (name, label)
+        self.counters[key] = self.counters.get(key, 0) + count
+
+    def set(self, name: str, label: str, value: float):
+        self.gauges[(name, label)] = value
+
+    def observe(self, name: str, label: str, seconds: float):
+        entry = self.timings.get((name, label))
+        if entry is None:
+            self.timings[(name, label)] = [1, seconds, seconds]
+            return
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds > entry[2]:
+            entry[2] = seconds
+
+    def counter(self, name: str, label: str = "") -> int:
+        return self.counters.get((name, label), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "counters": {f"{n}[{l}]" if l else n: v for (n, l), v in self.counters.items()},
+            "gauges": {f"{n}[{l}]" if l else n: v for (n, l), v in self.gauges.items()},
+            "timings": {
+                f"{n}[{l}]" if l else n: {"count": c, "total_ms": round(t * 1000, 2), "avg_ms": round(t / c * 1000, 3), "max_ms": round(m * 1000, 2)}
+                for (n, l), (c, t, m) in self.timings.items()
+            },
+        }
+
+
+registry = Metrics()
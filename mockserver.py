@@ -0,0 +1,313 @@
+# mockserver.py
+"""
+Local stand-in for the Roblox / Rolimons endpoints the sniper talks to, for soak and fault runs.
+
+    server = MockServer(item_count=500)
+    await server.start()
+    server.install_routes()      # point request.ROUTES at it
+    ...
+    await server.stop()
+
+Prices move on every details call and a share of them dip far below value, so the full
+details -> resale -> purchase path gets exercised. Nothing here is used in production.
+
+Faults are scripted per endpoint kind (the handler name) and consumed one per request:
+
+    server.script("catalog_details", [status(503), status(503)])   # two 503s, then normal answers
+    server.script("purchase", [csrf(), challenge()])
+"""
+import json
+import time
+import base64
+import asyncio
+import random
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+from models import request
+
+ROUTED_HOSTS = (
+    "https://catalog.roblox.com",
+    "https://apis.roblox.com",
+    "https://users.roblox.com",
+    "https://economy.roblox.com",
+    "https://auth.roblox.com",
+    "https://twostepverification.roblox.com",
+    "https://www.rolimons.com",
+    "https://api.rolimons.com",
+)
+
+
+# ---------------------------------------------------------
+# FAULTS
+# a fault gets the request and returns a response to send instead of the real one, or None to let
+# the real handler answer (after whatever it did, e.g. a delay)
+# ---------------------------------------------------------
+Fault = Callable[[web.Request], Awaitable[Optional[web.StreamResponse]]]
+
+
+def delay(seconds: float) -> Fault:
+    async def fault(req: web.Request):
+        await asyncio.sleep(seconds)
+        return None
+    return fault
+
+
+def status(code: int, body: str = '{"errors":[{"code":0,"message":"mock fault"}]}', headers: Optional[Dict[str, str]] = None) -> Fault:
+    async def fault(req: web.Request):
+        return web.Response(status=code, text=body, content_type="application/json", headers=headers)
+    return fault
+
+
+def csrf(token: str = "mock-csrf-token") -> Fault:
+    """403 Token Validation Failed with a fresh x-csrf-token, like every roblox POST without one"""
+    return status(403, '{"errors":[{"code":0,"message":"Token Validation Failed"}]}', {"x-csrf-token": token})
+
+
+def rate_limited(retry_after: Optional[float] = None) -> Fault:
+    return status(429, '{"errors":[{"code":0,"message":"Too many requests"}]}', {"Retry-After": str(retry_after)} if retry_after is not None else None)
+
+
+def challenge(challenge_id: str = "mock-challenge", action_type: str = "Generic") -> Fault:
+    """403 with a two step verification rblx-challenge, answered by /challenges/authenticator/verify + /challenge/v1/continue"""
+    metadata = base64.b64encode(json.dumps({"challengeId": challenge_id, "actionType": action_type, "userId": "1"}).encode()).decode()
+    return status(403, '{"errors":[{"code":0,"message":"Challenge is required to authorize the request"}]}', {
+        "rblx-challenge-id": challenge_id,
+        "rblx-challenge-type": "twostepverification",
+        "rblx-challenge-metadata": metadata,
+    })
+
+
+def malformed(body: str = '{"data": [{"id": 1, "lowestResalePrice": ') -> Fault:
+    return status(200, body)
+
+
+def truncated(declared: int = 4096, body: bytes = b'{"data": [') -> Fault:
+    """Promise `declared` bytes, send a few, drop the connection"""
+    async def fault(req: web.Request):
+        resp = web.StreamResponse(status=200, headers={"Content-Type": "application/json"})
+        resp.content_length = declared
+        await resp.prepare(req)
+        await resp.write(body)
+        req.transport.close()
+        return resp
+    return fault
+
+
+def reset() -> Fault:
+    """Close the connection without any response"""
+    async def fault(req: web.Request):
+        req.transport.abort()
+        return web.Response(status=500)
+    return fault
+
+
+class MockServer:
+    def __init__(self, item_count: int = 500, seed: int = 1, deal_rate: float = 0.01, host: str = "127.0.0.1", port: int = 0):
+        self.rng = random.Random(seed)
+        self.deal_rate = deal_rate
+        self.host = host
+        self.port = port
+        self.robux = 10 ** 9
+        self.user_id = 1
+        self.csrf_token = "mock-csrf-token"
+        # item_id -> [collectible_item_id, product_id, value, price]
+        self.items: Dict[int, list] = {}
+        for i in range(item_count):
+            item_id = 1000000 + i
+            value = self.rng.randint(100, 100000)
+            self.items[item_id] = [f"{self.rng.getrandbits(128):032x}", self.rng.randint(1, 10 ** 9), value, value]
+        self.by_collectible = {v[0]: k for k, v in self.items.items()}
+        # path kind -> request count
+        self.hits: Dict[str, int] = {}
+        # endpoint kind -> scripted faults still to serve
+        self.scripts: Dict[str, Deque[Fault]] = {}
+        # client (host, port) of every connection that sent a request, for connection reuse
+        self.connections: Set[Tuple[str, int]] = set()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def item_ids(self) -> List[int]:
+        return list(self.items)
+
+    # ---------------------------------------------------------
+    # lifecycle
+    # ---------------------------------------------------------
+    async def start(self) -> None:
+        app = web.Application(middlewares=[self._faults])
+        for method, path, handler in (
+            ("POST", "/v1/catalog/items/details", self.catalog_details),
+            ("POST", "/marketplace-items/v1/items/details", self.marketplace_details),
+            ("GET", "/marketplace-sales/v1/item/{cid}/resellers", self.resellers),
+            ("POST", "/marketplace-sales/v1/item/{cid}/purchase-resale", self.purchase),
+            ("GET", "/v1/users/authenticated", self.authenticated),
+            ("GET", "/v1/users/{uid}/currency", self.currency),
+            ("POST", "/v2/logout", self.logout),
+            ("POST", "/v1/users/{uid}/challenges/authenticator/verify", self.verify),
+            ("POST", "/challenge/v1/continue", self.challenge_continue),
+            ("GET", "/itemapi/itemdetails", self.rolimons),
+            ("GET", "/market/v1/dealactivity", self.dealactivity),
+        ):
+            app.router.add_route(method, path, handler, name=handler.__name__)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def install_routes(self) -> None:
+        for prefix in ROUTED_HOSTS:
+            request.ROUTES[prefix] = self.url
+
+    @staticmethod
+    def remove_routes() -> None:
+        for prefix in ROUTED_HOSTS:
+            request.ROUTES.pop(prefix, None)
+
+    # ---------------------------------------------------------
+    # faults
+    # ---------------------------------------------------------
+    def script(self, kind: str, faults: Iterable[Fault]) -> None:
+        self.scripts.setdefault(kind, deque()).extend(faults)
+
+    def clear(self) -> None:
+        self.scripts.clear()
+        self.hits.clear()
+        self.connections.clear()
+
+    @web.middleware
+    async def _faults(self, req: web.Request, handler):
+        kind = req.match_info.route.name
+        if req.transport is not None:
+            self.connections.add(req.transport.get_extra_info("peername"))
+        queue = self.scripts.get(kind)
+        if queue:
+            self._hit(kind)
+            resp = await queue.popleft()(req)
+            if resp is not None:
+                return resp
+            # the fault only delayed, the handler answers (and counts) this request
+            self.hits[kind] -= 1
+        return await handler(req)
+
+    # ---------------------------------------------------------
+    # state
+    # ---------------------------------------------------------
+    def _hit(self, kind: str) -> None:
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+
+    def _tick(self, item_id: int) -> int:
+        entry = self.items[item_id]
+        value = entry[2]
+        if self.rng.random() < self.deal_rate:
+            entry[3] = max(1, int(value * self.rng.uniform(0.3, 0.6)))
+        else:
+            entry[3] = max(1, int(value * self.rng.uniform(0.9, 1.3)))
+        return entry[3]
+
+    async def _requested_ids(self, req: web.Request) -> List[int]:
+        try:
+            body = await req.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return []
+        rows = body.get("items", []) if isinstance(body, dict) else []
+        ids = []
+        for row in rows:
+            try:
+                ids.append(int(row.get("itemId") or row.get("id") or row.get("itemTargetId")))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        return [i for i in ids if i in self.items]
+
+    # ---------------------------------------------------------
+    # handlers
+    # ---------------------------------------------------------
+    async def catalog_details(self, req: web.Request) -> web.Response:
+        self._hit("catalog_details")
+        data = [{
+            "id": i,
+            "itemType": "Asset",
+            "productId": self.items[i][1],
+            "collectibleItemId": self.items[i][0],
+            "lowestResalePrice": self._tick(i),
+        } for i in await self._requested_ids(req)]
+        return web.json_response({"data": data})
+
+    async def marketplace_details(self, req: web.Request) -> web.Response:
+        self._hit("marketplace_details")
+        data = [{
+            "itemTargetId": i,
+            "collectibleItemId": self.items[i][0],
+            "lowestResalePrice": self._tick(i),
+        } for i in await self._requested_ids(req)]
+        return web.json_response(data)
+
+    async def resellers(self, req: web.Request) -> web.Response:
+        self._hit("resellers")
+        item_id = self.by_collectible.get(req.match_info["cid"])
+        if item_id is None:
+            return web.json_response({"errors": [{"message": "not found"}]}, status=404)
+        return web.json_response([{
+            "collectibleItemInstanceId": f"{self.rng.getrandbits(64):016x}",
+            "collectibleProductId": f"{self.rng.getrandbits(64):016x}",
+            "sellerId": self.rng.randint(1, 10 ** 9),
+            "price": self.items[item_id][3],
+        }])
+
+    async def purchase(self, req: web.Request) -> web.Response:
+        self._hit("purchase")
+        if req.headers.get("x-csrf-token") != self.csrf_token:
+            return web.json_response({"errors": [{"message": "Token Validation Failed"}]}, status=403, headers={"x-csrf-token": self.csrf_token})
+        try:
+            price = int((await req.json()).get("expectedPrice", 0))
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            price = 0
+        self.robux -= price
+        return web.json_response({"purchaseResult": "Purchase transaction success.", "purchased": True, "pending": False, "errorMessage": None})
+
+    async def authenticated(self, req: web.Request) -> web.Response:
+        self._hit("authenticated")
+        return web.json_response({"id": self.user_id, "name": "soak", "displayName": "soak"})
+
+    async def currency(self, req: web.Request) -> web.Response:
+        self._hit("currency")
+        return web.json_response({"robux": self.robux})
+
+    async def logout(self, req: web.Request) -> web.Response:
+        self._hit("logout")
+        return web.json_response({"errors": [{"code": 0, "message": "Token Validation Failed"}]}, status=403, headers={"x-csrf-token": self.csrf_token})
+
+    async def verify(self, req: web.Request) -> web.Response:
+        self._hit("verify")
+        return web.json_response({"verificationToken": "mock-verification-token"})
+
+    async def challenge_continue(self, req: web.Request) -> web.Response:
+        self._hit("challenge_continue")
+        return web.json_response({"challengeId": "mock-challenge", "challengeType": "twostepverification"})
+
+    async def rolimons(self, req: web.Request) -> web.Response:
+        self._hit("rolimons")
+        payload = {"success": True, "item_count": len(self.items), "items": {
+            str(i): [f"Item {i}", "", v[2], -1, v[2], -1, -1, -1, -1, -1] for i, v in self.items.items()
+        }}
+        return web.json_response(payload)
+
+    async def dealactivity(self, req: web.Request) -> web.Response:
+        """A few fresh listings per poll, newest first, as [timestamp, type, item_id, price, rap]"""
+        self._hit("dealactivity")
+        now = int(time.time())
+        picked = self.rng.sample(self.item_ids, min(20, len(self.items)))
+        return web.json_response({"success": True, "activities": [
+            [now, 1, str(i), self._tick(i), self.items[i][2]] for i in picked
+        ]})
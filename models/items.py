@@ -1,39 +1,97 @@
-from dataclasses import dataclass, field   
-from typing import Literal
-
-import uuid
-
-@dataclass
-class RolimonsData:
-    rap: int = 0
-    value: int = 0
-    projected: int = -1
-        
-@dataclass
-class BuyData:
-    collectible_item_id: str
-    collectible_item_instance_id: str
-    collectible_product_id: str
-
-    expected_price: int
-    expected_purchaser_id: str
-    
-    expected_seller_id: int = 1
-    expected_purchaser_type: str = "User"
-    expected_currency: int = 1
-    expected_seller_type: Literal[None] = None
-    
-    idempotency_key: str = field(default_factory=lambda: str(uuid.uuid4()))
-    
-@dataclass
-class Data:
-    item_id: int
-    product_id: int
-    collectible_item_id: str
-    
-    lowest_resale_price: int
-    
-@dataclass
-class Generic:
-    item_id: int
-    collectible_item_id: str
\ No newline at end of file
+from dataclasses import dataclass, field   
+from typing import Literal, Dict, Optional, Union
+from array import array
+import sys
+
+import uuid
+
+@dataclass(slots=True)
+class RolimonsData:
+    rap: int = 0
+    value: int = 0
+    projected: int = -1
+        
+@dataclass(slots=True)
+class BuyData:
+    collectible_item_id: str
+    collectible_item_instance_id: str
+    collectible_product_id: str
+
+    expected_price: int
+    expected_purchaser_id: str
+    
+    expected_seller_id: int = 1
+    expected_purchaser_type: str = "User"
+    expected_currency: int = 1
+    expected_seller_type: Literal[None] = None
+    
+    idempotency_key: str = field(default_factory=lambda: str(uuid.uuid4()))
+    
+@dataclass(slots=True)
+class Data:
+    item_id: int
+    product_id: int
+    collectible_item_id: str
+    
+    lowest_resale_price: int
+    
+@dataclass(slots=True)
+class Generic:
+    item_id: int
+    collectible_item_id: str
+
+class ValueIndex:
+    """
+    Compact item_id -> (rap, value, projected) index for the Rolimons data.
+    Rows live in three typed arrays instead of one RolimonsData object per item;
+    get() accepts str or int ids and builds the RolimonsData on demand.
+    """
+    __slots__ = ("_rows", "_rap", "_value", "_projected")
+
+    def __init__(self):
+        self._rows: Dict[int, int] = {}
+        self._rap = array("q")
+        self._value = array("q")
+        self._projected = array("q")
+
+    def add(self, item_id: int, rap: int, value: int, projected: int) -> None:
+        row = self._rows.get(item_id)
+        if row is None:
+            self._rows[item_id] = len(self._rap)
+            self._rap.append(rap)
+            self._value.append(value)
+            self._projected.append(projected)
+        else:
+            self._rap[row] = rap
+            self._value[row] = value
+            self._projected[row] = projected
+
+    def get(self, item_id: Union[int, str], default: Optional[RolimonsData] = None) -> Optional[RolimonsData]:
+        try:
+            row = self._rows.get(int(item_id))
+        except (TypeError, ValueError):
+            return default
+        if row is None:
+            return default
+        return RolimonsData(rap=self._rap[row], value=self._value[row], projected=self._projected[row])
+
+    def retained(self, item_ids) -> "ValueIndex":
+        """A new index with only these ids"""
+        index = ValueIndex()
+        for item_id, row in self._rows.items():
+            if item_id in item_ids:
+                index.add(item_id, self._rap[row], self._value[row], self._projected[row])
+        return index
+
+    def nbytes(self) -> int:
+        # dict + two ints per row (key, row number) + the three arrays
+        return sys.getsizeof(self._rows) + 56 * len(self._rows) + sys.getsizeof(self._rap) * 3
+
+    def __contains__(self, item_id) -> bool:
+        try:
+            return int(item_id) in self._rows
+        except (TypeError, ValueError):
+            return False
+
+    def __len__(self) -> int:
+        return len(self._rows)
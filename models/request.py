@@ -1,350 +1,629 @@
-# models/request.py (PATCHED)
-import re
-import json
-import aiohttp
-import asyncio
-from dataclasses import dataclass
-from typing import List, Optional, Union, Dict, Any
-
-import errors
-from models import items
-
-
-# ---------------------------------------------------------
-# RESPONSE OBJECTS
-# ---------------------------------------------------------
-class ResponseJsons:
-
-    @dataclass
-    class ItemDetails:
-        items: List[items.Data]
-
-    @dataclass
-    class CookieInfo:
-        user_id: Any
-        user_name: Any
-        display_name: Any = ""
-
-    @dataclass
-    class BuyResponse:
-        purchased_result: Any = None
-        purchased: bool = False
-        pending: bool = False
-        error_message: Any = None
-
-    @dataclass
-    class ResaleResponse:
-        collectible_item_instance_id: str = ""
-        collectible_product_id: str = ""
-        seller_id: int = 0
-        price: int = 0
-
-    @dataclass
-    class TwoStepVerification:
-        verificationToken: str = ""
-
-    @staticmethod
-    def validate_json(url, response_json: Any):
-        """
-        Detect JSON based on endpoint patterns and normalize it.
-        Returns: dataclass (ItemDetails/CookieInfo/ResaleResponse/BuyResponse) or a raw dict/list/int
-        """
-
-        if response_json is None:
-            return None
-
-        # ---------------------------
-        # 1) ROLIMONS DEALACTIVITY: return raw dict so callers can .get("activities")
-        # ---------------------------
-        if "rolimons.com/market/v1/dealactivity" in url or "api.rolimons.com/market/v1/dealactivity" in url:
-            if isinstance(response_json, dict) and "activities" in response_json:
-                return response_json
-
-        # ---------------------------
-        # 2) ROBLOX CURRENCY endpoint (robux)
-        # ---------------------------
-        if re.search(r"/v1/users/\d+/currency$", url) or "/currency" in url and isinstance(response_json, dict):
-            # return raw dict so caller can check .get("robux")
-            return response_json
-
-        # ---------------------------
-        # 3) Items details endpoint
-        # ---------------------------
-        if "/items/details" in url:
-            try:
-                data_list = []
-                if not isinstance(response_json, (dict, list)):
-                    return None
-
-                source = response_json.get("data", response_json) if isinstance(response_json, dict) else response_json
-
-                if not isinstance(source, list):
-                    return None
-
-                if isinstance(source, list):
-                    for it in source:
-                        if not isinstance(it, dict):
-                            return None
-                        data_list.append(items.Data(
-                            item_id=int(it.get("id", it.get("itemId", 0))),
-                            product_id=int(it.get("productId", it.get("collectibleProductId", 0) or 0)),
-                            collectible_item_id=str(it.get("collectibleItemId", it.get("collectible_item_id", ""))),
-                            lowest_resale_price=int(it.get("lowestResalePrice", it.get("offer", {}).get("price", 0)))
-                        ))
-                return ResponseJsons.ItemDetails(items=data_list)
-            except Exception:
-                return None
-
-        # ---------------------------
-        # 4) Authenticated user info
-        # ---------------------------
-        if "/users/authenticated" in url:
-            if isinstance(response_json, dict):
-                return ResponseJsons.CookieInfo(
-                    user_id=response_json.get("id"),
-                    user_name=response_json.get("name"),
-                    display_name=response_json.get("displayName", "")
-                )
-            return None
-
-        # ---------------------------
-        # 5) Purchase resale response
-        # ---------------------------
-        if re.match(r".*/purchase-resale$", url):
-            if isinstance(response_json, dict):
-                return ResponseJsons.BuyResponse(
-                    purchased_result=response_json.get("purchasedResult"),
-                    purchased=response_json.get("purchased", False),
-                    pending=response_json.get("pending", False),
-                    error_message=response_json.get("errorMessage")
-                )
-            return None
-
-        # ---------------------------
-        # 6) Resellers (take first)
-        # ---------------------------
-        if "/resellers" in url:
-            try:
-                if isinstance(response_json, list) and len(response_json) > 0:
-                    first = response_json[0]
-                elif isinstance(response_json, dict):
-                    first = response_json
-                else:
-                    return None
-
-                return ResponseJsons.ResaleResponse(
-                    collectible_item_instance_id=str(first.get("collectibleItemInstanceId", first.get("collectible_item_instance_id", ""))),
-                    collectible_product_id=str(first.get("collectibleProductId", first.get("collectible_product_id", ""))),
-                    seller_id=int(first.get("sellerId", first.get("seller_id", 0))),
-                    price=int(first.get("price", first.get("rap", 0)))
-                )
-            except Exception:
-                return None
-
-        # Fallback: return raw structure so callers can inspect it
-        return response_json
-
-
-# ---------------------------------------------------------
-# REQUEST JSON PAYLOAD HANDLER
-# ---------------------------------------------------------
-class RequestJsons:
-
-    @dataclass
-    class WebhookMessage:
-        content: str
-        username: Optional[str] = None
-        embeds: Optional[list] = None
-
-    def jsonify_api_broad(url: str, data):
-        """Correct JSON body based on endpoint"""
-
-        # Items details: expects {"items":[{"itemId": <int>}, ...]}
-        if "/items/details" in url and isinstance(data, list):
-            return {"items": [{"itemId": i.item_id} for i in data]}
-
-        # Purchase resale payload
-        if re.match(r".*/purchase-resale$", url) and isinstance(data, items.BuyData):
-            return {
-                "collectibleItemId": data.collectible_item_id,
-                "collectibleItemInstanceId": data.collectible_item_instance_id,
-                "collectibleProductId": data.collectible_product_id,
-                "expectedPrice": data.expected_price,
-                "expectedPurchaserId": data.expected_purchaser_id,
-                "expectedPurchaserType": data.expected_purchaser_type,
-                "expectedCurrency": data.expected_currency,
-                "expectedSellerId": data.expected_seller_id
-            }
-
-        # Discord webhook
-        if "discord.com/api/webhooks" in url:
-            return {"content": data.content, "username": data.username, "embeds": data.embeds}
-
-        return {}
-
-
-# ---------------------------------------------------------
-# HEADERS / RESPONSE CONTAINERS
-# ---------------------------------------------------------
-@dataclass
-class Headers:
-    x_csrf_token: Optional[str] = ""
-    cookies: Optional[dict] = None
-    raw_headers: Optional[dict] = None
-
-
-@dataclass
-class Response:
-    status_code: int
-    response_headers: Headers
-    response_json: Any
-    response_text: Optional[str] = None
-
-
-# ---------------------------------------------------------
-# MAIN REQUEST CLASS
-# ---------------------------------------------------------
-@dataclass
-class Request:
-    url: str
-    method: str = "get"
-    headers: Optional[Headers] = None
-    json_data: Optional[dict] = None
-    proxy: Optional[str] = None
-    session: Optional[aiohttp.ClientSession] = None
-    close_session: bool = True
-    retries: int = 2
-    success_status_codes: List[int] = (200, 201, 204)
-    otp_token: Optional[str] = None
-    user_id: Optional[str] = None
-
-    async def send(self):
-        """
-        Send request with retries, CSRF refresh and robust JSON fallback parsing.
-        Returns Response where response_json is the validated dataclass OR raw parsed JSON if validation returned None.
-        """
-
-        session_created = False
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-            session_created = True
-
-        last_exc = None
-
-        # helper to create headers dict and add sane defaults
-        def build_headers() -> Dict[str, str]:
-            hdrs: Dict[str, str] = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) SniperGrok/1.0",
-                "Accept": "application/json, text/plain, */*",
-            }
-            if self.headers:
-                if self.headers.raw_headers:
-                    hdrs.update(self.headers.raw_headers)
-                if self.headers.x_csrf_token:
-                    hdrs["x-csrf-token"] = self.headers.x_csrf_token
-                if self.headers.cookies:
-                    hdrs["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.headers.cookies.items())
-            return hdrs
-
-        try:
-            for attempt in range(max(1, self.retries + 1)):
-                hdrs = build_headers()
-                try:
-                    async with self.session.request(self.method.upper(), self.url, headers=hdrs, json=self.json_data, proxy=self.proxy) as resp:
-                        text = await resp.text()
-                        status = resp.status
-
-                        # CSRF handling (Roblox returns 403 with x-csrf-token header)
-                        if status == 403 and resp.headers.get("x-csrf-token"):
-                            token = resp.headers.get("x-csrf-token")
-                            if not self.headers:
-                                self.headers = Headers()
-                            self.headers.x_csrf_token = token
-                            # try again immediately with token
-                            last_exc = errors.Request.Failed(f"Updated x-csrf-token, retrying (attempt {attempt})")
-                            continue
-
-                        # If success status
-                        if status in self.success_status_codes:
-                            # try standard JSON parse
-                            parsed_json = None
-                            try:
-                                parsed_json = await resp.json()
-                            except Exception:
-                                # fallback attempt: load from text
-                                try:
-                                    parsed_json = json.loads(text) if text else None
-                                except Exception:
-                                    parsed_json = None
-
-                            # Validate/normalize JSON for known endpoints
-                            validated = None
-                            try:
-                                validated = ResponseJsons.validate_json(self.url, parsed_json)
-                            except Exception:
-                                validated = None
-
-                            # If validate_json returned None, but parsed_json exists, use it as response_json
-                            final_json = validated if validated is not None else parsed_json
-
-                            # Build response headers data
-                            resp_cookies = {}
-                            try:
-                                # aiohttp resp.cookies is a dict-like
-                                for k, morsel in resp.cookies.items():
-                                    resp_cookies[k] = morsel.value
-                            except Exception:
-                                resp_cookies = None
-
-                            rheaders = Headers(
-                                x_csrf_token=resp.headers.get("x-csrf-token"),
-                                cookies=resp_cookies,
-                                raw_headers=dict(resp.headers)
-                            )
-
-                            return Response(status_code=status, response_headers=rheaders, response_json=final_json, response_text=text)
-
-                        # handle 401 two-step verification style responses
-                        if status == 401:
-                            # try to parse JSON body
-                            parsed_json = None
-                            try:
-                                parsed_json = await resp.json()
-                            except Exception:
-                                try:
-                                    parsed_json = json.loads(text) if text else {}
-                                except Exception:
-                                    parsed_json = {}
-
-                            validated = None
-                            try:
-                                # check for 2fa challenge
-                                validated = ResponseJsons.validate_json(f"{self.url}/challenges/authenticator/verify", parsed_json)
-                            except Exception:
-                                validated = None
-
-                            resp_cookies = {}
-                            try:
-                                for k, morsel in resp.cookies.items():
-                                    resp_cookies[k] = morsel.value
-                            except Exception:
-                                resp_cookies = None
-
-                            rheaders = Headers(x_csrf_token=resp.headers.get("x-csrf-token"), cookies=resp_cookies, raw_headers=dict(resp.headers))
-                            return Response(status_code=status, response_headers=rheaders, response_json=(validated if validated is not None else parsed_json), response_text=text)
-
-                        # other statuses: capture and retry
-                        last_exc = errors.Request.Failed(f"Unexpected status {status}: {text}")
-
-                except Exception as e:
-                    last_exc = e
-                    # small jitter/backoff
-                    await asyncio.sleep(0.2 + (attempt * 0.1))
-
-            # retries exhausted
-        finally:
-            if session_created and self.close_session and self.session:
-                await self.session.close()
-
-        raise errors.Request.Failed(last_exc)
-
+# models/request.py (PATCHED)
+import re
+import json
+import time
+import aiohttp
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Union, Dict, Any, AsyncIterator
+
+import errors
+import metrics
+import profiler
+import transport
+from models import items
+
+# json string literal for the prepared bodies (the C encoder json.dumps uses for str)
+_quote = json.encoder.encode_basestring_ascii
+
+
+# ---------------------------------------------------------
+# RESPONSE OBJECTS
+# ---------------------------------------------------------
+class ResponseJsons:
+
+    @dataclass(slots=True)
+    class ItemDetails:
+        items: List[items.Data]
+
+    @dataclass(slots=True)
+    class CookieInfo:
+        user_id: Any
+        user_name: Any
+        display_name: Any = ""
+
+    @dataclass(slots=True)
+    class BuyResponse:
+        purchased_result: Any = None
+        purchased: bool = False
+        pending: bool = False
+        error_message: Any = None
+
+    @dataclass(slots=True)
+    class ResaleResponse:
+        collectible_item_instance_id: str = ""
+        collectible_product_id: str = ""
+        seller_id: int = 0
+        price: int = 0
+
+    @dataclass(slots=True)
+    class TwoStepVerification:
+        verificationToken: str = ""
+
+    @staticmethod
+    def _details_rows(response_json: Any) -> Optional[list]:
+        rows = response_json.get("data", response_json) if isinstance(response_json, dict) else response_json
+        if not isinstance(rows, list) or not all(isinstance(it, dict) for it in rows):
+            return None
+        return rows
+
+    @staticmethod
+    def parse_catalog_details(response_json: Any) -> Optional["ResponseJsons.ItemDetails"]:
+        """catalog.roblox.com/v1/catalog/items/details: {"data": [{"id", "productId", "collectibleItemId", "lowestResalePrice"}]}"""
+        rows = ResponseJsons._details_rows(response_json)
+        if rows is None:
+            return None
+        try:
+            return ResponseJsons.ItemDetails(items=[items.Data(
+                item_id=int(it["id"]),
+                product_id=int(it.get("productId") or 0),
+                collectible_item_id=str(it.get("collectibleItemId") or ""),
+                lowest_resale_price=int(it.get("lowestResalePrice") or 0)
+            ) for it in rows])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def parse_marketplace_details(response_json: Any) -> Optional["ResponseJsons.ItemDetails"]:
+        """apis.roblox.com/marketplace-items/v1/items/details: [{"itemTargetId", "collectibleItemId", "lowestResalePrice"}]"""
+        rows = ResponseJsons._details_rows(response_json)
+        if rows is None:
+            return None
+        try:
+            return ResponseJsons.ItemDetails(items=[items.Data(
+                item_id=int(it.get("itemTargetId") or it["itemId"]),
+                # collectibleProductId is a uuid here, the buy takes it from the resale listing
+                product_id=0,
+                collectible_item_id=str(it.get("collectibleItemId") or ""),
+                lowest_resale_price=int(it.get("lowestResalePrice") or (it.get("offer") or {}).get("price") or 0)
+            ) for it in rows])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    @profiler.timed("validate_json")
+    def validate_json(url, response_json: Any):
+        """
+        Detect JSON based on endpoint patterns and normalize it.
+        Returns: dataclass (ItemDetails/CookieInfo/ResaleResponse/BuyResponse) or a raw dict/list/int
+        """
+
+        if response_json is None:
+            return None
+
+        # ---------------------------
+        # 1) ROLIMONS DEALACTIVITY: return raw dict so callers can .get("activities")
+        # ---------------------------
+        if "rolimons.com/market/v1/dealactivity" in url or "api.rolimons.com/market/v1/dealactivity" in url:
+            if isinstance(response_json, dict) and "activities" in response_json:
+                return response_json
+
+        # ---------------------------
+        # 2) ROBLOX CURRENCY endpoint (robux)
+        # ---------------------------
+        if re.search(r"/v1/users/\d+/currency$", url) or "/currency" in url and isinstance(response_json, dict):
+            # return raw dict so caller can check .get("robux")
+            return response_json
+
+        # ---------------------------
+        # 3) Items details endpoint
+        # ---------------------------
+        if "/items/details" in url:
+            if "marketplace-items" in url:
+                return ResponseJsons.parse_marketplace_details(response_json)
+            return ResponseJsons.parse_catalog_details(response_json)
+
+        # ---------------------------
+        # 4) Authenticated user info
+        # ---------------------------
+        if "/users/authenticated" in url:
+            if isinstance(response_json, dict):
+                return ResponseJsons.CookieInfo(
+                    user_id=response_json.get("id"),
+                    user_name=response_json.get("name"),
+                    display_name=response_json.get("displayName", "")
+                )
+            return None
+
+        # ---------------------------
+        # 5) Purchase resale response
+        # ---------------------------
+        if re.match(r".*/purchase-resale$", url):
+            if isinstance(response_json, dict):
+                return ResponseJsons.BuyResponse(
+                    purchased_result=response_json.get("purchasedResult"),
+                    purchased=response_json.get("purchased", False),
+                    pending=response_json.get("pending", False),
+                    error_message=response_json.get("errorMessage")
+                )
+            return None
+
+        # ---------------------------
+        # 6) Resellers (take first)
+        # ---------------------------
+        if "/resellers" in url:
+            try:
+                if isinstance(response_json, list) and len(response_json) > 0:
+                    first = response_json[0]
+                elif isinstance(response_json, dict):
+                    first = response_json
+                else:
+                    return None
+
+                return ResponseJsons.ResaleResponse(
+                    collectible_item_instance_id=str(first.get("collectibleItemInstanceId", first.get("collectible_item_instance_id", ""))),
+                    collectible_product_id=str(first.get("collectibleProductId", first.get("collectible_product_id", ""))),
+                    seller_id=int(first.get("sellerId", first.get("seller_id", 0))),
+                    price=int(first.get("price", first.get("rap", 0)))
+                )
+            except Exception:
+                return None
+
+        # ---------------------------
+        # 7) Two step verification
+        # ---------------------------
+        if "/challenges/authenticator/verify" in url:
+            if isinstance(response_json, dict) and response_json.get("verificationToken"):
+                return ResponseJsons.TwoStepVerification(verificationToken=response_json["verificationToken"])
+            return None
+
+        # Fallback: return raw structure so callers can inspect it
+        return response_json
+
+
+# ---------------------------------------------------------
+# REQUEST JSON PAYLOAD HANDLER
+# ---------------------------------------------------------
+class RequestJsons:
+
+    @dataclass
+    class WebhookMessage:
+        content: str
+        username: Optional[str] = None
+        embeds: Optional[list] = None
+
+    def jsonify_api_broad(url: str, data):
+        """Correct JSON body based on endpoint"""
+
+        # Items details: expects {"items":[{"itemId": <int>}, ...]}
+        if "/items/details" in url and isinstance(data, list):
+            return {"items": [{"itemId": i.item_id} for i in data]}
+
+        # Purchase resale payload
+        if re.match(r".*/purchase-resale$", url) and isinstance(data, items.BuyData):
+            return {
+                "collectibleItemId": data.collectible_item_id,
+                "collectibleItemInstanceId": data.collectible_item_instance_id,
+                "collectibleProductId": data.collectible_product_id,
+                "expectedPrice": data.expected_price,
+                "expectedPurchaserId": data.expected_purchaser_id,
+                "expectedPurchaserType": data.expected_purchaser_type,
+                "expectedCurrency": data.expected_currency,
+                "expectedSellerId": data.expected_seller_id,
+                "idempotencyKey": data.idempotency_key
+            }
+
+        # Discord webhook
+        if "discord.com/api/webhooks" in url:
+            return {"content": data.content, "username": data.username, "embeds": data.embeds}
+
+        return {}
+
+
+# ---------------------------------------------------------
+# HEADERS / RESPONSE CONTAINERS
+# ---------------------------------------------------------
+@dataclass(slots=True)
+class Headers:
+    x_csrf_token: Optional[str] = ""
+    cookies: Optional[dict] = None
+    raw_headers: Optional[dict] = None
+
+
+class Response:
+    """
+    Lean response container. Only the status and the validated json are materialized up front;
+    the transport's header mapping and cookies are kept by reference and only turned into a
+    Headers object when response_headers is read. response_text is None unless the request
+    was sent with keep_text=True; body is the undecoded bytes, only set (instead of
+    response_json) when it was sent with decode=False.
+    """
+    __slots__ = ("status_code", "response_json", "response_text", "body", "_raw_headers", "_raw_cookies", "_headers")
+
+    def __init__(self, status_code: int, response_json: Any, raw_headers: Any = None, raw_cookies: Any = None, response_text: Optional[str] = None,
+                 body: Optional[bytes] = None):
+        self.status_code = status_code
+        self.response_json = response_json
+        self.response_text = response_text
+        self.body = body
+        self._raw_headers = raw_headers
+        self._raw_cookies = raw_cookies
+        self._headers: Optional[Headers] = None
+
+    def header(self, name: str, default: Any = None) -> Any:
+        """Single header lookup without building the Headers container"""
+        if self._raw_headers is None:
+            return default
+        return self._raw_headers.get(name, default)
+
+    @property
+    def response_headers(self) -> Headers:
+        if self._headers is None:
+            cookies = {}
+            try:
+                # aiohttp resp.cookies is a SimpleCookie of morsels, httpx has plain values
+                for k, morsel in (self._raw_cookies or {}).items():
+                    cookies[k] = getattr(morsel, "value", morsel)
+            except Exception:
+                cookies = None
+            self._headers = Headers(
+                x_csrf_token=self.header("x-csrf-token"),
+                cookies=cookies,
+                raw_headers=self._raw_headers
+            )
+        return self._headers
+
+
+# ---------------------------------------------------------
+# DEADLINES
+# ---------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class Deadline:
+    """
+    Time budget for one Request.send. total covers every attempt, CSRF refresh and backoff sleep;
+    connect and read cap the individual phases of each attempt.
+    """
+    total: float
+    connect: Optional[float] = None
+    read: Optional[float] = None
+
+    def capped(self, total: float) -> "Deadline":
+        """The same phases with at most `total` seconds overall, for sub-requests inside another send's budget"""
+        return self if total >= self.total else Deadline(total=max(total, 0.0), connect=self.connect, read=self.read)
+
+    def timeout(self, remaining: float) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=remaining,
+            connect=min(self.connect, remaining) if self.connect else None,
+            sock_read=min(self.read, remaining) if self.read else None
+        )
+
+
+# buy path: resale verification + purchase, fail fast and go back to polling
+BUY_DEADLINE = Deadline(total=4.0, connect=1.5, read=2.5)
+# default for batch polls and anything that doesn't pass its own deadline
+POLL_DEADLINE = Deadline(total=8.0, connect=3.0, read=5.0)
+# rolimons refresh, account monitor and other background work
+BACKGROUND_DEADLINE = Deadline(total=60.0, connect=10.0, read=30.0)
+
+
+# scheme://host prefix -> replacement prefix. Empty in production; soak / fault runs point the
+# Roblox and Rolimons hosts at a local stand-in server with it. Responses are still validated
+# against the original url.
+ROUTES: Dict[str, str] = {}
+
+
+def route(url: str) -> str:
+    for prefix, target in ROUTES.items():
+        if url.startswith(prefix):
+            return target + url[len(prefix):]
+    return url
+
+
+# ---------------------------------------------------------
+# PREPARED REQUESTS
+# ---------------------------------------------------------
+DEFAULT_HEADERS: Dict[str, str] = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) SniperGrok/1.0",
+    "Accept": "application/json, text/plain, */*",
+}
+
+
+class HeaderTemplate:
+    """
+    Headers for one account on one endpoint, built once. Only the csrf token changes between sends,
+    so the dict is rebuilt when the token does and handed out as is otherwise. Callers must not mutate it.
+    """
+    __slots__ = ("base", "_token", "_headers")
+
+    def __init__(self, cookies: Optional[Dict[str, str]] = None, extra: Optional[Dict[str, str]] = None):
+        base = dict(DEFAULT_HEADERS)
+        if extra:
+            base.update(extra)
+        if cookies:
+            base["Cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+        self.base = base
+        self._token: Optional[str] = None
+        self._headers = base
+
+    def headers(self, x_csrf_token: Optional[str]) -> Dict[str, str]:
+        if x_csrf_token != self._token:
+            self._headers = {**self.base, "x-csrf-token": x_csrf_token} if x_csrf_token else self.base
+            self._token = x_csrf_token
+        return self._headers
+
+
+class PurchaseTemplate:
+    """
+    purchase-resale for one account. The headers are frozen and the body is serialized once around
+    the fields that change per listing (item, instance, product, price, seller, idempotency key), so
+    body() is a single %-format. Produces the same bytes json.dumps(jsonify_api_broad(url, buy_data)) does.
+    """
+    __slots__ = ("cookies", "purchaser_id", "headers", "_body")
+
+    URL = "https://apis.roblox.com/marketplace-sales/v1/item/%s/purchase-resale"
+
+    def __init__(self, cookie: str, purchaser_id: Any, purchaser_type: str = "User", currency: int = 1):
+        self.cookies = {".ROBLOSECURITY": cookie}
+        self.purchaser_id = str(purchaser_id)
+        self.headers = HeaderTemplate(self.cookies, {"Content-Type": "application/json"})
+        fixed = (
+            f'"expectedPurchaserId": {json.dumps(self.purchaser_id)}, "expectedPurchaserType": {json.dumps(purchaser_type)}, '
+            f'"expectedCurrency": {int(currency)}, '
+        ).replace("%", "%%")
+        self._body = (
+            '{"collectibleItemId": %s, "collectibleItemInstanceId": %s, "collectibleProductId": %s, "expectedPrice": %d, '
+            + fixed + '"expectedSellerId": %d, "idempotencyKey": %s}'
+        )
+
+    def body(self, buy: items.BuyData) -> bytes:
+        return (self._body % (
+            _quote(buy.collectible_item_id), _quote(buy.collectible_item_instance_id), _quote(buy.collectible_product_id),
+            buy.expected_price, buy.expected_seller_id, _quote(buy.idempotency_key)
+        )).encode()
+
+    def request(self, buy: items.BuyData, x_csrf_token: Optional[str], proxy: Optional[str] = None, challenge_solver: Optional[Any] = None) -> "Request":
+        return Request(
+            url=self.URL % buy.collectible_item_id,
+            method="post",
+            # still carried for the csrf refresh and the challenge solver's own requests
+            headers=Headers(x_csrf_token=x_csrf_token, cookies=self.cookies),
+            template=self.headers,
+            body=self.body(buy),
+            proxy=proxy,
+            user_id=self.purchaser_id,
+            keep_text=True,
+            deadline=BUY_DEADLINE,
+            challenge_solver=challenge_solver,
+        )
+
+
+# ---------------------------------------------------------
+# MAIN REQUEST CLASS
+# ---------------------------------------------------------
+@dataclass
+class Request:
+    url: str
+    method: str = "get"
+    headers: Optional[Headers] = None
+    json_data: Optional[dict] = None
+    proxy: Optional[str] = None
+    # only used by the aiohttp transport
+    session: Optional[aiohttp.ClientSession] = None
+    close_session: bool = True
+    retries: int = 2
+    success_status_codes: List[int] = (200, 201, 204)
+    otp_token: Optional[str] = None
+    user_id: Optional[str] = None
+    keep_text: bool = False
+    deadline: Optional[Deadline] = None
+    # object with async solve(request, challenge_id, challenge_type, challenge_metadata, remaining) -> replay headers
+    # (authenticator.AutoPass); only set for requests made as our own account
+    challenge_solver: Optional[Any] = None
+    # status of the last response received by send(), also set when send() raises
+    last_status: Optional[int] = None
+    # prepared headers (cookie + defaults built once), used instead of rebuilding them from `headers` per attempt
+    template: Optional[HeaderTemplate] = None
+    # pre-serialized body, sent instead of json_data
+    body: Optional[bytes] = None
+    # False: a success response keeps its raw body and skips json parsing + validation (the caller decodes it)
+    decode: bool = True
+
+    # helper to create headers dict and add sane defaults
+    def build_headers(self) -> Dict[str, str]:
+        if self.template is not None:
+            if not self.headers:
+                return self.template.headers(None)
+            hdrs = self.template.headers(self.headers.x_csrf_token)
+            # challenge replay headers are the only per request additions
+            return {**hdrs, **self.headers.raw_headers} if self.headers.raw_headers else hdrs
+        hdrs: Dict[str, str] = dict(DEFAULT_HEADERS)
+        if self.headers:
+            if self.headers.raw_headers:
+                hdrs.update(self.headers.raw_headers)
+            if self.headers.x_csrf_token:
+                hdrs["x-csrf-token"] = self.headers.x_csrf_token
+            if self.headers.cookies:
+                hdrs["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.headers.cookies.items())
+        return hdrs
+
+    async def stream(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """
+        Send the request once and yield the body in chunks instead of buffering it.
+        No retries, CSRF refresh or json handling; a non-success status raises errors.Request.InvalidStatus.
+        """
+
+        backend = transport.active
+        client, owned = backend.client(self)
+
+        deadline = self.deadline or POLL_DEADLINE
+        try:
+            async with client.request(self.method.upper(), route(self.url) if ROUTES else self.url, headers=self.build_headers(), json=self.json_data, data=self.body, proxy=self.proxy, timeout=deadline.timeout(deadline.total)) as resp:
+                if resp.status not in self.success_status_codes:
+                    raise errors.Request.InvalidStatus(f"Unexpected status {resp.status} for {self.url}")
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    yield chunk
+        except asyncio.TimeoutError:
+            metrics.registry.inc("request_timeouts", metrics.endpoint(self.url))
+            raise errors.Request.Timeout(f"Deadline of {deadline.total}s exceeded for {self.url}")
+        finally:
+            await backend.release(self, client, owned)
+
+    async def send(self):
+        """
+        Send request with retries, CSRF refresh and robust JSON fallback parsing.
+        Returns Response where response_json is the validated dataclass OR raw parsed JSON if validation returned None.
+        The body is read once as bytes; it is only decoded to response_text when keep_text is set.
+        Sent over transport.active (aiohttp unless the config picks another backend).
+        All attempts and backoff sleeps share one Deadline (POLL_DEADLINE unless set); once it is spent
+        errors.Request.Timeout is raised instead of retrying further.
+        Other 4xx statuses (not 401/403 handled above, 408, 429) fail without a retry; 429 waits for Retry-After
+        when that still fits in the deadline.
+        """
+
+        backend = transport.active
+        client, owned = backend.client(self)
+
+        last_exc = None
+        challenge_solved = False
+        deadline = self.deadline or POLL_DEADLINE
+        expires_at = time.monotonic() + deadline.total
+
+        target = route(self.url) if ROUTES else self.url
+
+        def parse_body(body: bytes) -> Any:
+            try:
+                return json.loads(body) if body else None
+            except Exception:
+                return None
+
+        attempts = max(1, self.retries + 1)
+        try:
+            # one pass more than the retries allow: the replay after a solved challenge doesn't count as one
+            for attempt in range(attempts + 1):
+                if attempt == attempts and not challenge_solved:
+                    break
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                hdrs = self.build_headers()
+                retry_after = None
+                try:
+                    async with client.request(self.method.upper(), target, headers=hdrs, json=self.json_data, data=self.body, proxy=self.proxy, timeout=deadline.timeout(remaining)) as resp:
+                        body = await resp.read()
+                        status = resp.status
+                        self.last_status = status
+
+                        # two step verification challenge: solve it once and replay with the challenge headers
+                        challenge_id = resp.headers.get("rblx-challenge-id") if status in (401, 403) else None
+                        if challenge_id and self.challenge_solver and not challenge_solved:
+                            challenge_solved = True
+                            t0 = time.perf_counter()
+                            replay_headers = await self.challenge_solver.solve(
+                                self,
+                                challenge_id,
+                                resp.headers.get("rblx-challenge-type", ""),
+                                resp.headers.get("rblx-challenge-metadata", ""),
+                                # the solve's own requests share this send's deadline
+                                remaining=expires_at - time.monotonic()
+                            )
+                            metrics.registry.observe("challenge", "solve", time.perf_counter() - t0)
+                            if not self.headers:
+                                self.headers = Headers()
+                            self.headers.raw_headers = {**(self.headers.raw_headers or {}), **replay_headers}
+                            last_exc = errors.Request.Failed(f"Solved challenge {challenge_id}, replaying (attempt {attempt})")
+                            continue
+
+                        # CSRF handling (Roblox returns 403 with x-csrf-token header)
+                        # (unless a 403 is what the caller asked for, e.g. the logout call that mints the token)
+                        if status == 403 and status not in self.success_status_codes and resp.headers.get("x-csrf-token"):
+                            token = resp.headers.get("x-csrf-token")
+                            if not self.headers:
+                                self.headers = Headers()
+                            self.headers.x_csrf_token = token
+                            # try again immediately with token
+                            last_exc = errors.Request.Failed(f"Updated x-csrf-token, retrying (attempt {attempt})")
+                            continue
+
+                        # If success status
+                        if status in self.success_status_codes and not self.decode:
+                            return Response(status_code=status, response_json=None, raw_headers=resp.headers, raw_cookies=resp.cookies, body=body)
+
+                        if status in self.success_status_codes:
+                            parsed_json = parse_body(body)
+
+                            # Validate/normalize JSON for known endpoints
+                            validated = None
+                            try:
+                                validated = ResponseJsons.validate_json(self.url, parsed_json)
+                            except Exception:
+                                validated = None
+
+                            # If validate_json returned None, but parsed_json exists, use it as response_json
+                            final_json = validated if validated is not None else parsed_json
+
+                            # headers/cookies are kept by reference and only parsed on access
+                            return Response(
+                                status_code=status,
+                                response_json=final_json,
+                                raw_headers=resp.headers,
+                                raw_cookies=resp.cookies,
+                                response_text=body.decode("utf-8", "replace") if self.keep_text else None
+                            )
+
+                        # handle 401 two-step verification style responses
+                        if status == 401:
+                            parsed_json = parse_body(body) or {}
+
+                            validated = None
+                            try:
+                                # check for 2fa challenge
+                                validated = ResponseJsons.validate_json(f"{self.url}/challenges/authenticator/verify", parsed_json)
+                            except Exception:
+                                validated = None
+
+                            return Response(
+                                status_code=status,
+                                response_json=(validated if validated is not None else parsed_json),
+                                raw_headers=resp.headers,
+                                raw_cookies=resp.cookies,
+                                response_text=body.decode("utf-8", "replace") if self.keep_text else None
+                            )
+
+                        # other statuses: a client error won't change on retry, everything else is retried after the backoff
+                        message = f"Unexpected status {status}: {body[:200].decode('utf-8', 'replace')}"
+                        if 400 <= status < 500 and status not in (408, 429):
+                            last_exc = errors.Request.InvalidStatus(message)
+                            break
+                        if status == 429:
+                            retry_after = resp.headers.get("Retry-After")
+                        raise errors.Request.InvalidStatus(message)
+
+                except asyncio.TimeoutError:
+                    metrics.registry.inc("request_timeouts", metrics.endpoint(self.url))
+                    last_exc = errors.Request.Timeout(f"Timed out on attempt {attempt} for {self.url}")
+                except Exception as e:
+                    last_exc = e
+                    # small jitter/backoff (or the server's Retry-After), only if it still fits in the deadline
+                    backoff = 0.2 + (attempt * 0.1)
+                    if retry_after:
+                        try:
+                            backoff = max(backoff, float(retry_after))
+                        except ValueError:
+                            pass
+                    if time.monotonic() + backoff >= expires_at:
+                        break
+                    await asyncio.sleep(backoff)
+
+            # retries exhausted or deadline spent
+            if time.monotonic() >= expires_at and not isinstance(last_exc, errors.Request.Timeout):
+                metrics.registry.inc("deadline_exhausted", metrics.endpoint(self.url))
+                last_exc = errors.Request.Timeout(f"Deadline of {deadline.total}s exceeded for {self.url}: {last_exc}")
+        finally:
+            await backend.release(self, client, owned)
+
+        # Timeout is a Failed subclass: raised as is so callers can tell a spent deadline from a bad response
+        if isinstance(last_exc, errors.Request.Timeout):
+            raise last_exc
+        raise errors.Request.Failed(last_exc)
+
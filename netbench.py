@@ -0,0 +1,128 @@
+# netbench.py
+"""
+Transport comparison against the local MockServer.
+
+    python netbench.py                              # every backend installed here
+    python netbench.py -t aiohttp,http2             # only these
+    python netbench.py -n 5000 -c 64                # 5000 requests, 64 in flight
+
+Per backend it sends the same mix the sniper does (catalog batch, resellers check, prepared
+purchase) through Request.send, --concurrency at a time, and reports throughput, latency
+percentiles, failures and how many connections the server saw. The aiohttp backend opens one
+per request; the pooled backends should stay near their pool size.
+
+The stand-in server is plain HTTP/1.1 without TLS, so http2 runs as pooled HTTP/1.1 here (the
+"proto" column shows what was negotiated). Multiplexing itself only shows against a TLS endpoint
+that offers h2, e.g. the real apis.roblox.com.
+"""
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+from typing import Any, Callable, Dict, List
+
+import faults
+import metrics
+import transport
+from mockserver import MockServer
+from models import request
+
+BACKENDS = ("aiohttp", "httpx", "http2")
+
+
+def mix(server: MockServer) -> List[Callable[[], request.Request]]:
+    return [
+        lambda: faults.details_request(server),
+        lambda: faults.resale_request(server),
+        lambda: faults.prepared_purchase_request(server, token=server.csrf_token),
+    ]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def load(server: MockServer, total: int, concurrency: int) -> Dict[str, Any]:
+    builders = mix(server)
+    latencies: List[float] = []
+    failed = 0
+    queue = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal failed
+        for i in queue:
+            req = builders[i % len(builders)]()
+            t0 = time.perf_counter()
+            try:
+                resp = await req.send()
+                if resp.status_code not in req.success_status_codes:
+                    failed += 1
+            except Exception:
+                failed += 1
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "rps": total / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+        "failed": failed,
+    }
+
+
+def protocols() -> str:
+    seen = sorted(label for (name, label), count in metrics.registry.counters.items() if name == "http_version" and count)
+    return ",".join(seen) or "HTTP/1.1"
+
+
+async def run(args) -> int:
+    # the aiohttp backend closes a session per request, the server logs the dropped keep-alives
+    logging.getLogger("aiohttp.server").setLevel(logging.CRITICAL)
+    server = MockServer(item_count=200)
+    await server.start()
+    server.install_routes()
+    failures = 0
+    try:
+        print(f"{'transport':<10} {'proto':>9} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'conns':>6} {'failed':>6}")
+        for name in args.t.split(","):
+            missing = transport.available(name)
+            if missing:
+                print(f"{name:<10} skipped: {missing}")
+                continue
+            await transport.use(name)
+            try:
+                await load(server, args.warmup, args.concurrency)
+                server.clear()
+                for key in [k for k in metrics.registry.counters if k[0] == "http_version"]:
+                    del metrics.registry.counters[key]
+                r = await load(server, args.n, args.concurrency)
+            finally:
+                await transport.use("aiohttp")
+            failures += r["failed"]
+            print(f"{name:<10} {protocols():>9} {r['rps']:>8.0f} {r['p50'] * 1000:>8.2f} {r['p90'] * 1000:>8.2f} {r['p99'] * 1000:>8.2f} "
+                  f"{r['max'] * 1000:>8.2f} {len(server.connections):>6} {r['failed']:>6}")
+    finally:
+        server.remove_routes()
+        await server.stop()
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", default=",".join(BACKENDS), help="comma separated backends to compare")
+    parser.add_argument("-n", type=int, default=3000, help="requests per backend")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument("--warmup", type=int, default=100, help="requests per backend before measuring")
+    return asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
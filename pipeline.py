@@ -0,0 +1,134 @@
+# pipeline.py
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import metrics
+from eventlog import log
+
+
+class Stage:
+    """
+    One step of a Pipeline: `concurrency` tasks take work from a bounded queue, run `fn` on it and
+    hand every result to the next stage. When the next queue is full the tasks wait, so a slow
+    stage holds back the ones before it instead of letting work pile up.
+    fn returns an iterable of results (empty or None to drop the work).
+    """
+    __slots__ = ("name", "label", "fn", "concurrency", "queue", "next", "busy", "done", "failed", "_busy_time", "_since")
+
+    def __init__(self, name: str, fn: Callable[[Any], Awaitable[Optional[Iterable[Any]]]], concurrency: int = 1, maxsize: int = 8):
+        self.name = name
+        self.label = name
+        self.fn = fn
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.next: Optional["Stage"] = None
+        # tasks currently inside fn
+        self.busy = 0
+        self.done = 0
+        self.failed = 0
+        # seconds spent inside fn by all tasks since _since, for utilization
+        self._busy_time = 0.0
+        self._since = time.monotonic()
+
+    async def put(self, work: Any) -> None:
+        await self.queue.put((time.perf_counter(), work))
+
+    async def _work(self) -> None:
+        registry = metrics.registry
+        while True:
+            queued_at, work = await self.queue.get()
+            t0 = time.perf_counter()
+            registry.observe("stage_wait", self.label, t0 - queued_at)
+            self.busy += 1
+            try:
+                results = await self.fn(work)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                registry.inc("stage_errors", self.label)
+                log.error("Stage {stage} faalde: {error}", stage=self.label, error=str(e))
+                results = None
+            finally:
+                self.busy -= 1
+                t1 = time.perf_counter()
+                self._busy_time += t1 - t0
+                registry.observe("stage_run", self.label, t1 - t0)
+                self.queue.task_done()
+            self.done += 1
+            if results and self.next is not None:
+                for result in results:
+                    # blocks while the next stage is full: the backpressure
+                    await self.next.put(result)
+
+    def status(self, now: float) -> Dict[str, Any]:
+        elapsed = now - self._since
+        utilization = self._busy_time / (elapsed * self.concurrency) if elapsed > 0 else 0.0
+        self._busy_time = 0.0
+        self._since = now
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "busy": self.busy,
+            "concurrency": self.concurrency,
+            "done": self.done,
+            "failed": self.failed,
+            "utilization": round(utilization, 3),
+        }
+
+
+class Pipeline:
+    """
+    Stages chained in order (a stage that already has a `next` keeps it, for side entries that
+    join further down), fed by a `source` coroutine that puts work into them.
+    Per stage it reports queue depth and utilization (metrics `stage_queue` / `stage_utilization`,
+    timings `stage_wait` / `stage_run`); the first stage that sits full with busy workers is the bottleneck.
+    """
+
+    def __init__(self, name: str, stages: List[Stage], report_interval: float = 10.0):
+        self.name = name
+        self.stages = stages
+        self.report_interval = report_interval
+        # stage name -> status as of the last report
+        self.last: Dict[str, Dict[str, Any]] = {}
+        for stage, following in zip(stages, stages[1:]):
+            if stage.next is None:
+                stage.next = following
+        for stage in stages:
+            stage.label = f"{name}:{stage.name}"
+        self.by_name = {stage.name: stage for stage in stages}
+
+    def __getitem__(self, name: str) -> Stage:
+        return self.by_name[name]
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        registry = metrics.registry
+        out = {}
+        for stage in self.stages:
+            status = stage.status(now)
+            registry.set("stage_queue", stage.label, status["queued"])
+            registry.set("stage_utilization", stage.label, status["utilization"])
+            out[stage.name] = status
+        self.last = out
+        return out
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
+
+    async def run(self, source: Callable[["Pipeline"], Awaitable[None]]) -> None:
+        """Run every stage and `source` until the source returns or raises (or the caller is cancelled)"""
+        tasks = [
+            asyncio.create_task(stage._work(), name=f"{stage.label}#{i}")
+            for stage in self.stages for i in range(stage.concurrency)
+        ]
+        tasks.append(asyncio.create_task(self._report_loop(), name=f"{self.name}:report"))
+        try:
+            await source(self)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
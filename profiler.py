@@ -0,0 +1,156 @@
+# profiler.py
+import os
+import sys
+import time
+import signal
+import pstats
+import asyncio
+import cProfile
+import functools
+import threading
+from pathlib import Path
+from collections import Counter
+from typing import Optional, Dict, Callable
+
+import metrics
+
+PROFILE_DIR = Path(__file__).parent / "profiles"
+
+
+# ---------------------------------------------------------
+# ALWAYS-ON HOT PATH TIMERS
+# ---------------------------------------------------------
+def timed(name: str) -> Callable:
+    """
+    Record every call of the wrapped function in metrics.registry under ("hot_path", name).
+    Costs two perf_counter calls and a dict update per call. For coroutines this is wall time
+    between entering and returning, so awaited network time is included.
+    """
+    observe = metrics.registry.observe
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe("hot_path", name, time.perf_counter() - t0)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe("hot_path", name, time.perf_counter() - t0)
+        return wrapper
+
+    return decorator
+
+
+def hot_path_report() -> Dict[str, Dict[str, float]]:
+    return {
+        label: {"calls": c, "total_ms": round(t * 1000, 2), "avg_us": round(t / c * 1e6, 1), "max_ms": round(m * 1000, 2)}
+        for (name, label), (c, t, m) in metrics.registry.timings.items()
+        if name == "hot_path"
+    }
+
+
+async def watch_loop_lag(interval: float = 0.05) -> None:
+    """
+    Sleep `interval` over and over and record how late each wake up is, as ("loop_lag", "")
+    timings. Anything that holds the loop (parsing, rendering, a slow callback) shows up here.
+    """
+    observe = metrics.registry.observe
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        observe("loop_lag", "", max(0.0, time.perf_counter() - t0 - interval))
+
+
+# ---------------------------------------------------------
+# ON-DEMAND CAPTURE
+# ---------------------------------------------------------
+class _StackSampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval and counts collapsed stacks"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if parts:
+                self.stacks[";".join(reversed(parts))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+_capture_lock = asyncio.Lock()
+# signal-triggered captures, kept referenced until they finish
+_pending = set()
+
+
+async def capture(seconds: float = 10.0, interval: float = 0.005, out_dir: Path = PROFILE_DIR) -> Optional[Dict[str, str]]:
+    """
+    Profile the event loop thread for `seconds` with both cProfile and a stack sampler.
+    Writes <stamp>.pstats and <stamp>.collapsed (flamegraph.pl / speedscope input) to out_dir.
+    Returns the written paths, or None if a capture is already running.
+    """
+    if _capture_lock.locked():
+        return None
+    async with _capture_lock:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+
+        sampler = _StackSampler(threading.get_ident(), interval)
+        prof = cProfile.Profile()
+        sampler.start()
+        prof.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            prof.disable()
+            sampler.stop()
+
+        pstats_path = out_dir / f"{stamp}.pstats"
+        collapsed_path = out_dir / f"{stamp}.collapsed"
+        pstats.Stats(prof).dump_stats(str(pstats_path))
+        with open(collapsed_path, "w") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        metrics.registry.inc("profiles_captured")
+        return {"pstats": str(pstats_path), "collapsed": str(collapsed_path)}
+
+
+def install_signal_handler(seconds: float = 10.0, sig: Optional[int] = getattr(signal, "SIGUSR1", None)) -> bool:
+    """Capture a profile whenever the process receives SIGUSR1 (unix only). Call from inside the running loop."""
+    if sig is None:
+        return False
+    loop = asyncio.get_running_loop()
+
+    def on_signal():
+        task = loop.create_task(capture(seconds))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+
+    try:
+        loop.add_signal_handler(sig, on_signal)
+    except (NotImplementedError, RuntimeError):
+        return False
+    return True
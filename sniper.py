@@ -1,384 +1,838 @@
-# sniper.py (MEGA upgrade)
-from models import items, config, request
-from typing import Union, Tuple, Optional, List, Dict, Any
-import errors
-import helpers
-import asyncio
-import time
-import json
-
-class BuyLimited:
-    def __init__(self, user_data: config.Account, buy_data: items.BuyData, ui_manager: helpers.UIManager) -> None:
-        self.user_data = user_data
-        self.buy_data = buy_data
-        self.ui_manager = ui_manager
-
-    async def __call__(self) -> Union[bool, Tuple[bool, Any]]:
-        url = f"https://apis.roblox.com/marketplace-sales/v1/item/{self.buy_data.collectible_item_id}/purchase-resale"
-        await self.ui_manager.log_event(f"Buy attempt for item {self.buy_data.collectible_item_id} expected {self.buy_data.expected_price} R$")
-        t0 = time.perf_counter()
-        try:
-            resp = await request.Request(
-                url=url,
-                method="post",
-                headers=request.Headers(
-                    x_csrf_token=await self.user_data.x_csrf_token(),
-                    cookies={".ROBLOSECURITY": self.user_data.cookie}
-                ),
-                json_data=request.RequestJsons.jsonify_api_broad(url, self.buy_data),
-                close_session=False,
-                user_id=self.user_data.user_id
-            ).send()
-        except Exception as e:
-            await self.ui_manager.log_event(f"Buy request failed (network): {e}", level="ERROR")
-            await self.ui_manager.add_failed_buy(1)
-            return False
-
-        latency_ms = int((time.perf_counter() - t0) * 1000)
-        await self.ui_manager.log_event(f"Buy request latency: {latency_ms} ms")
-        await self.ui_manager.add_requests(1)
-
-        if resp and resp.response_json and getattr(resp.response_json, "purchased", False):
-            await self.ui_manager.log_event(f"GEKOCHT! Item {self.buy_data.collectible_item_id} voor {self.buy_data.expected_price} R$")
-            await self.ui_manager.add_items_bought(1)
-            return True, resp.response_json
-        else:
-            # try to extract error message
-            err = None
-            if resp and resp.response_json:
-                if isinstance(resp.response_json, dict):
-                    err = resp.response_json.get("errorMessage") or resp.response_json.get("error_message")
-                else:
-                    err = getattr(resp.response_json, "error_message", None)
-            if not err and resp:
-                err = (resp.response_text[:200] + "...") if resp.response_text else "Unknown"
-            await self.ui_manager.log_event(f"Niet gekocht: {err}", level="WARN")
-            await self.ui_manager.add_failed_buy(1)
-            return False, resp.response_json if resp else None
-
-class WatchLimiteds:
-    def __init__(self, config: config.Settings, rolimon_limiteds: helpers.RolimonsDataScraper, robux: str) -> None:
-        self.webhook = config.webhook
-        self.account = config.account
-        self.generic_settings = config.buy_settings.generic_settings or {}
-        self.custom_settings = config.buy_settings.custom_settings or {}
-        self.limiteds = config.limiteds
-        self.rolimon_limiteds = rolimon_limiteds
-        self.proxies = config.proxies or []
-        self.ui_manager = helpers.UIManager(total_proxies = len(self.proxies), username = getattr(config.account, "user_name", ""), robux = robux)
-        self.deal_mode = len(self.limiteds) == 0
-
-        # new: min percent filter from generic settings or top-level config
-        self.deal_filter_min_percentage = None
-        # try from generic settings dict
-        if isinstance(self.generic_settings, dict):
-            self.deal_filter_min_percentage = self.generic_settings.get("deal_filter_min_percentage")
-        # fallback if exists as attribute on config
-        if getattr(config, "deal_filter_min_percentage", None):
-            self.deal_filter_min_percentage = config.deal_filter_min_percentage
-
-    async def __call__(self):
-        # background account monitor
-        acct_monitor = asyncio.create_task(self._account_monitor_loop())
-        # start threads
-        threads = [
-            ProxyThread(self, proxy).watch()
-            for proxy in (self.proxies if self.proxies else [None])
-        ]
-        # run UI + threads
-        await asyncio.gather(*threads, helpers.run_ui(ui_manager = self.ui_manager), return_exceptions=True)
-        acct_monitor.cancel()
-
-    async def _account_monitor_loop(self):
-        while True:
-            try:
-                if not getattr(self.account, "user_id", None) or not getattr(self.account, "user_name", None):
-                    await self.account.populate_from_api()
-                    if getattr(self.account, "user_name", None):
-                        await self.ui_manager.log_event(f"Ingelogd als: {self.account.user_name}")
-
-                # fetch robux
-                if getattr(self.account, "user_id", None):
-                    url = f"https://economy.roblox.com/v1/users/{self.account.user_id}/currency"
-                    t0 = time.perf_counter()
-                    try:
-                        resp = await request.Request(
-                            url=url,
-                            method="get",
-                            headers=request.Headers(cookies={".ROBLOSECURITY": self.account.cookie}),
-                            retries=2
-                        ).send()
-                    except Exception as e:
-                        await self.ui_manager.log_event(f"Robux ophalen faalde: {e}", level="ERROR")
-                        resp = None
-                    latency_ms = int((time.perf_counter() - t0) * 1000)
-                    await self.ui_manager.add_requests(1)
-
-                    # parse raw dict or fallback to text
-                    new_robux = None
-                    if resp and resp.response_json:
-                        if isinstance(resp.response_json, dict):
-                            new_robux = resp.response_json.get("robux") or resp.response_json.get("balance")
-                        elif isinstance(resp.response_json, (int, float, str)):
-                            new_robux = resp.response_json
-                    if new_robux is None and resp and resp.response_text:
-                        try:
-                            parsed = json.loads(resp.response_text)
-                            new_robux = parsed.get("robux") or parsed.get("balance")
-                        except Exception:
-                            new_robux = None
-
-                    if new_robux is not None:
-                        self.ui_manager.robux = str(new_robux)
-                        await self.ui_manager.log_event(f"Robux updated: {new_robux} (latency {latency_ms} ms)")
-                    else:
-                        await self.ui_manager.log_event("Robux ophalen: geen geldige JSON ontvangen", level="WARN")
-                await asyncio.sleep(30)
-            except asyncio.CancelledError:
-                return
-            except Exception as e:
-                await self.ui_manager.log_event(f"Account monitor error: {e}", level="ERROR")
-                await asyncio.sleep(10)
-
-class ProxyThread(helpers.CombinedAttribute):
-    def __init__(self, watch_limiteds: WatchLimiteds, proxy: Optional[str]):
-        super().__init__(watch_limiteds)
-        self._proxy = proxy
-        self.deal_scraper = None
-
-    def check_if_item_elligable(self, item_data: items.Data, item_value_rap: items.RolimonsData) -> bool:
-        if not item_value_rap:
-            return False
-        if getattr(item_value_rap, "projected", -1) != -1:
-            return False
-
-        # get config for this item
-        item_buy_config = self.generic_settings if str(item_data.item_id) not in self.custom_settings else self.custom_settings.get(str(item_data.item_id), self.generic_settings)
-
-        # determine base_value according to price_measurer
-        pm = item_buy_config.get("price_measurer", "value_rap") if isinstance(item_buy_config, dict) else "value_rap"
-
-        base_value_item = 0
-        if pm == "value":
-            base_value_item = getattr(item_value_rap, "value", 0)
-        elif pm == "rap":
-            base_value_item = getattr(item_value_rap, "rap", 0)
-        else:  # value_rap
-            base_value_item = getattr(item_value_rap, "value", 0) or getattr(item_value_rap, "rap", 0)
-
-        if base_value_item <= 0:
-            return False
-
-        price = getattr(item_data, "lowest_resale_price", 0) or 0
-        percentage_off = ((base_value_item - price) / base_value_item * 100) if base_value_item else 0
-        robux_off = base_value_item - price
-
-        # apply thresholds from item_buy_config
-        if isinstance(item_buy_config, dict):
-            if item_buy_config.get("min_percentage_off") and percentage_off < item_buy_config.get("min_percentage_off"):
-                return False
-            if item_buy_config.get("min_robux_off") and robux_off < item_buy_config.get("min_robux_off"):
-                return False
-            if item_buy_config.get("max_robux_cost") and price > item_buy_config.get("max_robux_cost"):
-                return False
-
-        # apply global deal filter if set
-        try:
-            df = getattr(self, "deal_filter_min_percentage", None)
-            if df is not None:
-                if percentage_off < float(df):
-                    return False
-        except Exception:
-            pass
-
-        return True
-
-    async def get_resale_data(self, item: items.Data) -> Union[request.ResponseJsons.ResaleResponse, None]:
-        url = f"https://apis.roblox.com/marketplace-sales/v1/item/{item.collectible_item_id}/resellers?limit=1"
-        await self.ui_manager.log_event(f"Fetching resale for {item.item_id} via {self._proxy or 'local'}")
-        t0 = time.perf_counter()
-        try:
-            resp = await request.Request(url=url, method="get", proxy=self._proxy, retries=4).send()
-        except Exception as e:
-            await self.ui_manager.log_event(f"Resale request failed for {item.item_id}: {e}", level="ERROR")
-            await self.ui_manager.update_proxy_health(self._proxy, None, False, str(e))
-            return None
-        latency_ms = int((time.perf_counter() - t0) * 1000)
-        await self.ui_manager.update_proxy_health(self._proxy, latency_ms, True, None)
-        await self.ui_manager.add_requests(1)
-        return resp.response_json if resp else None
-
-    async def handle_response(self, item_list: request.ResponseJsons.ItemDetails):
-        if not item_list:
-            return
-        try:
-            rolimons_data = await self.rolimon_limiteds()
-        except Exception as e:
-            rolimons_data = {}
-            await self.ui_manager.log_event(f"Rolimons fetch failed: {e}", level="ERROR")
-
-        for item in item_list.items:
-            try:
-                item_id = getattr(item, "item_id", None)
-                if item_id is None:
-                    continue
-                iid = str(item_id)
-                rdata = rolimons_data.get(iid) if rolimons_data else None
-
-                if not rdata:
-                    await self.ui_manager.log_event(f"Item {item_id} not present on Rolimons - skipping")
-                    await self.ui_manager.add_items(1)
-                    await self.ui_manager.add_requests(0)
-                    continue
-
-                # ensure lowest_resale_price exists; some endpoints don't include direct price
-                price = getattr(item, "lowest_resale_price", 0) or 0
-
-                # compute base_value
-                pm = (self.generic_settings.get("price_measurer") if isinstance(self.generic_settings, dict) else "value_rap")
-                if pm == "value":
-                    base_val = getattr(rdata, "value", 0)
-                elif pm == "rap":
-                    base_val = getattr(rdata, "rap", 0)
-                else:
-                    base_val = getattr(rdata, "value", 0) or getattr(rdata, "rap", 0)
-
-                # compute pct_off
-                pct_off = ((base_val - price) / base_val * 100) if base_val else 0
-
-                # log what we check
-                await self.ui_manager.add_items(1)
-                await self.ui_manager.add_requests(0)
-                await self.ui_manager.add_activity(item_id, price, base_val, pct_off, self._proxy, "checked Rolimons & price")
-
-                # eligibility
-                if not self.check_if_item_elligable(item, rdata):
-                    await self.ui_manager.log_event(f"Item {item_id} ineligible: base={base_val}, price={price}, pct_off={round(pct_off,2)}%")
-                    continue
-
-                # fetch resale details
-                resale = await self.get_resale_data(item)
-                if not resale:
-                    continue
-
-                # set item price from resale if available
-                resale_price = getattr(resale, "price", None) or 0
-                item.lowest_resale_price = resale_price
-
-                # recalc pct_off with actual resale
-                pct_off_real = ((base_val - resale_price) / base_val * 100) if base_val else 0
-
-                # log decisive check
-                await self.ui_manager.log_event(f"Potential deal: Item {item_id} base={base_val} resale={resale_price} pct_off={round(pct_off_real,2)}% via {self._proxy or 'local'}")
-                await self.ui_manager.add_activity(item_id, resale_price, base_val, pct_off_real, self._proxy, "potential deal")
-
-                # check global filter again before buy
-                if self.deal_filter_min_percentage is not None and pct_off_real < float(self.deal_filter_min_percentage):
-                    await self.ui_manager.log_event(f"Skipping buy: pct_off {round(pct_off_real,2)}% < filter {self.deal_filter_min_percentage}%")
-                    continue
-
-                # build buy payload
-                buy_data = items.BuyData(
-                    collectible_item_id = item.collectible_item_id,
-                    collectible_item_instance_id = getattr(resale, "collectible_item_instance_id", ""),
-                    collectible_product_id = getattr(resale, "collectible_product_id", ""),
-                    expected_price = resale_price,
-                    expected_purchaser_id = str(self.account.user_id)
-                )
-
-                buy_mgr = BuyLimited(self.account, buy_data, self.ui_manager)
-                buy_result = await buy_mgr()
-                success = (isinstance(buy_result, tuple) and buy_result[0]) or (buy_result is True)
-                await self.ui_manager.log_event(f"{'BUY SUCCESS' if success else 'BUY FAIL'} for {item_id} at {resale_price} R$")
-            except Exception as e:
-                await self.ui_manager.log_event(f"Error handling item {getattr(item,'item_id','?')}: {e}", level="ERROR")
-
-    async def get_batch_item_data(self, url: str, items: List[items.Generic], proxy: Optional[str] = None):
-        if not items:
-            return None
-        await self.ui_manager.log_event(f"Requesting batch ({len(items)}) from {url} via {proxy or 'local'}")
-        t0 = time.perf_counter()
-        try:
-            response = await request.Request(
-                url = url,
-                method = "post",
-                headers = request.Headers(
-                    cookies = {".ROBLOSECURITY": self.account.cookie},
-                    x_csrf_token = await self.account.x_csrf_token()
-                ),
-                json_data = request.RequestJsons.jsonify_api_broad(url, items),
-                proxy = proxy,
-                retries = 3
-            ).send()
-        except Exception as e:
-            await self.ui_manager.log_event(f"Batch request failed: {e}", level="ERROR")
-            await self.ui_manager.update_proxy_health(proxy, None, False, str(e))
-            return None
-        latency_ms = int((time.perf_counter() - t0) * 1000)
-        await self.ui_manager.add_requests(1)
-        await self.ui_manager.log_event(f"Batch latency: {latency_ms} ms")
-        await self.ui_manager.update_proxy_health(proxy, latency_ms, True, None)
-
-        parsed = response.response_json if response else None
-        # fallback: try parse response_text
-        if parsed is None and response and response.response_text:
-            try:
-                raw = json.loads(response.response_text)
-                parsed = request.ResponseJsons.validate_json(url, raw)
-            except Exception:
-                parsed = None
-
-        await self.handle_response(parsed)
-        return parsed
-
-    async def watch(self):
-        if self.deal_mode:
-            self.deal_scraper = helpers.DealActivityScraper()
-            await self._watch_deals()
-        else:
-            await self._watch_listed()
-
-    async def _watch_deals(self):
-        await self.ui_manager.log_event("Deal Sniper Mode GESTART - polling elke 60s...")
-        while True:
-            try:
-                new_deals = await self.deal_scraper()
-                if not new_deals:
-                    await self.ui_manager.log_event("Geen/lege dealactivity response; wacht...", level="DEBUG")
-                    await asyncio.sleep(60)
-                    continue
-
-                roli = await self.rolimon_limiteds()
-                new_ids = []
-                for act in new_deals:
-                    try:
-                        iid = int(act[2])
-                    except Exception:
-                        continue
-                    r = roli.get(str(iid)) if roli else None
-                    if r and getattr(r, "projected", -1) == -1 and getattr(r, "rap", 0) > 0:
-                        new_ids.append(iid)
-
-                if new_ids:
-                    await self.ui_manager.log_event(f"{len(new_ids)} potentiële deals gevonden (voorbeeld: {new_ids[:20]})")
-                    batch_size = 120
-                    for i in range(0, len(new_ids), batch_size):
-                        batch = new_ids[i:i+batch_size]
-                        gen_items = [items.Generic(item_id=b, collectible_item_id="") for b in batch]
-                        await self.get_batch_item_data(url="https://catalog.roblox.com/v1/catalog/items/details", items=gen_items, proxy=self._proxy)
-                await asyncio.sleep(1)
-            except Exception as e:
-                await self.ui_manager.log_event(f"Fout in deal loop: {e}", level="ERROR")
-                await asyncio.sleep(10)
-
-    async def _watch_listed(self):
-        while True:
-            try:
-                await asyncio.gather(
-                    self.get_batch_item_data(url = "https://catalog.roblox.com/v1/catalog/items/details", items = self.limiteds(120), proxy = self._proxy),
-                    self.get_batch_item_data(url = "https://apis.roblox.com/marketplace-items/v1/items/details", items = self.limiteds(30), proxy = self._proxy)
-                )
-            except Exception as e:
-                await self.ui_manager.log_event(f"Fout in listed loop: {e}", level="ERROR")
-            finally:
-                await asyncio.sleep(1)
+# sniper.py (MEGA upgrade)
+from models import items, config, request
+from typing import Union, Tuple, Optional, List, Dict, Any, TYPE_CHECKING
+import errors
+import eventlog
+import helpers
+import batching
+import control
+import fetcher
+import identity
+import journal
+import ledger
+import metrics
+import compute
+import memory
+import profiler
+import pipeline
+import supervisor
+import asyncio
+import time
+import json
+from pathlib import Path
+
+from eventlog import log
+
+if TYPE_CHECKING:
+    import main
+
+class BuyLimited:
+    def __init__(self, user_data: "main.Account", buy_data: items.BuyData, ui_manager: helpers.UIManager) -> None:
+        self.user_data = user_data
+        self.buy_data = buy_data
+        self.ui_manager = ui_manager
+
+    async def __call__(self) -> Union[bool, Tuple[bool, Any]]:
+        log.info("Buy attempt for item {collectible_item_id} expected {price} R$", collectible_item_id=self.buy_data.collectible_item_id, price=self.buy_data.expected_price)
+        t0 = time.perf_counter()
+        try:
+            # headers and body prepared per account, only the listing fields are filled in here
+            resp = await self.user_data.purchase_template().request(
+                self.buy_data,
+                await self.user_data.x_csrf_token(),
+                challenge_solver=getattr(self.user_data, "autopass", None)
+            ).send()
+        except Exception as e:
+            log.error("Buy request failed (network): {error}", error=str(e))
+            await self.ui_manager.add_failed_buy(1)
+            return False
+
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        log.info("Buy request latency: {latency_ms} ms", latency_ms=latency_ms)
+        await self.ui_manager.add_requests(1)
+
+        if resp and resp.response_json and getattr(resp.response_json, "purchased", False):
+            log.info("GEKOCHT! Item {collectible_item_id} voor {price} R$", collectible_item_id=self.buy_data.collectible_item_id, price=self.buy_data.expected_price)
+            await self.ui_manager.add_items_bought(1)
+            return True, resp.response_json
+        else:
+            # try to extract error message
+            err = None
+            if resp and resp.response_json:
+                if isinstance(resp.response_json, dict):
+                    err = resp.response_json.get("errorMessage") or resp.response_json.get("error_message")
+                else:
+                    err = getattr(resp.response_json, "error_message", None)
+            if not err and resp:
+                err = (resp.response_text[:200] + "...") if resp.response_text else "Unknown"
+            log.warn("Niet gekocht: {error}", error=err)
+            await self.ui_manager.add_failed_buy(1)
+            return False, resp.response_json if resp else None
+
+# max purchases in flight at once across all workers
+MAX_CONCURRENT_BUYS = 2
+# hot items each worker prices straight on /resellers per round
+HOT_PROBES_PER_ROUND = 4
+# resale checks each worker runs at once in listed mode
+VERIFY_CONCURRENCY = 4
+# ineligible reasons that say nothing about the listing itself, never negative cached
+TRANSIENT_REASONS = ("unaffordable", "buying_paused")
+
+CATALOG_DETAILS_URL = "https://catalog.roblox.com/v1/catalog/items/details"
+MARKETPLACE_DETAILS_URL = "https://apis.roblox.com/marketplace-items/v1/items/details"
+
+def default_batch_sizers() -> Dict[str, batching.BatchSizer]:
+    """One shared sizer per details endpoint, starting from the old fixed sizes"""
+    return {
+        CATALOG_DETAILS_URL: batching.BatchSizer("catalog_details", initial=120, maximum=120),
+        MARKETPLACE_DETAILS_URL: batching.BatchSizer("marketplace_details", initial=30, maximum=120),
+    }
+
+def default_fetcher(batch_sizers: Dict[str, batching.BatchSizer]) -> fetcher.ItemDetailsFetcher:
+    return fetcher.ItemDetailsFetcher([
+        fetcher.DetailsSource("catalog", CATALOG_DETAILS_URL, request.ResponseJsons.parse_catalog_details, batch_sizers[CATALOG_DETAILS_URL]),
+        fetcher.DetailsSource("marketplace", MARKETPLACE_DETAILS_URL, request.ResponseJsons.parse_marketplace_details, batch_sizers[MARKETPLACE_DETAILS_URL]),
+    ])
+
+class SniperContext:
+    """
+    State shared by WatchLimiteds and its ProxyThread workers, passed to each worker explicitly.
+    Slotted so every read in the hot loop is a plain slot lookup.
+    """
+    __slots__ = (
+        "webhook", "account", "generic_settings", "custom_settings", "deal_filter_min_percentage",
+        "limiteds", "deal_mode", "rolimon_limiteds", "ui_manager", "ledger", "metrics", "buy_lane", "journal",
+        "batch_sizers", "fetcher", "identities", "hot_limiteds", "buying_paused", "resale_verdicts",
+        "deal_scraper"
+    )
+
+    def __init__(self, webhook: Optional[str], account: "main.Account", generic_settings: Dict[str, Any], custom_settings: Dict[str, Any],
+                 deal_filter_min_percentage: Optional[float], limiteds: config.Iterator, rolimon_limiteds: helpers.RolimonsDataScraper,
+                 ui_manager: helpers.UIManager, ledger: ledger.BalanceLedger, metrics: metrics.Metrics, buy_lane: asyncio.Semaphore,
+                 journal: journal.Journal, batch_sizers: Optional[Dict[str, batching.BatchSizer]] = None,
+                 identities: Optional[identity.IdentityCache] = None, hot_limiteds: Optional[List[int]] = None,
+                 resale_negative_ttl: float = 30.0):
+        self.webhook = webhook
+        self.account = account
+        self.generic_settings = generic_settings
+        self.custom_settings = custom_settings
+        self.deal_filter_min_percentage = deal_filter_min_percentage
+        self.limiteds = limiteds
+        self.deal_mode = len(limiteds) == 0
+        self.rolimon_limiteds = rolimon_limiteds
+        self.ui_manager = ui_manager
+        self.ledger = ledger
+        self.metrics = metrics
+        self.buy_lane = buy_lane
+        self.journal = journal
+        self.batch_sizers = batch_sizers if batch_sizers is not None else default_batch_sizers()
+        self.fetcher = default_fetcher(self.batch_sizers)
+        self.identities = identities if identities is not None else identity.IdentityCache()
+        self.hot_limiteds = config.Iterator([items.Generic(item_id=i, collectible_item_id="") for i in (hot_limiteds or [])])
+        # set from the control endpoint: keep evaluating, skip resale lookups and buys
+        self.buying_paused = False
+        # /resellers checks that didn't pay off, skipped while the catalog keeps showing the same price
+        self.resale_verdicts = fetcher.ResaleVerdicts(ttl=resale_negative_ttl)
+        # deal mode: one feed cursor for all workers, so an activity entry is only handled once
+        self.deal_scraper = helpers.DealActivityScraper()
+
+class WatchLimiteds:
+    def __init__(self, config: "main.Settings", rolimon_limiteds: helpers.RolimonsDataScraper, robux: str) -> None:
+        self.proxies = config.proxies or []
+        self.control_port = getattr(config, "control_port", None)
+        self.log_level = eventlog.level_of(getattr(config, "log_level", None))
+        self.log_path = getattr(config, "log_path", None)
+        self.supervisor: Optional[supervisor.Supervisor] = None
+        self.threads: List[ProxyThread] = []
+        budget_mb = getattr(config, "memory_budget_mb", None)
+        memory.accountant.budget = int(float(budget_mb) * 1024 * 1024) if budget_mb else None
+
+        generic_settings = config.buy_settings.generic_settings or {}
+
+        # new: min percent filter from generic settings or top-level config
+        deal_filter_min_percentage = None
+        # try from generic settings dict
+        if isinstance(generic_settings, dict):
+            deal_filter_min_percentage = generic_settings.get("deal_filter_min_percentage")
+        # fallback if exists as attribute on config
+        if getattr(config, "deal_filter_min_percentage", None):
+            deal_filter_min_percentage = config.deal_filter_min_percentage
+
+        balance = ledger.BalanceLedger()
+        try:
+            balance.sync(int(robux), time.monotonic())
+        except (TypeError, ValueError):
+            pass
+
+        self.context = SniperContext(
+            webhook = config.webhook,
+            account = config.account,
+            generic_settings = generic_settings,
+            custom_settings = config.buy_settings.custom_settings or {},
+            deal_filter_min_percentage = deal_filter_min_percentage,
+            limiteds = config.limiteds,
+            rolimon_limiteds = rolimon_limiteds,
+            ui_manager = helpers.UIManager(total_proxies = len(self.proxies), username = getattr(config.account, "user_name", ""), robux = robux),
+            ledger = balance,
+            metrics = metrics.registry,
+            buy_lane = asyncio.Semaphore(MAX_CONCURRENT_BUYS),
+            journal = journal.Journal(getattr(config, "journal_path", None) or journal.JOURNAL_PATH),
+            identities = getattr(config, "identities", None),
+            hot_limiteds = getattr(config, "hot_limiteds", None),
+            resale_negative_ttl = getattr(config, "resale_negative_ttl", 30.0)
+        )
+
+    async def __call__(self):
+        # structured log: rotated jsonl on disk, the dashboard as a second subscriber
+        log.set_level(self.log_level)
+        sink = eventlog.JsonlSink(Path(self.log_path)) if self.log_path else eventlog.JsonlSink()
+        log.subscribe(sink)
+        log.subscribe(self.context.ui_manager.on_log)
+        log.start()
+
+        # SIGUSR1 -> profile capture, optional local control endpoint
+        profiler.install_signal_handler()
+        control_server = None
+        # every worker, the account monitor and the UI restart with backoff instead of dying silently
+        proxies = self.proxies if self.proxies else [None]
+        self.supervisor = supervisor.Supervisor(expected_workers=len(proxies))
+        self.threads = []
+        for i, proxy in enumerate(proxies):
+            thread = ProxyThread(self.context, proxy, name=f"worker-{i}")
+            self.threads.append(thread)
+            self.supervisor.add(f"worker-{i}", thread.watch, progress=lambda thread=thread: thread.items_checked)
+        self.supervisor.add("account_monitor", self._account_monitor_loop, worker=False)
+        self.supervisor.add("ui", lambda: helpers.run_ui(ui_manager = self.context.ui_manager), worker=False)
+        self.supervisor.add("loop_lag", profiler.watch_loop_lag, worker=False)
+        self.register_caches()
+        self.supervisor.add("memory", memory.accountant.run, worker=False)
+        try:
+            if self.control_port:
+                control_server = control.ControlServer(self, port=int(self.control_port))
+                await control_server.start()
+                log.info("Control endpoint op 127.0.0.1:{port}", port=self.control_port)
+
+            self.context.journal.start()
+            compute.pool.warm()
+            await self.supervisor.run()
+        finally:
+            # also on cancellation, so a stopped sniper leaves no tasks, sockets or files behind
+            self.context.identities.save()
+            if control_server:
+                await control_server.stop()
+            self.context.journal.close()
+            compute.pool.close()
+            memory.accountant.clear()
+            memory.snapshots.stop()
+            log.close()
+            log.unsubscribe(sink)
+            log.unsubscribe(self.context.ui_manager.on_log)
+
+    def register_caches(self) -> None:
+        """Put every cache that grows with traffic or item count under memory.accountant, cheapest to rebuild first"""
+        ctx = self.context
+        accountant = memory.accountant
+        accountant.register("resale_verdicts", ctx.resale_verdicts.footprint, ctx.resale_verdicts.shrink, order=10)
+        accountant.register("ui", ctx.ui_manager.footprint, ctx.ui_manager.shrink, order=20, restore=ctx.ui_manager.restore)
+        accountant.register("price_book", ctx.fetcher.price_book.footprint, ctx.fetcher.price_book.shrink, order=30)
+        # the watchlist only ever looks up watched items; deal mode needs the whole index
+        rolimons = ctx.rolimon_limiteds
+        keep = None if ctx.deal_mode else (lambda target: rolimons.restrict(lambda: ctx.limiteds.ids() + ctx.hot_limiteds.ids()))
+        accountant.register("rolimons", rolimons.footprint, keep, order=40)
+        # persisted, dropping entries would drop them from identities.json too
+        accountant.register("identities", ctx.identities.footprint)
+
+    async def _account_monitor_loop(self):
+        while True:
+            try:
+                if not getattr(self.context.account, "user_id", None) or not getattr(self.context.account, "user_name", None):
+                    await self.context.account.populate_from_api()
+                    if getattr(self.context.account, "user_name", None):
+                        log.info("Ingelogd als: {user_name}", user_name=self.context.account.user_name)
+
+                # fetch robux
+                if getattr(self.context.account, "user_id", None):
+                    url = f"https://economy.roblox.com/v1/users/{self.context.account.user_id}/currency"
+                    observed_at = time.monotonic()
+                    t0 = time.perf_counter()
+                    try:
+                        resp = await request.Request(
+                            url=url,
+                            method="get",
+                            headers=request.Headers(cookies={".ROBLOSECURITY": self.context.account.cookie}),
+                            retries=2,
+                            deadline=request.BACKGROUND_DEADLINE
+                        ).send()
+                    except Exception as e:
+                        log.error("Robux ophalen faalde: {error}", error=str(e))
+                        resp = None
+                    latency_ms = int((time.perf_counter() - t0) * 1000)
+                    await self.context.ui_manager.add_requests(1)
+
+                    # parse raw dict (Request.send already fell back from resp.json to the raw body)
+                    new_robux = None
+                    if resp and resp.response_json:
+                        if isinstance(resp.response_json, dict):
+                            new_robux = resp.response_json.get("robux") or resp.response_json.get("balance")
+                        elif isinstance(resp.response_json, (int, float, str)):
+                            new_robux = resp.response_json
+
+                    if new_robux is not None:
+                        self.context.ui_manager.robux = str(new_robux)
+                        try:
+                            self.context.ledger.sync(int(new_robux), observed_at)
+                        except (TypeError, ValueError):
+                            pass
+                        log.info("Robux updated: {robux} (latency {latency_ms} ms)", robux=new_robux, latency_ms=latency_ms)
+                    else:
+                        log.warn("Robux ophalen: geen geldige JSON ontvangen")
+
+                # keep the current + next window otp ready for a challenge on the buy path
+                autopass = getattr(self.context.account, "autopass", None)
+                if autopass and autopass.key:
+                    autopass.prime()
+                self.context.resale_verdicts.prune(time.monotonic())
+                if self.context.identities.dirty:
+                    await compute.pool.run_thread("identities.save", self.context.identities.snapshot().save)
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Account monitor error: {error}", error=str(e))
+                await asyncio.sleep(10)
+
+class Candidate:
+    """An item that passed the rules on its listed price, on its way through the resale check and the buy"""
+    __slots__ = ("item", "rdata", "base_val", "price", "resale")
+
+    def __init__(self, item: items.Data, rdata: items.RolimonsData, base_val: int, price: int,
+                 resale: Optional[request.ResponseJsons.ResaleResponse] = None):
+        self.item = item
+        self.rdata = rdata
+        self.base_val = base_val
+        # listed (catalog) price the rules passed on
+        self.price = price
+        self.resale = resale
+
+class ProxyThread:
+    __slots__ = ("context", "_proxy", "name", "items_checked", "pipeline")
+
+    def __init__(self, context: "SniperContext", proxy: Optional[str], name: str = "worker"):
+        self.context = context
+        self._proxy = proxy
+        self.name = name
+        # listed mode only, set while watch() runs
+        self.pipeline: Optional[pipeline.Pipeline] = None
+        # evaluated items, read by the supervisor for items/s
+        self.items_checked = 0
+
+    def check_if_item_elligable(self, item_data: items.Data, item_value_rap: items.RolimonsData) -> bool:
+        return self.ineligible_reason(item_data, item_value_rap) is None
+
+    @profiler.timed("check_if_item_elligable")
+    def ineligible_reason(self, item_data: items.Data, item_value_rap: items.RolimonsData) -> Optional[str]:
+        """None if the item passes every buy rule, otherwise the first rule it failed"""
+        ctx = self.context
+        if not item_value_rap:
+            return "no_rolimons_data"
+        if getattr(item_value_rap, "projected", -1) != -1:
+            return "projected"
+
+        # get config for this item
+        item_buy_config = ctx.generic_settings if str(item_data.item_id) not in ctx.custom_settings else ctx.custom_settings.get(str(item_data.item_id), ctx.generic_settings)
+
+        # determine base_value according to price_measurer
+        pm = item_buy_config.get("price_measurer", "value_rap") if isinstance(item_buy_config, dict) else "value_rap"
+
+        base_value_item = 0
+        if pm == "value":
+            base_value_item = getattr(item_value_rap, "value", 0)
+        elif pm == "rap":
+            base_value_item = getattr(item_value_rap, "rap", 0)
+        else:  # value_rap
+            base_value_item = getattr(item_value_rap, "value", 0) or getattr(item_value_rap, "rap", 0)
+
+        if base_value_item <= 0:
+            return "no_base_value"
+
+        price = getattr(item_data, "lowest_resale_price", 0) or 0
+
+        # can't afford it (balance minus in-flight buys) -> no resale lookup, no buy
+        if not ctx.ledger.can_afford(price):
+            ctx.metrics.inc("skipped_unaffordable")
+            return "unaffordable"
+
+        percentage_off = ((base_value_item - price) / base_value_item * 100) if base_value_item else 0
+        robux_off = base_value_item - price
+
+        # apply thresholds from item_buy_config
+        if isinstance(item_buy_config, dict):
+            if item_buy_config.get("min_percentage_off") and percentage_off < item_buy_config.get("min_percentage_off"):
+                return "min_percentage_off"
+            if item_buy_config.get("min_robux_off") and robux_off < item_buy_config.get("min_robux_off"):
+                return "min_robux_off"
+            if item_buy_config.get("max_robux_cost") and price > item_buy_config.get("max_robux_cost"):
+                return "max_robux_cost"
+
+        # apply global deal filter if set
+        try:
+            df = ctx.deal_filter_min_percentage
+            if df is not None:
+                if percentage_off < float(df):
+                    return "deal_filter_min_percentage"
+        except Exception:
+            pass
+
+        # last, so the journal still shows which items would have been bought
+        if ctx.buying_paused:
+            return "buying_paused"
+
+        return None
+
+    async def get_resale_data(self, item: items.Data) -> Union[request.ResponseJsons.ResaleResponse, None]:
+        url = f"https://apis.roblox.com/marketplace-sales/v1/item/{item.collectible_item_id}/resellers?limit=1"
+        log.debug("Fetching resale for {item_id} via {proxy}", item_id=item.item_id, proxy=self._proxy or "local")
+        t0 = time.perf_counter()
+        try:
+            resp = await request.Request(url=url, method="get", proxy=self._proxy, retries=4, deadline=request.BUY_DEADLINE).send()
+        except Exception as e:
+            log.error("Resale request failed for {item_id}: {error}", item_id=item.item_id, error=str(e))
+            await self.context.ui_manager.update_proxy_health(self._proxy, None, False, str(e))
+            return None
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        await self.context.ui_manager.update_proxy_health(self._proxy, latency_ms, True, None)
+        await self.context.ui_manager.add_requests(1)
+        return resp.response_json if resp else None
+
+    # deal mode and direct callers; listed mode runs evaluate / verify / buy as pipeline stages,
+    # each timed on its own
+    @profiler.timed("handle_response")
+    async def handle_response(self, item_list: request.ResponseJsons.ItemDetails,
+                              resales: Optional[Dict[int, request.ResponseJsons.ResaleResponse]] = None):
+        """Evaluate details; items with an entry in `resales` were already priced on /resellers and skip that lookup"""
+        for candidate in await self.evaluate(item_list, resales):
+            try:
+                if await self.verify(candidate):
+                    await self.buy(candidate)
+            except Exception as e:
+                log.error("Error handling item {item_id}: {error}", item_id=candidate.item.item_id, error=str(e))
+
+    @profiler.timed("evaluate")
+    async def evaluate(self, item_list: request.ResponseJsons.ItemDetails,
+                       resales: Optional[Dict[int, request.ResponseJsons.ResaleResponse]] = None) -> List[Candidate]:
+        """Rules on the listed price: the items worth a resale check"""
+        if not item_list or not item_list.items:
+            return []
+        self.items_checked += len(item_list.items)
+        ctx = self.context
+        ui = ctx.ui_manager
+        try:
+            rolimons_data = await ctx.rolimon_limiteds()
+        except Exception as e:
+            rolimons_data = {}
+            log.error("Rolimons fetch failed: {error}", error=str(e))
+
+        candidates = []
+        for item in item_list.items:
+            try:
+                item_id = getattr(item, "item_id", None)
+                if item_id is None:
+                    continue
+                iid = str(item_id)
+                rdata = rolimons_data.get(iid) if rolimons_data else None
+
+                if not rdata:
+                    log.debug("Item {item_id} not present on Rolimons - skipping", item_id=item_id)
+                    await ui.add_items(1)
+                    await ui.add_requests(0)
+                    continue
+
+                # ensure lowest_resale_price exists; some endpoints don't include direct price
+                price = getattr(item, "lowest_resale_price", 0) or 0
+
+                # compute base_value
+                pm = (ctx.generic_settings.get("price_measurer") if isinstance(ctx.generic_settings, dict) else "value_rap")
+                if pm == "value":
+                    base_val = getattr(rdata, "value", 0)
+                elif pm == "rap":
+                    base_val = getattr(rdata, "rap", 0)
+                else:
+                    base_val = getattr(rdata, "value", 0) or getattr(rdata, "rap", 0)
+
+                # compute pct_off
+                pct_off = ((base_val - price) / base_val * 100) if base_val else 0
+
+                # log what we check
+                await ui.add_items(1)
+                await ui.add_requests(0)
+                await ui.add_activity(item_id, price, base_val, pct_off, self._proxy, "checked Rolimons & price")
+
+                # eligibility
+                reason = self.ineligible_reason(item, rdata)
+                ctx.journal.record(
+                    "decision", item_id=item_id, price=price, base=base_val, pct_off=round(pct_off, 2),
+                    rap=rdata.rap, value=rdata.value, eligible=reason is None, reason=reason,
+                    rules=ctx.custom_settings.get(iid, ctx.generic_settings), deal_filter=ctx.deal_filter_min_percentage,
+                    available=ctx.ledger.available, proxy=self._proxy
+                )
+                if reason is not None:
+                    log.debug("Item {item_id} ineligible ({reason}): base={base}, price={price}, pct_off={pct_off}%", item_id=item_id, reason=reason, base=base_val, price=price, pct_off=round(pct_off, 2))
+                    continue
+
+                candidates.append(Candidate(item, rdata, base_val, price, resales.get(item_id) if resales else None))
+            except Exception as e:
+                log.error("Error handling item {item_id}: {error}", item_id=getattr(item, "item_id", "?"), error=str(e))
+        return candidates
+
+    @profiler.timed("verify")
+    async def verify(self, candidate: Candidate) -> bool:
+        """Price the candidate on /resellers (unless the hot path already did) and check the rules again; True = buy it"""
+        ctx = self.context
+        ui = ctx.ui_manager
+        item, rdata, base_val, price = candidate.item, candidate.rdata, candidate.base_val, candidate.price
+        item_id = item.item_id
+
+        # fetch resale details (unless the hot path already did, or the same catalog price already turned out not to be a deal)
+        verdicts = ctx.resale_verdicts
+        t0 = time.perf_counter()
+        resale = candidate.resale
+        if resale is None:
+            if verdicts.rejected(item.collectible_item_id, price, time.monotonic()):
+                log.debug("Item {item_id} at {price} R$ already checked on resellers - skipping", item_id=item_id, price=price)
+                return False
+            resale = await self.get_resale_data(item)
+        resale_ms = int((time.perf_counter() - t0) * 1000)
+        if not resale:
+            verdicts.reject(item.collectible_item_id, price, time.monotonic(), failed=True)
+            ctx.journal.record("resale", item_id=item_id, collectible_item_id=item.collectible_item_id, ok=False, latency_ms=resale_ms, proxy=self._proxy)
+            return False
+        candidate.resale = resale
+
+        # set item price from resale if available
+        resale_price = getattr(resale, "price", None) or 0
+        item.lowest_resale_price = resale_price
+
+        # recalc pct_off with actual resale
+        pct_off_real = ((base_val - resale_price) / base_val * 100) if base_val else 0
+        ctx.journal.record(
+            "resale", item_id=item_id, collectible_item_id=item.collectible_item_id, ok=True, latency_ms=resale_ms,
+            catalog_price=price, resale_price=resale_price, pct_off=round(pct_off_real, 2), seller_id=getattr(resale, "seller_id", 0),
+            proxy=self._proxy
+        )
+
+        # log decisive check
+        log.info("Potential deal: Item {item_id} base={base} resale={price} pct_off={pct_off}% via {proxy}", item_id=item_id, base=base_val, price=resale_price, pct_off=round(pct_off_real, 2), proxy=self._proxy or "local")
+        await ui.add_activity(item_id, resale_price, base_val, pct_off_real, self._proxy, "potential deal")
+
+        # check the rules again with the real price (the catalog price can be stale)
+        reason = self.ineligible_reason(item, rdata)
+        if reason is not None:
+            log.info("Skipping buy: {item_id} at {price} R$ ({reason}), pct_off {pct_off}%", item_id=item_id, price=resale_price, reason=reason, pct_off=round(pct_off_real, 2))
+            if reason not in TRANSIENT_REASONS:
+                verdicts.reject(item.collectible_item_id, price, time.monotonic())
+            return False
+        return True
+
+    @profiler.timed("buy")
+    async def buy(self, candidate: Candidate) -> None:
+        ctx = self.context
+        item, resale, base_val = candidate.item, candidate.resale, candidate.base_val
+        item_id = item.item_id
+        resale_price = getattr(resale, "price", None) or 0
+
+        # build buy payload
+        buy_data = items.BuyData(
+            collectible_item_id = item.collectible_item_id,
+            collectible_item_instance_id = getattr(resale, "collectible_item_instance_id", ""),
+            collectible_product_id = getattr(resale, "collectible_product_id", ""),
+            expected_price = resale_price,
+            expected_purchaser_id = str(ctx.account.user_id)
+        )
+
+        # hold the robux while the purchase is in flight
+        reservation = ctx.ledger.reserve(resale_price)
+        if reservation is None:
+            log.info("Skipping buy: {price} R$ > available {available} R$", price=resale_price, available=ctx.ledger.available)
+            ctx.metrics.inc("skipped_unaffordable")
+            return
+
+        success = False
+        paused = False
+        buy_result = None
+        t0 = time.perf_counter()
+        try:
+            async with ctx.buy_lane:
+                # buying can be paused while this candidate waited in the buy queue or for the lane
+                paused = ctx.buying_paused
+                if not paused:
+                    buy_mgr = BuyLimited(ctx.account, buy_data, ctx.ui_manager)
+                    buy_result = await buy_mgr()
+            success = (isinstance(buy_result, tuple) and buy_result[0]) or (buy_result is True)
+        finally:
+            if success:
+                ctx.ledger.commit(reservation)
+            else:
+                ctx.ledger.release(reservation)
+            if paused:
+                ctx.journal.record(
+                    "decision", item_id=item_id, price=resale_price, base=base_val, eligible=False, reason="buying_paused",
+                    available=ctx.ledger.available, proxy=self._proxy
+                )
+            else:
+                ctx.journal.record(
+                    "buy", item_id=item_id, collectible_item_id=item.collectible_item_id, price=resale_price, base=base_val,
+                    success=success, latency_ms=int((time.perf_counter() - t0) * 1000),
+                    result=buy_result[1] if isinstance(buy_result, tuple) and len(buy_result) > 1 else None
+                )
+        if paused:
+            log.info("Skipping buy: {item_id} at {price} R$ (buying_paused)", item_id=item_id, price=resale_price)
+            return
+        (log.info if success else log.warn)("{outcome} for {item_id} at {price} R$", outcome="BUY SUCCESS" if success else "BUY FAIL", item_id=item_id, price=resale_price)
+
+    async def get_batch_item_data(self, url: str, items: List[items.Generic], proxy: Optional[str] = None):
+        parsed = await self.fetch_batch(url, items, proxy)
+        await self.handle_response(parsed)
+        return parsed
+
+    async def fetch_batch(self, url: str, items: List[items.Generic], proxy: Optional[str] = None) -> Optional[request.ResponseJsons.ItemDetails]:
+        return self.read_batch(url, await self.send_batch(url, items, proxy))
+
+    async def send_batch(self, url: str, items: List[items.Generic], proxy: Optional[str] = None, decode: bool = True) -> Optional[request.Response]:
+        """One details request; with decode=False the body comes back undecoded for read_batch"""
+        if not items:
+            return None
+        log.debug("Requesting batch ({size}) from {url} via {proxy}", size=len(items), url=url, proxy=proxy or "local")
+        sizer = self.context.batch_sizers.get(url)
+        req = request.Request(
+            url = url,
+            method = "post",
+            headers = request.Headers(
+                cookies = {".ROBLOSECURITY": self.context.account.cookie},
+                x_csrf_token = await self.context.account.x_csrf_token()
+            ),
+            template = self.context.account.poll_headers,
+            json_data = request.RequestJsons.jsonify_api_broad(url, items),
+            proxy = proxy,
+            retries = 3,
+            decode = decode
+        )
+        t0 = time.perf_counter()
+        try:
+            response = await req.send()
+        except Exception as e:
+            if sizer:
+                sizer.record(len(items), time.perf_counter() - t0, ok=False, status=req.last_status)
+            log.error("Batch request failed: {error}", error=str(e))
+            await self.context.ui_manager.update_proxy_health(proxy, None, False, str(e))
+            return None
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+        if sizer:
+            sizer.record(len(items), latency_ms / 1000, ok=True, status=response.status_code)
+        await self.context.ui_manager.add_requests(1)
+        log.debug("Batch latency: {latency_ms} ms", latency_ms=latency_ms)
+        await self.context.ui_manager.update_proxy_health(proxy, latency_ms, True, None)
+        return response
+
+    def read_batch(self, url: str, response: Optional[request.Response]) -> Optional[request.ResponseJsons.ItemDetails]:
+        if response is None:
+            return None
+        parsed = response.response_json
+        if response.body is not None:
+            try:
+                parsed = request.ResponseJsons.validate_json(url, json.loads(response.body))
+            except Exception:
+                parsed = None
+        if not isinstance(parsed, request.ResponseJsons.ItemDetails):
+            return None
+
+        # ids never change: learn them, and fill them in where this endpoint leaves them out
+        identities = self.context.identities
+        for item in parsed.items:
+            if item.collectible_item_id:
+                identities.learn(item.item_id, item.collectible_item_id, item.product_id)
+            else:
+                item.collectible_item_id = identities.collectible_item_id(item.item_id)
+        return parsed
+
+    async def price_hot(self, item: items.Generic) -> Optional[Tuple[request.ResponseJsons.ItemDetails, Dict[int, request.ResponseJsons.ResaleResponse]]]:
+        """
+        Hot item with a known collectible_item_id: price it on /resellers?limit=1 directly, skipping the
+        details round trip. Returns the listing as details + resale, so the buy needs no further lookup.
+        """
+        ctx = self.context
+        if ctx.buying_paused:
+            return None
+        collectible_item_id = item.collectible_item_id or ctx.identities.collectible_item_id(item.item_id)
+        if not collectible_item_id:
+            return None
+        data = items.Data(
+            item_id = item.item_id,
+            product_id = ctx.identities.product_id(item.item_id),
+            collectible_item_id = collectible_item_id,
+            lowest_resale_price = 0
+        )
+        observed_at = time.time()
+        resale = await self.get_resale_data(data)
+        if not resale or not getattr(resale, "price", 0):
+            return None
+        data.lowest_resale_price = resale.price
+
+        book = ctx.fetcher.price_book
+        if not book.observe(item.item_id, resale.price, observed_at, "resellers"):
+            return None
+        if not book.claim(item.item_id, resale.price, time.time()):
+            ctx.metrics.inc("details_deduplicated", "resellers")
+            return None
+        ctx.metrics.inc("hot_probes")
+        return request.ResponseJsons.ItemDetails(items=[data]), {item.item_id: resale}
+
+    # ---------------------------------------------------------
+    # listed mode pipeline: fetch -> decode -> evaluate -> verify -> buy
+    # ---------------------------------------------------------
+    async def _fetch(self, work: Tuple[fetcher.DetailsSource, List[items.Generic]]):
+        source, batch = work
+        observed_at = time.time()
+        t0 = time.perf_counter()
+        response = await self.send_batch(source.url, batch, self._proxy, decode=False)
+        if response is None:
+            return None
+        source.record_latency(time.perf_counter() - t0)
+        return [(source, response, observed_at)]
+
+    async def _decode(self, work: Tuple[fetcher.DetailsSource, request.Response, float]):
+        """Body -> items, merged into the PriceBook; only items that should be evaluated now go on"""
+        source, response, observed_at = work
+        fresh = self.context.fetcher.merge(source, self.read_batch(source.url, response), observed_at)
+        return [(fresh, None)] if fresh.items else None
+
+    async def _probe(self, item: items.Generic):
+        priced = await self.price_hot(item)
+        return [priced] if priced else None
+
+    async def _evaluate(self, work: Tuple[request.ResponseJsons.ItemDetails, Optional[Dict[int, request.ResponseJsons.ResaleResponse]]]):
+        return await self.evaluate(*work)
+
+    async def _verify(self, candidate: Candidate):
+        return [candidate] if await self.verify(candidate) else None
+
+    async def _buy(self, candidate: Candidate):
+        await self.buy(candidate)
+        return None
+
+    def build_pipeline(self) -> pipeline.Pipeline:
+        sources = len(self.context.fetcher.sources)
+        evaluate = pipeline.Stage("evaluate", self._evaluate, concurrency=1, maxsize=4)
+        # hot probes are already priced on /resellers, they join at evaluate
+        probe = pipeline.Stage("probe", self._probe, concurrency=HOT_PROBES_PER_ROUND, maxsize=HOT_PROBES_PER_ROUND)
+        probe.next = evaluate
+        return pipeline.Pipeline(self.name, [
+            probe,
+            pipeline.Stage("fetch", self._fetch, concurrency=sources, maxsize=sources),
+            pipeline.Stage("decode", self._decode, concurrency=1, maxsize=sources),
+            evaluate,
+            pipeline.Stage("verify", self._verify, concurrency=VERIFY_CONCURRENCY, maxsize=VERIFY_CONCURRENCY * 2),
+            pipeline.Stage("buy", self._buy, concurrency=MAX_CONCURRENT_BUYS, maxsize=MAX_CONCURRENT_BUYS),
+        ])
+
+    async def watch(self):
+        if self.context.deal_mode:
+            await self._watch_deals()
+        else:
+            await self._watch_listed()
+
+    def split_activity(self, activities: List[list], roli: Optional[items.ValueIndex]) -> Tuple[request.ResponseJsons.ItemDetails, List[int]]:
+        """
+        Deal activity entries worth a look: the ones with a listing price and a known collectible id
+        as ready-to-evaluate items, the rest as item ids that still need the catalog batch
+        """
+        identities = self.context.identities
+        direct: List[items.Data] = []
+        need_catalog: List[int] = []
+        seen = set()
+        for act in activities:
+            try:
+                iid = int(act[2])
+            except (TypeError, ValueError, IndexError):
+                continue
+            if iid in seen:
+                continue
+            seen.add(iid)
+            r = roli.get(iid) if roli else None
+            if not r or getattr(r, "projected", -1) != -1 or getattr(r, "rap", 0) <= 0:
+                continue
+            try:
+                price = int(act[3])
+            except (TypeError, ValueError, IndexError):
+                price = 0
+            cid = identities.collectible_item_id(iid)
+            if price > 0 and cid:
+                direct.append(items.Data(item_id=iid, product_id=identities.product_id(iid), collectible_item_id=cid, lowest_resale_price=price))
+            else:
+                need_catalog.append(iid)
+        return request.ResponseJsons.ItemDetails(items=direct), need_catalog
+
+    async def _watch_deals(self):
+        log.info("Deal Sniper Mode GESTART - polling elke 60s...")
+        ctx = self.context
+        while True:
+            try:
+                new_deals = await ctx.deal_scraper(self._proxy)
+                if not new_deals:
+                    log.debug("Geen/lege dealactivity response; wacht...")
+                    await asyncio.sleep(60)
+                    continue
+
+                roli = await self.context.rolimon_limiteds()
+                direct, new_ids = self.split_activity(new_deals, roli)
+                ctx.metrics.inc("deal_activity_direct", count=len(direct.items))
+                ctx.metrics.inc("deal_activity_catalog", count=len(new_ids))
+
+                if direct.items:
+                    # the feed already has id + price and we know the collectible id: straight to rules + resale check
+                    await self.handle_response(direct)
+
+                if new_ids:
+                    log.info("{count} potentiële deals via catalog (voorbeeld: {sample})", count=len(new_ids), sample=new_ids[:20])
+                    sizer = ctx.batch_sizers[CATALOG_DETAILS_URL]
+                    i = 0
+                    while i < len(new_ids):
+                        batch_size = sizer.size()
+                        batch = new_ids[i:i+batch_size]
+                        i += batch_size
+                        gen_items = [items.Generic(item_id=b, collectible_item_id="") for b in batch]
+                        await self.get_batch_item_data(url=CATALOG_DETAILS_URL, items=gen_items, proxy=self._proxy)
+                await asyncio.sleep(1)
+            except Exception as e:
+                log.error("Fout in deal loop: {error}", error=str(e))
+                await asyncio.sleep(10)
+
+    async def _watch_listed(self):
+        self.pipeline = self.build_pipeline()
+        try:
+            await self.pipeline.run(self._feed)
+        finally:
+            self.pipeline = None
+
+    async def _feed(self, pipe: pipeline.Pipeline):
+        """
+        One round per second: every planned batch into fetch, the hot items into probe. A full queue
+        blocks the put, so a stage that falls behind slows the rounds down instead of piling up work.
+        """
+        fetch, probe = pipe["fetch"], pipe["probe"]
+        ctx = self.context
+        while True:
+            try:
+                # a hot item is only probed once its collectible_item_id is known: until then it rides
+                # along in the details batches, whose answer teaches the identity cache
+                unknown = [i for i in ctx.hot_limiteds.original_data if not ctx.identities.collectible_item_id(i.item_id)]
+                draw = (lambda wanted: unknown + ctx.limiteds(wanted)) if unknown else ctx.limiteds
+                plan = ctx.fetcher.plan(draw)
+                for work in plan.items():
+                    await fetch.put(work)
+                if len(self.context.hot_limiteds):
+                    for item in self.context.hot_limiteds(HOT_PROBES_PER_ROUND):
+                        await probe.put(item)
+            except Exception as e:
+                log.error("Fout in listed loop: {error}", error=str(e))
+            finally:
+                await asyncio.sleep(1)
@@ -0,0 +1,227 @@
+# soak.py
+"""
+Soak run: the real WatchLimiteds against the local MockServer, sampling resources until the end.
+
+    python soak.py --minutes 30                 # 30 wall minutes, loop sleeps compressed 20x
+    python soak.py --minutes 10 --speed 60 --items 2000 --workers 4
+
+Every --interval seconds it samples open file descriptors, live asyncio tasks, open aiohttp
+sessions, RSS and gc object counts per type. Samples taken after --warmup are cut into quarters;
+a series fails when its median rises in every quarter AND it ends above its tolerance over the
+first quarter. That flags sustained growth, not a cache that fills once and levels off.
+
+--speed divides every asyncio.sleep in this process, so a 1 s poll round runs 20x as often and
+half an hour covers ~10 hours of rounds. Wall clock timers (rolimons refresh, csrf refresh) are
+not compressed. Exit status is 1 when any series grew; samples go to --out as json lines.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import aiohttp
+
+import main
+import sniper
+import helpers
+import metrics
+import mockserver
+
+# series -> (absolute tolerance, relative tolerance) on the growth from first to last quarter
+TOLERANCES: Dict[str, Tuple[float, float]] = {
+    "fds": (16, 0.5),
+    "tasks": (16, 0.5),
+    "sessions": (2, 0.0),
+    "rss_mb": (32, 0.25),
+}
+# per type object counts: only types above this many objects at the end are judged
+OBJECT_TOLERANCE = (2000, 0.5)
+TOP_TYPES = 40
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+        # peak, not current, but still shows growth
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def sample() -> Dict[str, Any]:
+    objects = gc.get_objects()
+    by_type = Counter(type(o).__name__ for o in objects)
+    sessions = sum(1 for o in objects if isinstance(o, aiohttp.ClientSession) and not o.closed)
+    del objects
+    return {
+        "ts": time.time(),
+        "fds": open_fds(),
+        "tasks": len(asyncio.all_tasks()),
+        "sessions": sessions,
+        "rss_mb": round(rss_mb(), 1),
+        "objects": dict(by_type.most_common(TOP_TYPES)),
+    }
+
+
+def sustained_growth(values: List[float], abs_tol: float, rel_tol: float) -> Tuple[bool, float]:
+    if len(values) < 8:
+        return False, 0.0
+    q = len(values) // 4
+    medians = [statistics.median(values[i * q:(i + 1) * q]) for i in range(4)]
+    grew = medians[-1] - medians[0]
+    rising = all(b > a for a, b in zip(medians, medians[1:]))
+    return rising and grew > max(abs_tol, rel_tol * medians[0]), grew
+
+
+def judge(samples: List[Dict[str, Any]]) -> List[Tuple[str, float, float, float, bool]]:
+    """(series, first, last, growth, failed) per series"""
+    rows = []
+    for name, (abs_tol, rel_tol) in TOLERANCES.items():
+        values = [s[name] for s in samples]
+        failed, grew = sustained_growth(values, abs_tol, rel_tol)
+        rows.append((name, values[0], values[-1], grew, failed))
+
+    last_types = samples[-1]["objects"]
+    for type_name, count in last_types.items():
+        if count < OBJECT_TOLERANCE[0]:
+            continue
+        values = [s["objects"].get(type_name, 0) for s in samples]
+        failed, grew = sustained_growth(values, *OBJECT_TOLERANCE)
+        rows.append((f"objects[{type_name}]", values[0], values[-1], grew, failed))
+    return rows
+
+
+def write_config(path: Path, server: mockserver.MockServer, workers: int, tmp: Path, deals: bool = False) -> None:
+    config = {
+        "webhook": None,
+        "account": {"cookie": "soak-cookie", "otp_token": ""},
+        "buy_settings": {
+            "generic_settings": {"min_percentage_off": 30, "min_robux_off": 0, "max_robux_cost": 10 ** 7, "price_measurer": "value"},
+            "custom_settings": {},
+        },
+        # no limiteds = deal mode on the activity feed
+        "limiteds": [] if deals else server.item_ids,
+        # None proxies = one direct worker each
+        "proxies": [None] * workers,
+        "journal_path": str(tmp / "journal.jsonl"),
+        "identity_path": str(tmp / "identities.json"),
+        "log_path": str(tmp / "logs" / "sniper.jsonl"),
+        "log_level": "INFO",
+    }
+    path.write_text(json.dumps(config))
+
+
+def compress_sleep(speed: float) -> None:
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, result=None):
+        return await real_sleep(delay / speed, result)
+
+    asyncio.sleep = sleep
+
+
+async def run(args, report) -> int:
+    tmp = Path(tempfile.mkdtemp(prefix="soak-"))
+    server = mockserver.MockServer(item_count=args.items, seed=args.seed, deal_rate=args.deal_rate)
+    await server.start()
+    server.install_routes()
+
+    config_path = tmp / "config.json"
+    write_config(config_path, server, args.workers, tmp, deals=args.deals)
+    settings = main.Settings(config_path)
+    await settings.load()
+    robux = await main.get_robux(settings.account)
+
+    watcher = sniper.WatchLimiteds(settings, helpers.RolimonsDataScraper(), robux)
+    task = asyncio.create_task(watcher())
+
+    samples: List[Dict[str, Any]] = []
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    started = time.monotonic()
+    end = started + args.minutes * 60
+    warmup_until = started + args.warmup * 60
+    try:
+        while time.monotonic() < end:
+            await asyncio.sleep(args.interval * args.speed)
+            if task.done():
+                print(f"WatchLimiteds exited early: {task.exception() if not task.cancelled() else 'cancelled'}", file=sys.stderr)
+                return 1
+            s = sample()
+            if out:
+                out.write(json.dumps(s) + "\n")
+                out.flush()
+            if time.monotonic() >= warmup_until:
+                samples.append(s)
+            print(
+                f"[{int(time.monotonic() - started):>5}s] fds={s['fds']} tasks={s['tasks']} sessions={s['sessions']} "
+                f"rss={s['rss_mb']}MB items={watcher.context.ui_manager.total_items_checked} requests={sum(server.hits.values())}",
+                file=sys.stderr
+            )
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        server.remove_routes()
+        await server.stop()
+        if out:
+            out.close()
+
+    if len(samples) < 8:
+        print(f"only {len(samples)} samples after warmup, need 8: run longer or sample more often", file=sys.stderr)
+        return 1
+
+    rows = judge(samples)
+    failed = [r for r in rows if r[4]]
+    print(f"{'series':<40} {'first':>10} {'last':>10} {'growth':>10}", file=report)
+    for name, first, last, grew, bad in rows:
+        print(f"{name:<40} {first:>10} {last:>10} {round(grew, 1):>10}{'  GROWING' if bad else ''}", file=report)
+    print(f"mock hits: {server.hits}", file=report)
+    counters = metrics.registry.snapshot()["counters"]
+    print(f"metrics: {json.dumps(counters, sort_keys=True)}", file=report)
+    print("FAIL: sustained growth in " + ", ".join(r[0] for r in failed) if failed else "OK: no sustained growth", file=report)
+    return 1 if failed else 0
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30.0, help="wall clock duration")
+    parser.add_argument("--warmup", type=float, default=2.0, help="minutes before samples count")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between samples (wall clock)")
+    parser.add_argument("--speed", type=float, default=20.0, help="divide every asyncio.sleep by this")
+    parser.add_argument("--items", type=int, default=500, help="watched items on the mock server")
+    parser.add_argument("--workers", type=int, default=2, help="ProxyThread workers")
+    parser.add_argument("--deal-rate", type=float, default=0.01, help="share of price ticks far below value")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--deals", action="store_true", help="run deal mode (activity feed) instead of the watchlist")
+    parser.add_argument("--out", default="soak_samples.jsonl", help="samples file ('' to skip)")
+    args = parser.parse_args(argv)
+
+    compress_sleep(args.speed)
+    # the dashboard still renders every frame, just not onto the terminal
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        code = asyncio.run(run(args, real_stdout))
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
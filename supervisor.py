@@ -0,0 +1,157 @@
+# supervisor.py
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import metrics
+from eventlog import log
+
+
+class Supervised:
+    """One long-running coroutine the supervisor keeps alive"""
+    __slots__ = (
+        "name", "factory", "progress", "worker", "running", "restarts", "started_at", "uptime",
+        "last_error", "backoff", "_last_items", "_last_ts", "rate"
+    )
+
+    def __init__(self, name: str, factory: Callable[[], Awaitable[Any]], progress: Optional[Callable[[], int]], worker: bool):
+        self.name = name
+        self.factory = factory
+        # items handled so far (read, never reset), None for loops without a throughput
+        self.progress = progress
+        # counts towards polling capacity
+        self.worker = worker
+        self.running = False
+        self.restarts = 0
+        self.started_at = 0.0
+        # seconds alive over all runs, not counting the current one
+        self.uptime = 0.0
+        self.last_error: Optional[str] = None
+        self.backoff = 0.0
+        self._last_items = 0
+        self._last_ts = time.monotonic()
+        self.rate = 0.0
+
+    def alive_for(self, now: float) -> float:
+        return now - self.started_at if self.running else 0.0
+
+    def status(self, now: float) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "worker": self.worker,
+            "restarts": self.restarts,
+            "uptime_s": round(self.uptime + self.alive_for(now), 1),
+            "current_run_s": round(self.alive_for(now), 1),
+            "items": self.progress() if self.progress else None,
+            "items_per_s": round(self.rate, 2) if self.progress else None,
+            "last_error": self.last_error,
+        }
+
+
+class Supervisor:
+    """
+    Keeps workers and background loops running.
+
+    A coroutine that raises (or returns) is logged and started again after a backoff that doubles
+    per consecutive failure up to `backoff_max`, and resets once a run lasted `healthy_after` seconds.
+    Every `report_interval` the supervisor updates per loop gauges (uptime, restarts, items/s) and
+    warns when fewer workers are effectively running than configured; a restarted worker only counts
+    again once it stayed up for `healthy_after` seconds.
+    """
+
+    def __init__(self, expected_workers: int, backoff_initial: float = 1.0, backoff_max: float = 60.0,
+                 healthy_after: float = 60.0, report_interval: float = 10.0):
+        self.expected_workers = expected_workers
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.healthy_after = healthy_after
+        self.report_interval = report_interval
+        self.loops: Dict[str, Supervised] = {}
+        self._degraded = False
+
+    def add(self, name: str, factory: Callable[[], Awaitable[Any]], progress: Optional[Callable[[], int]] = None, worker: bool = True) -> None:
+        self.loops[name] = Supervised(name, factory, progress, worker)
+
+    def effective(self, sup: Supervised, now: float) -> bool:
+        """Running, and not just restarted out of a crash loop"""
+        return sup.running and (sup.restarts == 0 or sup.alive_for(now) >= self.healthy_after)
+
+    @property
+    def capacity(self) -> int:
+        now = time.monotonic()
+        return sum(1 for s in self.loops.values() if s.worker and self.effective(s, now))
+
+    async def _keep(self, sup: Supervised) -> None:
+        while True:
+            sup.running = True
+            sup.started_at = time.monotonic()
+            try:
+                await sup.factory()
+                sup.last_error = "returned"
+                log.warn("{name} stopped, herstart", name=sup.name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                sup.last_error = f"{type(e).__name__}: {e}"[:200]
+                log.error("{name} crashed: {error}", name=sup.name, error=sup.last_error)
+            finally:
+                ran = time.monotonic() - sup.started_at
+                sup.uptime += ran
+                sup.running = False
+
+            sup.restarts += 1
+            metrics.registry.inc("supervisor_restarts", sup.name)
+            if ran >= self.healthy_after or sup.backoff == 0:
+                sup.backoff = self.backoff_initial
+            else:
+                sup.backoff = min(sup.backoff * 2, self.backoff_max)
+            await asyncio.sleep(sup.backoff)
+
+    def report(self) -> None:
+        now = time.monotonic()
+        registry = metrics.registry
+        for sup in self.loops.values():
+            if sup.progress:
+                items = sup.progress()
+                elapsed = now - sup._last_ts
+                sup.rate = (items - sup._last_items) / elapsed if elapsed > 0 else 0.0
+                sup._last_items = items
+                sup._last_ts = now
+                registry.set("items_per_s", sup.name, round(sup.rate, 2))
+            registry.set("uptime_s", sup.name, round(sup.uptime + sup.alive_for(now), 1))
+            registry.set("restarts", sup.name, sup.restarts)
+
+        capacity = self.capacity
+        registry.set("capacity", "workers", capacity)
+        registry.set("capacity", "expected", self.expected_workers)
+        if capacity < self.expected_workers:
+            if not self._degraded:
+                down = [s.name for s in self.loops.values() if s.worker and not self.effective(s, now)]
+                log.warn("Capaciteit {capacity}/{expected} workers, down: {down}", capacity=capacity, expected=self.expected_workers, down=down)
+            self._degraded = True
+        elif self._degraded:
+            log.info("Capaciteit hersteld: {capacity}/{expected} workers", capacity=capacity, expected=self.expected_workers)
+            self._degraded = False
+
+    async def _report_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "capacity": self.capacity,
+            "expected_workers": self.expected_workers,
+            "loops": {name: sup.status(now) for name, sup in self.loops.items()},
+        }
+
+    async def run(self) -> None:
+        tasks: List[asyncio.Task] = [asyncio.create_task(self._keep(sup), name=f"supervised:{sup.name}") for sup in self.loops.values()]
+        tasks.append(asyncio.create_task(self._report_loop(), name="supervisor:report"))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
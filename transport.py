@@ -0,0 +1,252 @@
+# transport.py
+"""
+HTTP backends behind Request.send / Request.stream, picked once per process with use(name).
+
+    aiohttp   the original behaviour: a ClientSession per Request (or the one the caller passed),
+              HTTP/1.1, so every concurrent call to the same host needs its own connection
+    httpx     one shared httpx.AsyncClient per proxy with a warm keep-alive pool, HTTP/1.1
+    http2     the same, with HTTP/2 negotiated where the server offers it over TLS: concurrent
+              batch, resale and buy calls to one host share a single connection
+
+httpx (and h2 for http2) are optional; when they are missing use() logs a warning and stays on aiohttp.
+
+A backend hands out a client whose request(method, url, headers=, json=, data=, proxy=, timeout=)
+behaves like aiohttp.ClientSession.request: an async context manager around a response with
+status, headers, cookies, await read() and content.iter_chunked(n). Timeouts surface as
+asyncio.TimeoutError whatever the backend, so Request.send handles them the same way.
+"""
+import ssl
+import asyncio
+import contextlib
+import http.cookiejar
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+
+import aiohttp
+
+import compute
+import metrics
+from eventlog import log
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+class Transport(ABC):
+    name = ""
+
+    @abstractmethod
+    def client(self, req: Any) -> Tuple[Any, bool]:
+        """(client for this Request, whether release() has to close it)"""
+
+    async def warm(self, proxies: Iterable[Optional[str]]) -> None:
+        """Set up whatever the backend keeps per proxy before the first request needs it"""
+
+    async def release(self, req: Any, client: Any, owned: bool) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------
+# AIOHTTP
+# ---------------------------------------------------------
+class AiohttpTransport(Transport):
+    """aiohttp.ClientSession is the client, its responses go back to Request untouched"""
+    name = "aiohttp"
+
+    def client(self, req: Any) -> Tuple[Any, bool]:
+        if req.session:
+            return req.session, False
+        # kept on the request: a challenge solver sends its own requests on it while the send is open
+        req.session = aiohttp.ClientSession()
+        return req.session, True
+
+    async def release(self, req: Any, client: Any, owned: bool) -> None:
+        if owned and req.close_session:
+            await client.close()
+
+
+# ---------------------------------------------------------
+# HTTPX
+# ---------------------------------------------------------
+class HttpxResponse:
+    """The part of aiohttp.ClientResponse Request uses, over an httpx streaming response"""
+    __slots__ = ("_resp",)
+
+    def __init__(self, resp: Any):
+        self._resp = resp
+
+    @property
+    def status(self) -> int:
+        return self._resp.status_code
+
+    @property
+    def headers(self) -> Any:
+        # httpx.Headers: case insensitive .get like the aiohttp multidict
+        return self._resp.headers
+
+    @property
+    def cookies(self) -> Any:
+        # name -> value, where aiohttp has morsels; Response reads both
+        return self._resp.cookies
+
+    @property
+    def http_version(self) -> str:
+        return self._resp.http_version
+
+    @property
+    def content(self) -> "HttpxResponse":
+        return self
+
+    async def read(self) -> bytes:
+        return await self._resp.aread()
+
+    def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        return self._resp.aiter_bytes(size)
+
+
+class HttpxClient:
+    """aiohttp.ClientSession.request look-alike over the transport's shared clients"""
+    __slots__ = ("transport",)
+
+    def __init__(self, transport: "HttpxTransport"):
+        self.transport = transport
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, json: Any = None, data: Optional[bytes] = None,
+                      proxy: Optional[str] = None, timeout: Optional[aiohttp.ClientTimeout] = None) -> AsyncIterator[HttpxResponse]:
+        total = timeout.total if timeout else None
+        phases = httpx.Timeout(total, connect=timeout.connect or total, read=timeout.sock_read or total) if timeout else httpx.Timeout(None)
+        client, gate = self.transport.shared(proxy)
+        try:
+            # httpx only caps the phases, the total (aiohttp's ClientTimeout.total) is on us
+            async with asyncio.timeout(total), gate:
+                async with client.stream(method, url, headers=headers, json=json, content=data, timeout=phases) as resp:
+                    metrics.registry.inc("http_version", resp.http_version)
+                    yield HttpxResponse(resp)
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e)) from e
+
+
+class HttpxTransport(Transport):
+    """
+    One httpx.AsyncClient per proxy, kept for the process: connections stay warm between polls
+    instead of being opened per Request. Its cookie jar refuses every cookie, so Set-Cookie answers
+    never leak into requests made for another account or host.
+
+    Two things make httpx slow under load, both handled here:
+    - building a client with a proxy takes ~200 ms (ssl contexts), so warm() builds them on a
+      compute thread for the configured proxies, all sharing one verify context.
+    - httpcore's pool rescans every connection against every queued request each time a request
+      starts or finishes. Once more requests are in flight than it has connections, that cost grows
+      with the queue and p99 goes from milliseconds to a second. A semaphore of the pool size in
+      front of each client keeps the waiting in asyncio, so the pool never queues.
+    """
+
+    def __init__(self, http2: bool = False, max_connections: int = 8):
+        self.name = "http2" if http2 else "httpx"
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        # proxy -> (client, in-flight gate)
+        self.clients: Dict[Optional[str], Tuple[Any, asyncio.Semaphore]] = {}
+        self._verify: Optional[ssl.SSLContext] = None
+        self._client = HttpxClient(self)
+
+    def _build(self, proxy: Optional[str]) -> Any:
+        if self._verify is None:
+            import certifi
+            self._verify = ssl.create_default_context(cafile=certifi.where())
+        return httpx.AsyncClient(
+            http2=self.http2,
+            proxy=proxy,
+            verify=self._verify,
+            limits=self.limits,
+            cookies=http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])),
+        )
+
+    async def warm(self, proxies: Iterable[Optional[str]]) -> None:
+        for proxy in proxies:
+            if proxy in self.clients:
+                continue
+            try:
+                client = await compute.pool.run_thread("transport.client", self._build, proxy)
+            except Exception as e:
+                # a bad proxy url fails again (and is reported) on the first request through it
+                log.error("Transport client voor {proxy} faalde: {error}", proxy=proxy or "local", error=str(e))
+                continue
+            self.clients[proxy] = (client, asyncio.Semaphore(self.max_connections))
+
+    def shared(self, proxy: Optional[str]) -> Tuple[Any, asyncio.Semaphore]:
+        entry = self.clients.get(proxy)
+        if entry is None:
+            # not warmed: built here, on the loop
+            metrics.registry.inc("transport_cold_client", self.name)
+            entry = self.clients[proxy] = (self._build(proxy), asyncio.Semaphore(self.max_connections))
+        return entry
+
+    def client(self, req: Any) -> Tuple[Any, bool]:
+        return self._client, False
+
+    async def close(self) -> None:
+        clients, self.clients = self.clients, {}
+        for client, _ in clients.values():
+            await client.aclose()
+
+
+# ---------------------------------------------------------
+# SELECTION
+# ---------------------------------------------------------
+def available(name: str) -> Optional[str]:
+    """None when the backend can be used here, otherwise why not"""
+    if name == "aiohttp":
+        return None
+    if name in ("httpx", "http2") and httpx is None:
+        return "httpx is not installed"
+    if name == "http2" and h2 is None:
+        return "h2 is not installed (pip install httpx[http2])"
+    if name not in ("httpx", "http2"):
+        return f"unknown transport {name!r} (aiohttp, httpx, http2)"
+    return None
+
+
+def create(name: str) -> Transport:
+    missing = available(name)
+    if missing:
+        raise ValueError(missing)
+    if name == "aiohttp":
+        return AiohttpTransport()
+    return HttpxTransport(http2=name == "http2")
+
+
+active: Transport = AiohttpTransport()
+
+
+async def use(name: str, proxies: Iterable[Optional[str]] = ()) -> Transport:
+    """
+    Switch every following Request to backend `name`, closing the previous one, and warm it up for
+    direct requests plus `proxies`. Stays on aiohttp when the backend can't be used.
+    """
+    global active
+    name = (name or "aiohttp").lower()
+    if name == active.name:
+        await active.warm([None, *proxies])
+        return active
+    missing = available(name)
+    if missing:
+        log.warn("Transport {name} niet beschikbaar ({reason}), blijf op {current}", name=name, reason=missing, current=active.name)
+        return active
+    previous, active = active, create(name)
+    await previous.close()
+    await active.warm([None, *proxies])
+    log.info("HTTP transport: {name}", name=active.name)
+    return active